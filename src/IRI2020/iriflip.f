@@ -17,6 +17,7 @@ C 2016.01 09/08/16 Main: NEWTON replaced by iteration procedure ------- B Gustav
 C 2016.02 05/07/18 Added array PRV11 to DATA statement ---------------- K. Knight
 C 2020.01 03/05/24 SECIPRD: added IMAX=0 at beginning ----------------- I. Alexeyevich
 C 2020.07 07/22/25 SCOLUM: IF(Y.GE.8) ERFY2=F/(G+Y) instead of GT ----- K. Johnston
+C 2020.G1 10/19/26 PRIMPR: update UV flux factors if F107 or F107A change
 C****************************************************************************************
 C subroutines for IDC model
 C
@@ -1580,7 +1581,7 @@ C.... 2009 for the chemical equilibrium model by P. richards.
       IMPLICIT NONE
       INTEGER IVERT,I,IJ,IK,IPROBS,IS,K,L,LMAX,NNI,K1
       REAL EUVION,F107,F107A,F107SV,FNFAC,FREQLY,FREQSR,O2LYXS,
-     >  O2SRXS,TAUN,UVFAC,ZLAM,EUV,FLUXN,LAMAX,PEPION,PEXCIT,
+     >  O2SRXS,TAUN,UVFAC,ZLAM,EUV,FLUXN,LAMAX,PEPION,PEXCIT,F107ASV,
      >  SIGABS,SIGION,TPOT,ZFLUX
       REAL Z,ZOX,ZN2,ZO2,HE,SZA,TN,CHI,ZZ,TNJ,TAU,FLUX,HEPLS,
      >  FBSBN,DISN,TAUGAM,FLUXG,ALTG,XNSIGF,DSPECT,GL,N4S
@@ -1596,9 +1597,9 @@ cpgr
       COMMON/SIGS/ZFLUX(37),SIGABS(3,37),ZLAM(37),SIGION(3,37),
      > TPOT(3,10),NNI(3),LAMAX
       COMMON/SOL/UVFAC(59),EUV
-      SAVE PROB,F107SV,TPROB    !.. Save values that are only calc once
+      SAVE PROB,F107SV,F107ASV,TPROB  !.. Values that are only calc once
 
-      DATA LMAX/0/, F107SV/0.0/, IPROBS/0/
+      DATA LMAX/0/, F107SV/0.0/, F107ASV/0.0/, IPROBS/0/
       !.. Fluxes for nighttime ion production in the 37 wavelength bins of
       !.. Torr et al GRL 1979. The fluxes are set to reproduce the production
       !.. rates in Strobel et al. PSS, p1027, 1980. Note that most bins are 
@@ -1610,7 +1611,10 @@ cpgr
 
       !.. UVFAC(58) is left over from FLIP routines for compatibility
       UVFAC(58)=-1.0 
-      IF(ABS((F107-F107SV)/F107).GT.0.005) THEN
+      !.. The factors depend on both indices. They are only reused for
+      !.. the same indices, so that the result does not depend on the
+      !.. previous calls.
+      IF((F107.NE.F107SV).OR.(F107A.NE.F107ASV)) THEN
         !.. update UV flux factors
         CALL FACEUV(UVFAC,F107,F107A)
         CALL FACSR(UVFAC,F107,F107A)
@@ -1618,6 +1622,7 @@ cpgr
         !.. call params to get solar flux data and cross sections
         CALL PARAMS(0,LMAX)
         F107SV=F107
+        F107ASV=F107A
       ENDIF
 
       !..  find probability for formation of each state  ........
@@ -6535,6 +6535,20 @@ C------------------------------------------------------------------------
      &            1,-1, 1,-1, 1,-1, 1, 1,-1, 1,-1, 1, 1,-1, 1,-1, 1,
      &           -1, 1,-1, 1,-1, 1, 1,-1, 1, 1,-1, 1,-1, 1, 1/
 C/////////////////////////////////////////////////////////////////////
+      REAL XINVO(4),XMLTO(4),XLEV(4,4)
+      INTEGER IDDDO(4)
+      SAVE XINVO,XMLTO,XLEV,IDDDO
+      DATA IDDDO/4*-1/
+C     The level densities do not depend on the altitude. They are
+C     reused for the other altitudes of the profile.
+      IF ((INVDIP .EQ. XINVO(ION+1)) .AND. (MLT .EQ. XMLTO(ION+1))
+     &    .AND. (DDD .EQ. IDDDO(ION+1))) THEN
+       N400=XLEV(1,ION+1)
+       N550=XLEV(2,ION+1)
+       N750=XLEV(3,ION+1)
+       N1000=XLEV(4,ION+1)
+       GOTO 190
+      END IF
 C     coefficients for mirroring
       DO 10 I=1,49
        D(1,3,I)=D(1,2,I)*MIRREQ(I)
@@ -6625,6 +6639,15 @@ C     1000km level
        N100B=N0B100
        N1000=(N100B-N100A)/(DDDB-DDDA)*(DDDD-DDDA)+N100A
 
+      XINVO(ION+1)=INVDIP
+      XMLTO(ION+1)=MLT
+      IDDDO(ION+1)=DDD
+      XLEV(1,ION+1)=N400
+      XLEV(2,ION+1)=N550
+      XLEV(3,ION+1)=N750
+      XLEV(4,ION+1)=N1000
+
+190   CONTINUE
 C     n(O+) AND n(N+) must not increase above 750km
       IF (((ION .EQ. 0) .OR. (ION .EQ. 3)) .AND. (N1000 .GT. N750))
      &      N1000=N750
@@ -6716,6 +6739,20 @@ C------------------------------------------------------------------------
      &            1,-1, 1,-1, 1,-1, 1, 1,-1, 1,-1, 1, 1,-1, 1,-1, 1,
      &           -1, 1,-1, 1,-1, 1, 1,-1, 1, 1,-1, 1,-1, 1, 1/
 C///////////////////////////////////////////////////////////////////////
+      REAL XINVO(4),XMLTO(4),XLEV(4,4)
+      INTEGER IDDDO(4)
+      SAVE XINVO,XMLTO,XLEV,IDDDO
+      DATA IDDDO/4*-1/
+C     The level densities do not depend on the altitude. They are
+C     reused for the other altitudes of the profile.
+      IF ((INVDIP .EQ. XINVO(ION+1)) .AND. (MLT .EQ. XMLTO(ION+1))
+     &    .AND. (DDD .EQ. IDDDO(ION+1))) THEN
+       N550=XLEV(1,ION+1)
+       N900=XLEV(2,ION+1)
+       N1500=XLEV(3,ION+1)
+       N2500=XLEV(4,ION+1)
+       GOTO 190
+      END IF
 C     coefficients for mirroring
       DO 10 I=1,49
        D(1,3,I)=D(1,2,I)*MIRREQ(I)
@@ -6806,6 +6843,15 @@ C     2500km level
        N250B=N0B250
        N2500=(N250B-N250A)/(DDDB-DDDA)*(DDDD-DDDA)+N250A
 
+      XINVO(ION+1)=INVDIP
+      XMLTO(ION+1)=MLT
+      IDDDO(ION+1)=DDD
+      XLEV(1,ION+1)=N550
+      XLEV(2,ION+1)=N900
+      XLEV(3,ION+1)=N1500
+      XLEV(4,ION+1)=N2500
+
+190   CONTINUE
 C     O+ and N+ may not increase above 1500km 
       IF (((ION .EQ. 0) .OR. (ION .EQ. 3)) .AND. (N2500 .GT. N1500)) 
      & N2500=N1500
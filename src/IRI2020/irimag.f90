@@ -0,0 +1,70 @@
+! Geomagnetic parameters of IRI_SUB (IGRF_DIP, SHELLG, GEODIP, GEOCGM01)
+! for a number of points, without evaluating the ionosphere.
+!
+! The IGRF coefficients (FELDCOF) are loaded once per distinct date, so the
+! points should be sorted by date. The coefficients of the last IRI_SUB
+! call are restored on return, since IRI_SUB only reloads them when the
+! date changes.
+!
+! out(:, i) = dip, declination, dip latitude, modip, L-value, |B| (Gauss),
+!             SHELLG code, dipole latitude, dipole longitude, CGM latitude,
+!             CGM longitude, CGM MLT
+subroutine iri_magnetic(alat, alon, alt, iyyyy, daynr, hourut, npts, jcgm, direct, out)
+   implicit none
+   integer, intent(in) :: npts, iyyyy(npts), daynr(npts)
+   logical, intent(in) :: jcgm
+   real, intent(in) :: alat(npts), alon(npts), alt(npts), hourut(npts)
+   character(len=*), intent(in) :: direct
+   real, intent(out) :: out(12, npts)
+   real :: umr, pi, era, aquad, bquad, dimo, ftime, gh1(196)
+   integer :: nmax
+   character(len=13) :: fil1
+   common /const/ umr, pi
+   common /igrf1/ era, aquad, bquad, dimo
+   common /model/ nmax, ftime, gh1, fil1
+   real :: tsave, ryear, ryearo, lati, longi, h, dec, dip, dipl, modip, fl, babs
+   real :: mlat, mlon, cgmlat, cgmlon, cgmmlt, dat(11, 4), pla(4), plo(4)
+   integer :: i, iyear, idayy, icode
+
+   ! constants as initialized by the first IRI_SUB call
+   pi = atan(1.0)*4.
+   umr = pi/180.
+   era = 6371.2
+   aquad = 6378.16*6378.16
+   bquad = 6356.775*6356.775
+
+   tsave = ftime
+   ryearo = -1.
+   do i = 1, npts
+      iyear = iyyyy(i)
+      idayy = 365
+      if (iyear/4*4 .eq. iyear) idayy = 366
+      ryear = iyear + (daynr(i) - 1.0)/idayy
+      if (ryear .ne. ryearo) then
+         call feldcof(ryear, direct)
+         ryearo = ryear
+      end if
+      lati = alat(i)
+      longi = alon(i)
+      if (longi .lt. 0.) longi = longi + 360.
+      h = alt(i)
+      call igrf_dip(lati, longi, ryear, h, dec, dip, dipl, modip)
+      call shellg(lati, longi, h, fl, icode, babs)
+      call geodip(iyear, lati, longi, mlat, mlon, 0)
+      cgmlat = -99.0
+      cgmlon = -99.0
+      cgmmlt = -1.0
+      if (jcgm) then
+         dat(1, 1) = lati
+         dat(2, 1) = longi
+         call geocgm01(1, iyear, h, dat, pla, plo)
+         cgmlat = dat(3, 3)
+         cgmlon = dat(4, 3)
+         cgmmlt = hourut(i) - dat(11, 3)
+         if (cgmmlt .lt. 0.) cgmmlt = 24. + cgmmlt
+      end if
+      out(:, i) = (/ dip, dec, dipl, modip, fl, babs, real(icode), &
+         mlat, mlon, cgmlat, cgmlon, cgmmlt /)
+   end do
+   if ((tsave .gt. 0.) .and. (ftime .ne. tsave)) call feldcof(tsave, direct)
+end subroutine
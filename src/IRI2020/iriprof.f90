@@ -0,0 +1,42 @@
+! Parameters of the electron density profile (XE_1) of the last IRI_SUB
+! call, to evaluate the profile at any height without calling IRI_SUB.
+!
+! prf(:) = hmF2, NmF2, hmF1, F1REG, B0, B1, C1,             (1-7)
+!          HZ, T, HST, hmE, NmE, HEF,                       (8-13)
+!          NIGHT, E(1:4),                                   (14-18)
+!          hmD, NmD, HDX, D1, XKK, FP30, FP3U, FP1, FP2,    (19-27)
+!          BETA, ETA, DELTA, ZETA, B2TOP, ITOPN,            (28-33)
+!          PAH(1:6), PALOGNE(1:6), HCOR1, HCOR2, SHC,       (34-48)
+!          local time, modip, PF10.7, lat, lon, day number  (49-54)
+! Densities are in m-3, logicals are 1 (true) or 0 (false).
+subroutine iri_profile(prf)
+   implicit none
+   real, intent(out) :: prf(54)
+   real :: hmf2, xnmf2, hmf1, b0, b1, c1, hz, t, hst, hme, xnme, hef, e(4)
+   real :: hmd, xnmd, hdx, d1, xkk, fp30, fp3u, fp1, fp2
+   real :: beta, eta, delta, zeta, b2top, tcor1, tcor2
+   real :: pah(6), palogne(6), hcor1, hcor2, shc, hour, modip, pf107, lati, longi
+   integer :: itopn, daynr
+   logical :: f1reg, night
+   common /block1/ hmf2, xnmf2, hmf1, f1reg
+   common /block2/ b0, b1, c1
+   common /block3/ hz, t, hst
+   common /block4/ hme, xnme, hef
+   common /block5/ night, e
+   common /block6/ hmd, xnmd, hdx
+   common /block7/ d1, xkk, fp30, fp3u, fp1, fp2
+   common /blo10/ beta, eta, delta, zeta
+   common /blo11/ b2top, itopn, tcor1, tcor2
+   common /blotop/ pah, palogne, hcor1, hcor2, shc, hour, modip, pf107, lati, &
+      longi, daynr
+
+   prf(1:7) = (/ hmf2, xnmf2, hmf1, merge(1., 0., f1reg), b0, b1, c1 /)
+   prf(8:13) = (/ hz, t, hst, hme, xnme, hef /)
+   prf(14) = merge(1., 0., night)
+   prf(15:18) = e
+   prf(19:27) = (/ hmd, xnmd, hdx, d1, xkk, fp30, fp3u, fp1, fp2 /)
+   prf(28:33) = (/ beta, eta, delta, zeta, b2top, real(itopn) /)
+   prf(34:39) = pah
+   prf(40:45) = palogne
+   prf(46:54) = (/ hcor1, hcor2, shc, hour, modip, pf107, lati, longi, real(daynr) /)
+end subroutine
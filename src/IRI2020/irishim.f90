@@ -22,3 +22,56 @@ subroutine iri20_eval(jf,jmag,alat,alon,iyyy,mmdd,dhour,zkm,nzkm,outf,oarr,direc
       end do
    endif
 end subroutine
+
+subroutine iri20_eval_batch(jf,jmag,alat,alon,iyyy,mmdd,dhour,zkm,nzkm,npts,outf,oarr,direct,logfile)
+   implicit none
+   logical, intent(in) :: jf(50, npts), jmag
+   real, intent(in) :: alat(npts), alon(npts), dhour(npts), zkm(nzkm, npts)
+   real, intent(inout) :: outf(20, nzkm, npts), oarr(100, npts)
+   integer, intent(in) :: iyyy(npts), mmdd(npts), nzkm, npts
+   character(len=*), intent(in) :: direct
+   character(len=*), intent(in) :: logfile
+   logical :: jfi(50)
+   integer :: i, j
+   do i=1,npts
+      jfi = jf(:, i)
+      call iri_sub(jfi, jmag, alat(i), alon(i), iyyy(i), mmdd(i), dhour(i), &
+         zkm(:, i), nzkm, outf(:, :, i), oarr(:, i), direct, logfile)
+      if (jfi(22)) then
+         do j=5,13
+            outf(j,:,i) = outf(j,:,i)*outf(1,:,i) / 100.0 ! % to absolute units
+         end do
+      endif
+   end do
+end subroutine
+
+subroutine iri20_magnetic(alat,alon,alt,iyyy,daynr,hourut,npts,jcgm,direct,out)
+   implicit none
+   real, intent(in) :: alat(npts), alon(npts), alt(npts), hourut(npts)
+   integer, intent(in) :: iyyy(npts), daynr(npts), npts
+   logical, intent(in) :: jcgm
+   character(len=*), intent(in) :: direct
+   real, intent(out) :: out(12, npts)
+   call iri_magnetic(alat, alon, alt, iyyy, daynr, hourut, npts, jcgm, direct, out)
+end subroutine
+
+subroutine iri20_profile(jf,jmag,alat,alon,iyyy,mmdd,dhour,npts,prf,oarr,direct,logfile)
+   implicit none
+   logical, intent(in) :: jf(50, npts), jmag
+   real, intent(in) :: alat(npts), alon(npts), dhour(npts)
+   real, intent(out) :: prf(54, npts)
+   real, intent(inout) :: oarr(100, npts)
+   integer, intent(in) :: iyyy(npts), mmdd(npts), npts
+   character(len=*), intent(in) :: direct
+   character(len=*), intent(in) :: logfile
+   logical :: jfi(50)
+   real :: zkm(1), outf(20, 1)
+   integer :: i
+   zkm(1) = 300.0
+   do i=1,npts
+      jfi = jf(:, i)
+      call iri_sub(jfi, jmag, alat(i), alon(i), iyyy(i), mmdd(i), dhour(i), &
+         zkm, 1, outf, oarr(:, i), direct, logfile)
+      call iri_profile(prf(:, i))
+   end do
+end subroutine
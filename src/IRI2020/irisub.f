@@ -283,6 +283,22 @@ c 2020.G1 11/11/25 iri_sub: Bugfix: HTETI would not be computed
 c                  leading to wrong Ti values that would follow
 c                  Tn below ~200km and Te above ~200km, creating
 c                  a discontinuous, non-physical Ti profile.
+c 2020.G1 10/19/26 iri_sub: reuse magnetic and CGM coordinates for
+c                  repeated calls at the same location and date
+c 2020.G1 10/19/26 iri_sub: Bugfix: LATILO,LONGILO,LATICO,LONGICO
+c                  were implicitly INTEGER: magnetic coordinates of
+c                  a nearby location were reused at integer locations
+c                  and never reused at non-integer locations
+c 2020.G1 10/19/26 iri_sub: no SOCO call per height; CALION reuses
+c                  the level densities of IONLOW/IONHIGH
+c 2020.G1 10/19/26 iri_sub: Bugfix: XTETI kept the value of the
+c                  previous call if Ti < Te up to 30000 km, making
+c                  Ti depend on the order of the calls.
+c 2020.G1 10/19/26 iri_sub: Bugfix: OARR(21) is Ti(430km) of Tru-2021
+c                  instead of TI1 of a previous Bil-1981 call.
+c 2020.G1 10/19/26 iri_sub: COMMON /BLOTOP/ with the parameters of
+c                  the topside corrections TCOR1 and TCOR2 (used by
+c                  IRI_PROFILE)
 C
 C*****************************************************************
 C********* INTERNATIONAL REFERENCE IONOSPHERE (IRI). *************
@@ -484,7 +500,7 @@ C*****************************************************************
       REAL       LATI,LONGI,MO2,MO,MODIP,NMF2,MAGBR,INVDIP,IAPO,  
      &           NMF1,NME,NMD,MM,MLAT,MLONG,NMF2S,NMES,INVDPC,
      &           INVDIP_OLD,INVDIP_OLD_110,INVDIP_OLD_600,
-     &           INVDPC_OLD
+     &           INVDPC_OLD,LATILO,LONGILO,LATICO,LONGICO
       INTEGER    NDIRECT, NLOGFILE
       CHARACTER  FILNAM*12
       CHARACTER  FILPAT*256
@@ -512,7 +528,7 @@ c      CHARACTER FILNAM*53
      &  NOTEM,NOION,TENEOP,OLD79,JF(50),URSIFO,igin,igino,mess,
      &  dnight,enight,fnight,fstorm_on,estorm_on,B0IN,B1IN,
      &  fof2ino,hmf2ino,f107in,f107ino,f107_81in,f107_81ino,
-     &  sam_moye
+     &  sam_moye,sam_loc,sam_cgm,jfloco(6)
 
       COMMON /CONST/UMR,PI  /const1/humr,dumr   /ARGEXP/ARGMAX
      &   /IGRF1/ERA,AQUAD,BQUAD,DIMO	/BLOCK2/B0,B1,C1
@@ -520,6 +536,8 @@ c      CHARACTER FILNAM*53
      &   /BLOCK4/HME,NMES,HEF	/BLOCK5/ENIGHT,E
      &   /BLOCK6/HMD,NMD,HDX	/BLOCK7/D1,XKK,FP30,FP3U,FP1,FP2
      & /BLO10/BETA,ETA,DELTA,ZETA /BLO11/B2TOP,itopn,tcor1,tcor2   
+     & /BLOTOP/PAH,PALOGNE,HCOR1,HCOR2,SHC,HOUR,MODIP,PF107,LATI,
+     &   LONGI,DAYNR
       COMMON /findRLAT/FLON,RYEAR
      &   /iounit/konsol,mess     /CSW/SW(25),ISW,SWC(25)
      &   /QTOP/Y05,H05TOP,QF,XNETOP,XM3000,HHALF,TAU 
@@ -602,6 +620,8 @@ C
 		hmf2ino=.true.
 		ut0=-1
 		ursifo=.true.
+		ryearlo=-1.
+		iyearco=-1
 C Initialize parameters for COMMON/IGRF1/
 C   ERA		EARTH RADIUS (WGS-84: 6371.137 KM) 
 C   EREQU   MAJOR HALF AXIS FOR EARTH ELLIPSOID (6378.160 KM)
@@ -1036,6 +1056,17 @@ C
          CALL FELDCOF(RYEAR,DIRECT)
         endif
 
+c
+c The magnetic parameters only depend on the location, the date (via
+c the IGRF coefficients) and the switches below. They are reused from
+c the previous call for time series at a fixed location.
+c
+        sam_loc=(lati.eq.latilo).and.(longi.eq.longilo).and.
+     &    (ryear.eq.ryearlo).and.(jf(18).eqv.jfloco(1)).and.
+     &    (jf(3).eqv.jfloco(2)).and.(jf(6).eqv.jfloco(3)).and.
+     &    (jf(2).eqv.jfloco(4)).and.(jf(23).eqv.jfloco(5)).and.
+     &    (jf(48).eqv.jfloco(6))
+        if(sam_loc) goto 5591
         if(jf(18)) then
         	call igrf_dip(lati,longi,ryear,300.0,dec,dip,magbr,modip)
         else
@@ -1069,8 +1100,17 @@ c
            if(fl.gt.10.) fl=10.
       	   invdip_old_600=INVDPC_OLD(FL,DIMO,BABS,DIPL)
 	   endif
-
-        ABSLAT=ABS(LATI)
+        latilo=lati
+        longilo=longi
+        ryearlo=ryear
+        jfloco(1)=jf(18)
+        jfloco(2)=jf(3)
+        jfloco(3)=jf(6)
+        jfloco(4)=jf(2)
+        jfloco(5)=jf(23)
+        jfloco(6)=jf(48)
+
+5591    ABSLAT=ABS(LATI)
         ABSMLT=ABS(MLAT)
         ABSMDP=ABS(MODIP)
         ABSMBR=ABS(MAGBR)
@@ -1095,9 +1135,17 @@ c
         cgm_mlt=-1.0
 c        if(jf(47).and.(abslat.gt.25.0)) then
         if(jf(47)) then
+        sam_cgm=(lati.eq.latico).and.(longi.eq.longico).and.
+     &    (iyear.eq.iyearco).and.(height_center.eq.hcgmo)
+        if(.not.sam_cgm) then
 	   DAT(1,1)=lati
 	   DAT(2,1)=longi
            call GEOCGM01(1,IYEAR,height_center,DAT,PLA,PLO)
+           latico=lati
+           longico=longi
+           iyearco=iyear
+           hcgmo=height_center
+        endif
 c           cgm_lat=DAT(3,1)
 c           cgm_lon=DAT(4,1)
 c           cgm_mlt00_ut=DAT(11,1)
@@ -2213,6 +2261,7 @@ c Tn < Ti < Te enforced at xsm(2:5)
       	  IF(TEXSM.LT.TNXSM) TEXSM=TNXSM
       	  IF(TIV(i10-1).GT.TEXSM) TIV(i10-1)=TEXSM
 2391      IF(TIV(i10-1).LT.TNXSM) TIV(i10-1)=TNXSM
+        TI1=TIV(2)
 
         mm(1)=(TIV(1)-TNHS)/(xsm(2)-xsm(1))
         mm(2)=(TIV(2)-TIV(1))/(xsm(3)-xsm(2))
@@ -2221,6 +2270,7 @@ c Tn < Ti < Te enforced at xsm(2:5)
         MXSM=3
 
 c XTETI is altitude where Te=Ti
+        XTETI=30000.0
         XTTS=500.
         X=500.
 2397    X=X+XTTS
@@ -2291,6 +2341,7 @@ c Gradient for second segment
       	XSM(3)=HTE
 
 c XTETI is altitude where Te=Ti
+        XTETI=30000.0
         XTTS=500.
         X=500.
 2390    X=X+XTTS
@@ -2343,7 +2394,9 @@ C
         kk=1
    	  xinv=0.0
 
-300   CALL SOCO(daynr,HOUR,LATI,LONGI,height,SUNDEC,XHI,SAX,SUX)
+c the solar zenith angle does not depend on height (only the sunrise
+c and sunset times do, which are not used below): use XHI1 from above
+300   XHI=XHI1
 
 c no longer calculating invdip for each height
 c       call igrf_sub(lati,longi,ryear,height,fl,icode,dipl,babs)
@@ -1,18 +1,61 @@
-from importlib.metadata import version
+from __future__ import annotations
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-try:
-    __version__ = version("iri20py")
-except Exception:
-    __version__ = "unknown"
+# The public names are imported from their modules on first access, so that
+# importing the package does not load xarray, the network modules or the
+# Fortran extension. The data files are checked when the model is created.
+_LAZY = {
+    "Iri2020": ".base",
+    "IriPool": ".pool",
+    "slant_tec": ".los",
+    "evaluate_chunked": ".chunked",
+    "magnetic_coordinates": ".magnetic",
+    "IonosphereField": ".field",
+    "profile_parameters": ".profiles",
+    "synthesize_profiles": ".profiles",
+    "alt_grid": ".utils",
+    "check_files": ".download",
+}
+_SUBMODULES = ("settings",)
 
-from .download import check_files
-from .base import Iri2020
-from .utils import alt_grid
-from . import settings
-check_files()
+if TYPE_CHECKING:
+    from .download import check_files
+    from .base import Iri2020
+    from .pool import IriPool
+    from .los import slant_tec
+    from .chunked import evaluate_chunked
+    from .magnetic import magnetic_coordinates
+    from .field import IonosphereField
+    from .profiles import profile_parameters, synthesize_profiles
+    from .utils import alt_grid
+    from . import settings
 
 __all__ = [
-    "Iri2020", "settings",
+    "Iri2020", "IriPool", "settings", "slant_tec", "evaluate_chunked",
+    "magnetic_coordinates", "IonosphereField",
+    "profile_parameters", "synthesize_profiles",
     "alt_grid", "check_files",
     "__version__",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name == "__version__":
+        from importlib.metadata import version
+        try:
+            value = version("iri20py")
+        except Exception:
+            value = "unknown"
+    elif name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+    elif name in _SUBMODULES:
+        value = import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,20 +1,24 @@
 # %%
 from __future__ import annotations
-from .iri20shim import iri20_init, iri20_eval  # type: ignore
+from .iri20shim import iri20_init, iri20_eval, iri20_eval_batch  # type: ignore
 from datetime import datetime, UTC, timedelta
 import os
 from pathlib import Path
+from contextlib import contextmanager
 from dataclasses import dataclass
 from time import perf_counter_ns
-from typing import Any, Dict, Optional, Tuple, SupportsFloat as Numeric
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, SupportsFloat as Numeric
 
 import numpy as np
-from xarray import Dataset
+from xarray import Dataset, Variable, concat
 
-from .utils import Singleton, iridate
-from .settings import Settings, ComputedSettings
+from .utils import Singleton, iridate, iridates, utctimes
+from .settings import OVERRIDES, Settings, ComputedSettings
 from . import __version__
 
+if TYPE_CHECKING:
+    from .table import IriTable
+
 DIRNAME = Path(os.path.dirname(__file__))
 DATADIR = DIRNAME / "data"
 DATADIR = DATADIR.resolve()
@@ -33,16 +37,234 @@ class Attribute:
         return dumps(asdict(self))
 
 
+@dataclass(frozen=True)
+class OarrField:
+    """Description of an entry of the IRI-2020 OARR output array."""
+    index: int
+    units: Optional[str]
+    long_name: str
+    description: Optional[str] = None
+    scale: float = 1.0
+
+    def attribute(self, oarr: np.ndarray) -> Attribute:
+        return Attribute(oarr[self.index]*self.scale, self.units, self.long_name, self.description)
+
+    @property
+    def attrs(self) -> Dict[str, str]:
+        """Attributes of the parameter as a dataset variable."""
+        attrs = {'long_name': self.long_name}
+        if self.units is not None:
+            attrs['units'] = self.units
+        if self.description is not None:
+            attrs['description'] = self.description
+        return attrs
+
+
+OARR_FIELDS: Dict[str, OarrField] = {
+    'nmF2': OarrField(0, 'cm^-3', 'F2 Peak Density', 'F2 layer peak electron density', scale=1e-6),
+    'hmF2': OarrField(1, 'km', 'F2 Peak Height', 'F2 layer peak height'),
+    'nmF1': OarrField(2, 'cm^-3', 'F1 Peak Density', 'F1 layer peak electron density', scale=1e-6),
+    'hmF1': OarrField(3, 'km', 'F1 Peak Height', 'F1 layer peak height'),
+    'nmE': OarrField(
+        4, 'cm^-3', 'E Layer Peak Density',
+        'E layer peak electron density', scale=1e-6
+    ),
+    'hmE': OarrField(5, 'km', 'E Layer Peak Height', 'E layer peak height'),
+    'nmD': OarrField(6, 'cm^-3', 'D Layer inflection point density', scale=1e-6),
+    'hmD': OarrField(7, 'km', 'D-region inflection point'),
+    'hhalf': OarrField(8, 'km', 'Half Height', 'Height used by Gulyaeva B0 model'),
+    'B0': OarrField(9, 'km', 'B0', 'Bottomside thickness parameter'),
+    'valley_base': OarrField(10, 'cm^-3', 'Density at E-valley base', scale=1e-6),
+    'valley_top': OarrField(11, 'km', 'Height of E-valley top'),
+    'Te-Peak': OarrField(12, 'K', 'Te Peak'),
+    'hTe-Peak': OarrField(13, 'km', 'hTe Peak', 'Peak Te altitude'),
+    'Te-MOD(300km)': OarrField(14, 'K', 'Te MOD(300km)', 'Electron temperature at 300 km altitude'),
+    'Te-MOD(400km)': OarrField(15, 'K', 'Te MOD(400km)', 'Electron temperature at 400 km altitude'),
+    'Te-MOD(600km)': OarrField(16, 'K', 'Te MOD(600km)', 'Electron temperature at 600 km altitude'),
+    'Te-MOD(1400km)': OarrField(
+        17, 'K', 'Te MOD(1400km)',
+        'Electron temperature at 1400 km altitude'
+    ),
+    'Te-MOD(3000km)': OarrField(
+        18, 'K', 'Te MOD(3000km)',
+        'Electron temperature at 3000 km altitude'
+    ),
+    'Te-MOD(120km)': OarrField(
+        19, 'K', 'Te MOD(120km)',
+        'Electron temperature at 120 km altitude, Te = Ti = Tn'
+    ),
+    'Ti-MOD(430km)': OarrField(20, 'K', 'Ti MOD(430km)', 'Ion temperature at 430 km altitude'),
+    'Ti-Te-Eq': OarrField(
+        21, 'km', 'Ti-Te-Eq',
+        'Height at which ion and electron temperatures are at equilibrium'
+    ),
+    'sza': OarrField(
+        22, 'degrees', 'Solar Zenith Angle',
+        'Solar zenith angle at the specified location and time'
+    ),
+    'sun_dec': OarrField(
+        23, 'degrees', 'Solar Declination',
+        'Solar declination angle at the specified time'
+    ),
+    'dip': OarrField(
+        24, 'degrees', 'Magnetic Dip Angle',
+        'Magnetic dip angle at the specified location'
+    ),
+    'dip-lat': OarrField(25, 'degrees', 'Magnetic Dip Latitude', 'Magnetic dip latitude'),
+    'dip-lat-mod': OarrField(
+        26, 'degrees', 'Magnetic Dip Latitude (Modified)',
+        'Modified magnetic dip latitude'
+    ),
+    'lat': OarrField(27, 'degrees', 'Latitude', 'Geographic Latitude'),
+    'sunrise': OarrField(28, 'hours', 'Sunrise Time', 'Local time of sunrise'),
+    'sunset': OarrField(29, 'hours', 'Sunset Time', 'Local time of sunset'),
+    'season': OarrField(
+        30, None, 'Season',
+        'Season indicator: 1=Spring, 2=Summer, 3=Fall, 4=Winter'
+    ),
+    'lon': OarrField(31, 'degrees', 'Longitude', 'Geographic Longitude'),
+    'RZ12': OarrField(
+        32, None, 'RZ12 Solar Index',
+        '12-month running average of the solar radio flux at 10.7 cm'
+    ),
+    'cov': OarrField(33, None, 'Covington Index'),
+    'B1': OarrField(34, None, 'B1', 'Bottomside shape parameter'),
+    'M(3000)F2': OarrField(
+        35, 'MHz', 'M(3000)F2',
+        'Maximum usable frequency for a 3000 km path in the F2 layer'
+    ),
+    # 'TEC': OarrField(36, 'm^-2', 'Total Electron Content', 'Total electron content along a vertical column through the ionosphere', scale=1e16),
+    # 'TEC_top': OarrField(37, 'm^-2', 'Total Electron Content top of ionosphere', scale=1e16),
+    'IG12': OarrField(
+        38, None, 'IG12 Solar Index',
+        '12-month running average of the IG12 solar index'
+    ),
+    'F1_prob': OarrField(
+        39, None, 'F1 Layer Probability',
+        'Probability of occurrence of the F1 layer'
+    ),
+    'F10.7': OarrField(
+        40, 'sfu', 'F10.7 Solar Flux',
+        'Daily solar radio flux at 10.7 cm wavelength'
+    ),
+    'c1': OarrField(41, None, 'c1 Coefficient', 'Coefficient c1 used in F1 shape calculation'),
+    'daynr': OarrField(42, None, 'Day Numeric', 'Day number within the year (1-365/366)'),
+    'vert_ion_drift': OarrField(
+        43, 'm/s', 'Equatorial Vertical Ion Drift',
+        'Vertical ion drift velocity'
+    ),
+    'foF2_rat': OarrField(
+        44, None, 'Storm foF2 / Quiet foF2',
+        'Ratio of the F2 layer critical frequency during storm conditions to quiet conditions'
+    ),
+    'F10.7_81': OarrField(
+        45, 'sfu', '81-day Averaged F10.7 Solar Flux',
+        '81-day averaged solar radio flux at 10.7 cm wavelength'
+    ),
+    'foE_rat': OarrField(
+        46, None, 'Storm foE / Quiet foE',
+        'Ratio of the E layer critical frequency during storm conditions to quiet conditions'
+    ),
+    'spread_f_prob': OarrField(
+        47, None, 'Spread F Probability',
+        'Probability of occurrence of spread F conditions'
+    ),
+    'geomag_lat': OarrField(
+        48, 'degrees', 'Geomagnetic Latitude',
+        'Geomagnetic latitude at the specified location'
+    ),
+    'geomag_lon': OarrField(
+        49, 'degrees', 'Geomagnetic Longitude',
+        'Geomagnetic longitude at the specified location'
+    ),
+    'ap': OarrField(50, None, 'Ap Geomagnetic Index', 'Planetary geomagnetic index Ap'),
+    'ap_daily': OarrField(
+        51, None, 'Daily Ap Geomagnetic Index',
+        'Daily planetary geomagnetic index Ap'
+    ),
+    'invdip': OarrField(52, 'degrees', 'Invariant Dip Latitude', 'Invariant dip latitude'),
+    'MLT-Te': OarrField(53, 'hours', 'MLT-Te'),
+    'cgm_lat': OarrField(54, 'degrees', 'CGM Latitude', 'Corrected geomagnetic latitude'),
+    'cgm_lon': OarrField(55, 'degrees', 'CGM Longitude', 'Corrected geomagnetic longitude'),
+    'cgm_mlt': OarrField(56, 'hours', 'CGM MLT', 'Corrected geomagnetic local time'),
+    'cgm_lat_auroral_boundary': OarrField(
+        57, 'degrees', 'CGM Latitude Auroral Boundary',
+        'Corrected geomagnetic latitude of the auroral boundary'
+    ),
+    **{
+        f'cgm_lat_mlt_{hour:02d}': OarrField(
+            58 + hour, 'degrees', f'CGM Latitude MLT {hour:02d}',
+            f'Corrected geomagnetic latitude at magnetic local time {hour:02d}'
+        )
+        for hour in range(24)
+    },
+    'kp': OarrField(82, None, 'Kp Geomagnetic Index', 'Planetary geomagnetic index Kp'),
+    'declination': OarrField(
+        83, 'degrees', 'Magnetic Declination',
+        'Magnetic declination angle at the specified location'
+    ),
+    'L-value': OarrField(84, None, 'L-value', 'McIlwain L-parameter'),
+    'dipole-moment': OarrField(85, 'Unknown', 'Dipole Moment', "Earth's magnetic dipole moment"),
+    'SAX300': OarrField(86, 'hours', 'SAX300', 'Sunrise at 300km altitude'),
+    'SUX300': OarrField(87, 'hours', 'SUX300', 'Sunset at 300km altitude'),
+    'HNEA': OarrField(88, 'km', 'HNEA', 'Lower boundary of Ne valid range'),
+    'HNEE': OarrField(89, 'km', 'HNEE', 'Upper boundary of Ne valid range'),
+    'es_occ_prob': OarrField(
+        90, '%', 'Es Occurrence Probability',
+        'Sporadic E layer occurrence probability'
+    ),
+}
+
+# name, OUTF index, description
+DENSITIES: List[Tuple[str, int, str]] = [
+    ('Ne', 0, 'Electron'),
+    ('O+', 4, 'Oxygen Ion'),
+    ('H+', 5, 'Hydrogen Ion'),
+    ('He+', 6, 'Helium Ion'),
+    ('O2+', 7, 'Oxygen Molecular Ion'),
+    ('NO+', 8, 'Nitric Oxide Ion'),
+    ('Cluster', 9, 'Cluster Ion'),
+    ('N+', 10, 'Nitrogen Ion'),
+]
+TEMPERATURES: List[Tuple[str, int, str]] = [
+    ('Tn', 1, 'Neutral Temperature'),
+    ('Te', 3, 'Electron Temperature'),
+    ('Ti', 2, 'Ion Temperature'),
+]
+
+
+def _outputs(settings: ComputedSettings) -> List[Tuple[str, int, str, str, float]]:
+    # name, OUTF index, long name, units, scale of the computed profile outputs
+    outputs = [
+        (name, idx, f'{desc} Density', 'cm^-3', 1e-6) for name, idx, desc in DENSITIES
+    ] + [
+        (name, idx, f'{desc} Temperature', 'K', 1.0) for name, idx, desc in TEMPERATURES
+    ]
+    return [out for out in outputs if settings.computes(out[0])]
+
+
+# OARR parameters of the inputs of a climatology table interpolation.
+TABLE_INPUTS = ('lat', 'lon', 'F10.7', 'daynr', 'F10.7_81')
+
+
 class Iri2020(Singleton):
     """IRI-2020 Model.
 
+    Within a :obj:`tabulated` block, the evaluation methods interpolate a
+    precomputed climatology table (see :obj:`iri20py.table.build_table`)
+    instead of evaluating the model.
+
     Args:
         settings (Optional[Settings], optional): Configuration settings. Defaults to None.
     """
 
     def _init(self, settings: Optional[Settings] = None):
+        from .download import check_files
+        check_files()
         iri20_init(str(DATADIR))
         self.settings: Settings = settings or Settings()
+        self._mode = 'model'
+        self._table: Optional[IriTable] = None
         self._benchmark = False
         self._call = 0
         self._setup = 0.0
@@ -68,6 +290,51 @@ class Iri2020(Singleton):
             self._total = 0
         self._benchmark = value
 
+    def __reduce__(self):
+        # The Fortran state can not be pickled: unpickling yields the model
+        # instance of the receiving process, set to the same settings as
+        # this one.
+        return (_restore, (self.settings,))
+
+    @property
+    def mode(self) -> str:
+        """Evaluation mode, `'model'`, or `'table'` within a :obj:`tabulated` block."""
+        return self._mode
+
+    @property
+    def table(self) -> Optional[IriTable]:
+        """Climatology table interpolated within a :obj:`tabulated` block, otherwise None."""
+        return self._table
+
+    @contextmanager
+    def tabulated(self, table: Path | str | IriTable) -> Iterator[Iri2020]:
+        """Interpolate a climatology table instead of evaluating the model, within a `with` block.
+
+        Only the electron density and the peak parameters stored in the
+        table are available, and the OARR parameters are limited to these
+        and to the position, day and F10.7 inputs. The `table` attribute of
+        the output datasets holds the interpolation errors of the table.
+        The previous mode is restored when the block exits. Since the model
+        is a singleton, the block applies to all the evaluations of this
+        process that it encloses, but not to those of worker processes that
+        do not fork from within it.
+
+        Args:
+            table (Path | str | IriTable): Climatology table, or the directory it is stored in.
+
+        Yields:
+            Iri2020: This instance.
+        """
+        from .table import IriTable
+        if not isinstance(table, IriTable):
+            table = IriTable.open(table)
+        previous = (self._mode, self._table)
+        self._mode, self._table = 'table', table
+        try:
+            yield self
+        finally:
+            self._mode, self._table = previous
+
     def get_benchmark(self) -> Optional[Dict[str, timedelta]]:
         """Get benchmark data.
 
@@ -85,6 +352,36 @@ class Iri2020(Singleton):
             'total': timedelta(milliseconds=self._total / self._call),
         }
 
+    def preload(self, year: int = 2020, settings: Optional[Settings] = None):
+        """Populate the coefficient caches of the Fortran model.
+
+        Some coefficient sets (e.g. the hmF2 spatial decomposition coefficients
+        in `mcsat*.dat`) are read one month at a time on first use and kept for
+        the lifetime of the process. Evaluating one profile per month loads all
+        of them, so that processes forked afterwards share these pages with
+        this process instead of reading and storing their own copies. One
+        profile is also evaluated through :obj:`evaluate`, which loads the
+        modules and caches of the Python side that are set up on first use.
+
+        Other coefficients are not cached: `IRI_SUB` rereads the CCIR/URSI
+        foF2 coefficients of a month, and recomputes the IGRF coefficients of
+        a date, whenever the month or date changes between calls.
+
+        Args:
+            year (int, optional): Year to evaluate. Must be covered by the index files. Defaults to 2020.
+            settings (Optional[Settings], optional): Settings that select the coefficient sets to load. Defaults to None, in which case the current settings are used.
+        """
+        csettings = ComputedSettings.from_settings(settings or self.settings)
+        alt = np.asarray([300.0], dtype=np.float32)
+        outf = np.zeros((20, 1), dtype=np.float32, order='F')
+        for month in range(1, 13):
+            oarr = csettings.oarr.copy()
+            iri20_eval(
+                csettings.jf, 0, 0.0, 0.0, year, month*100 + 15, 37.0,
+                alt, outf, oarr, str(DATADIR), csettings.logfile
+            )
+        self.evaluate(datetime(year, 1, 15, 12), 0.0, 0.0, alt.astype(float), csettings)
+
     def _iricall(self, lat: Numeric, lon: Numeric, alt: np.ndarray, year: int, day: int, ut: Numeric, settings: ComputedSettings) -> Dataset:
         start = perf_counter_ns()
         outf = np.zeros((20, len(alt)), dtype=np.float32, order='F')
@@ -93,259 +390,31 @@ class Iri2020(Singleton):
             ('alt_km',), alt.copy(), {'units': 'km', 'long_name': 'Altitude'})
         alt = alt.astype(np.float32, order='F')
         setup = perf_counter_ns()
-        iri20_eval(
-            settings.jf, 0, lat, lon, year, -day, (float(ut) / 3600.0) + 25,
-            alt, outf, settings.oarr, str(DATADIR), settings.logfile
-        )
+        if self._mode == 'table':
+            # The table does not use the OARR inputs of the caller; keep them.
+            oarr = settings.oarr[:, None].copy()
+            outf[:] = self._tablecall(
+                np.asarray([lat], dtype=np.float32), np.asarray([lon], dtype=np.float32),
+                alt[:, None], np.asarray([year]), np.asarray([day]), np.asarray([ut], dtype=float),
+                settings.jf[:, None], oarr
+            )[:, :, 0]
+            oarr = oarr[:, 0]
+        else:
+            iri20_eval(
+                settings.jf, 0, lat, lon, year, -day, (float(ut) / 3600.0) + 25,
+                alt, outf, settings.oarr, str(DATADIR), settings.logfile
+            )
+            oarr = settings.oarr
         fortran = perf_counter_ns()
-        densities = ['Ne', 'O+', 'H+', 'He+', 'O2+', 'NO+', 'Cluster', 'N+']
-        den_names = [
-            'Electron', 'Oxygen Ion', 'Hydrogen Ion', 'Helium Ion', 'Oxygen Molecular Ion',
-            'Nitric Oxide Ion', 'Cluster Ion', 'Nitrogen Ion'
-        ]
-        density_idx = [0, 4, 5, 6, 7, 8, 9, 10]
-        temperatures = ['Tn', 'Te', 'Ti']
-        temperature_names = [
-            'Neutral Temperature',
-            'Electron Temperature', 'Ion Temperature'
-        ]
-        temperature_idx = [1, 3, 2]
-        for idx, name, desc in zip(density_idx, densities, den_names):
-            ds[name] = (('alt_km',), np.array(outf[idx]*1e-6, dtype=float),
-                        {'units': 'cm^-3', 'long_name': f'{desc} Density'})
-        for idx, name, desc in zip(temperature_idx, temperatures, temperature_names):
-            ds[name] = (('alt_km',), np.array(outf[idx], dtype=float), {
-                        'units': 'K', 'long_name': f'{desc} Temperature'})
+        for name, idx, long_name, units, scale in _outputs(settings):
+            ds[name] = (('alt_km',), np.array(outf[idx]*scale, dtype=float),
+                        {'units': units, 'long_name': long_name})
         ds_build = perf_counter_ns()
         ds.attrs['attributes'] = 'Stored as JSON strings'
         ds.attrs['description'] = 'IRI 2020 model output'
-        oarr = settings.oarr.copy().astype(float)
-        attrs = {}
-        attrs['nmF2'] = Attribute(
-            oarr[0]*1e-6, 'cm^-3', 'F2 Peak Density', 'F2 layer peak electron density')
-        attrs['hmF2'] = Attribute(
-            oarr[1], 'km', 'F2 Peak Height', 'F2 layer peak height')
-        attrs['nmF1'] = Attribute(
-            oarr[2]*1e-6, 'cm^-3', 'F1 Peak Density', 'F1 layer peak electron density')
-        attrs['hmF1'] = Attribute(
-            oarr[3], 'km', 'F1 Peak Height', 'F1 layer peak height')
-        attrs['nmE'] = Attribute(
-            oarr[4]*1e-6, 'cm^-3',
-            'E Layer Peak Density', 'E layer peak electron density'
-        )
-        attrs['hmE'] = Attribute(
-            oarr[5], 'km', 'E Layer Peak Height', 'E layer peak height')
-        attrs['nmD'] = Attribute(
-            oarr[6]*1e-6, 'cm^-3', 'D Layer inflection point density')
-        attrs['hmD'] = Attribute(
-            oarr[7], 'km', 'D-region inflection point')
-        attrs['hhalf'] = Attribute(
-            oarr[8], 'km', 'Half Height', 'Height used by Gulyaeva B0 model')
-        attrs['B0'] = Attribute(oarr[9], 'km',
-                                'B0', 'Bottomside thickness parameter')
-        attrs['valley_base'] = Attribute(
-            oarr[10]*1e-6, 'cm^-3', 'Density at E-valley base')
-        attrs['valley_top'] = Attribute(
-            oarr[11], 'km', 'Height of E-valley top')
-        attrs['Te-Peak'] = Attribute(oarr[12], 'K', 'Te Peak')
-        attrs['hTe-Peak'] = Attribute(
-            oarr[13],
-            'km', 'hTe Peak', 'Peak Te altitude'
-        )
-        attrs['Te-MOD(300km)'] = Attribute(
-            oarr[14], 'K',
-            'Te MOD(300km)', 'Electron temperature at 300 km altitude'
-        )
-        attrs['Te-MOD(400km)'] = Attribute(
-            oarr[15], 'K',
-            'Te MOD(400km)', 'Electron temperature at 400 km altitude'
-        )
-        attrs['Te-MOD(600km)'] = Attribute(
-            oarr[16], 'K',
-            'Te MOD(600km)', 'Electron temperature at 600 km altitude'
-        )
-        attrs['Te-MOD(1400km)'] = Attribute(
-            oarr[17], 'K',
-            'Te MOD(1400km)', 'Electron temperature at 1400 km altitude'
-        )
-        attrs['Te-MOD(3000km)'] = Attribute(
-            oarr[18], 'K',
-            'Te MOD(3000km)', 'Electron temperature at 3000 km altitude'
-        )
-        attrs['Te-MOD(120km)'] = Attribute(
-            oarr[19], 'K', 'Te MOD(120km)',
-            'Electron temperature at 120 km altitude, Te = Ti = Tn')
-        attrs['Ti-MOD(430km)'] = Attribute(
-            oarr[20], 'K',
-            'Ti MOD(430km)', 'Ion temperature at 430 km altitude'
-        )
-        attrs['Ti-Te-Eq'] = Attribute(
-            oarr[21], 'km', 'Ti-Te-Eq',
-            'Height at which ion and electron temperatures are at equilibrium'
-        )
-        attrs['sza'] = Attribute(
-            oarr[22], 'degrees', 'Solar Zenith Angle',
-            'Solar zenith angle at the specified location and time'
-        )
-        attrs['sun_dec'] = Attribute(
-            oarr[23], 'degrees', 'Solar Declination', 'Solar declination angle at the specified time')
-        attrs['dip'] = Attribute(
-            oarr[24], 'degrees', 'Magnetic Dip Angle',
-            'Magnetic dip angle at the specified location'
-        )
-        attrs['dip-lat'] = Attribute(
-            oarr[25], 'degrees', 'Magnetic Dip Latitude', 'Magnetic dip latitude')
-        attrs['dip-lat-mod'] = Attribute(
-            oarr[26], 'degrees', 'Magnetic Dip Latitude (Modified)', 'Modified magnetic dip latitude')
-        attrs['lat'] = Attribute(
-            oarr[27], 'degrees', 'Latitude', 'Geographic Latitude')
-        attrs['sunrise'] = Attribute(
-            oarr[28], 'hours', 'Sunrise Time', 'Local time of sunrise')
-        attrs['sunset'] = Attribute(
-            oarr[29], 'hours', 'Sunset Time', 'Local time of sunset')
-        attrs['season'] = Attribute(oarr[30], None, 'Season',
-                                    'Season indicator: 1=Spring, 2=Summer, 3=Fall, 4=Winter')
-        attrs['lon'] = Attribute(
-            oarr[31], 'degrees', 'Longitude', 'Geographic Longitude')
-        attrs['RZ12'] = Attribute(
-            oarr[32], None, 'RZ12 Solar Index',
-            '12-month running average of the solar radio flux at 10.7 cm'
-        )
-        attrs['cov'] = Attribute(oarr[33], None, 'Covington Index')
-        attrs['B1'] = Attribute(
-            oarr[34], None,
-            'B1', 'Bottomside shape parameter'
-        )
-        attrs['M(3000)F2'] = Attribute(
-            oarr[35], 'MHz', 'M(3000)F2',
-            'Maximum usable frequency for a 3000 km path in the F2 layer'
-        )
-        # attrs['TEC'] = Attribute(oarr[36]*1e16, 'm^-2', 'Total Electron Content', 'Total electron content along a vertical column through the ionosphere')
-        # attrs['TEC_top'] = Attribute(oarr[37]*1e16, 'm^-2', 'Total Electron Content top of ionosphere')
-        attrs['IG12'] = Attribute(
-            oarr[38], None, 'IG12 Solar Index',
-            '12-month running average of the IG12 solar index'
-        )
-        attrs['F1_prob'] = Attribute(
-            oarr[39], None, 'F1 Layer Probability', 'Probability of occurrence of the F1 layer')
-        attrs['F10.7'] = Attribute(
-            oarr[40], 'sfu', 'F10.7 Solar Flux', 'Daily solar radio flux at 10.7 cm wavelength')
-        attrs['c1'] = Attribute(oarr[41], None, 'c1 Coefficient',
-                                'Coefficient c1 used in F1 shape calculation')
-        attrs['daynr'] = Attribute(
-            oarr[42], None, 'Day Numeric', 'Day number within the year (1-365/366)')
-        attrs['vert_ion_drift'] = Attribute(
-            oarr[43], 'm/s', 'Equatorial Vertical Ion Drift', 'Vertical ion drift velocity'
-        )
-        attrs['foF2_rat'] = Attribute(
-            oarr[44], None, 'Storm foF2 / Quiet foF2',
-            'Ratio of the F2 layer critical frequency during storm conditions to quiet conditions'
-        )
-        attrs['F10.7_81'] = Attribute(
-            oarr[45], 'sfu', '81-day Averaged F10.7 Solar Flux',
-            '81-day averaged solar radio flux at 10.7 cm wavelength'
-        )
-        attrs['foE_rat'] = Attribute(
-            oarr[46], None, 'Storm foE / Quiet foE',
-            'Ratio of the E layer critical frequency during storm conditions to quiet conditions'
-        )
-        attrs['spread_f_prob'] = Attribute(
-            oarr[47], None, 'Spread F Probability', 'Probability of occurrence of spread F conditions')
-        attrs['geomag_lat'] = Attribute(
-            oarr[48], 'degrees', 'Geomagnetic Latitude', 'Geomagnetic latitude at the specified location')
-        attrs['geomag_lon'] = Attribute(
-            oarr[49], 'degrees', 'Geomagnetic Longitude', 'Geomagnetic longitude at the specified location')
-        attrs['ap'] = Attribute(
-            oarr[50], None, 'Ap Geomagnetic Index', 'Planetary geomagnetic index Ap')
-        attrs['ap_daily'] = Attribute(
-            oarr[51], None, 'Daily Ap Geomagnetic Index', 'Daily planetary geomagnetic index Ap')
-        attrs['invdip'] = Attribute(
-            oarr[52], 'degrees', 'Invariant Dip Latitude', 'Invariant dip latitude')
-        attrs['MLT-Te'] = Attribute(oarr[53], 'hours', 'MLT-Te')
-        attrs['cgm_lat'] = Attribute(
-            oarr[54], 'degrees', 'CGM Latitude', 'Corrected geomagnetic latitude')
-        attrs['cgm_lon'] = Attribute(
-            oarr[55], 'degrees', 'CGM Longitude', 'Corrected geomagnetic longitude')
-        attrs['cgm_mlt'] = Attribute(
-            oarr[56], 'hours', 'CGM MLT', 'Corrected geomagnetic local time')
-        attrs['cgm_lat_auroral_boundary'] = Attribute(
-            oarr[57], 'degrees', 'CGM Latitude Auroral Boundary', 'Corrected geomagnetic latitude of the auroral boundary')
-        attrs['cgm_lat_mlt_00'] = Attribute(
-            oarr[58], 'degrees', 'CGM Latitude MLT 00', 'Corrected geomagnetic latitude at magnetic local time 00')
-        attrs['cgm_lat_mlt_01'] = Attribute(
-            oarr[59], 'degrees', 'CGM Latitude MLT 01', 'Corrected geomagnetic latitude at magnetic local time 01')
-        attrs['cgm_lat_mlt_02'] = Attribute(
-            oarr[60], 'degrees', 'CGM Latitude MLT 02', 'Corrected geomagnetic latitude at magnetic local time 02')
-        attrs['cgm_lat_mlt_03'] = Attribute(
-            oarr[61], 'degrees', 'CGM Latitude MLT 03', 'Corrected geomagnetic latitude at magnetic local time 03')
-        attrs['cgm_lat_mlt_04'] = Attribute(
-            oarr[62], 'degrees', 'CGM Latitude MLT 04', 'Corrected geomagnetic latitude at magnetic local time 04')
-        attrs['cgm_lat_mlt_05'] = Attribute(
-            oarr[63], 'degrees', 'CGM Latitude MLT 05', 'Corrected geomagnetic latitude at magnetic local time 05')
-        attrs['cgm_lat_mlt_06'] = Attribute(
-            oarr[64], 'degrees', 'CGM Latitude MLT 06', 'Corrected geomagnetic latitude at magnetic local time 06')
-        attrs['cgm_lat_mlt_07'] = Attribute(
-            oarr[65], 'degrees', 'CGM Latitude MLT 07', 'Corrected geomagnetic latitude at magnetic local time 07')
-        attrs['cgm_lat_mlt_08'] = Attribute(
-            oarr[66], 'degrees', 'CGM Latitude MLT 08', 'Corrected geomagnetic latitude at magnetic local time 08')
-        attrs['cgm_lat_mlt_09'] = Attribute(
-            oarr[67], 'degrees', 'CGM Latitude MLT 09', 'Corrected geomagnetic latitude at magnetic local time 09')
-        attrs['cgm_lat_mlt_10'] = Attribute(
-            oarr[68], 'degrees', 'CGM Latitude MLT 10', 'Corrected geomagnetic latitude at magnetic local time 10')
-        attrs['cgm_lat_mlt_11'] = Attribute(
-            oarr[69], 'degrees', 'CGM Latitude MLT 11', 'Corrected geomagnetic latitude at magnetic local time 11')
-        attrs['cgm_lat_mlt_12'] = Attribute(
-            oarr[70], 'degrees', 'CGM Latitude MLT 12', 'Corrected geomagnetic latitude at magnetic local time 12')
-        attrs['cgm_lat_mlt_13'] = Attribute(
-            oarr[71], 'degrees', 'CGM Latitude MLT 13', 'Corrected geomagnetic latitude at magnetic local time 13')
-        attrs['cgm_lat_mlt_14'] = Attribute(
-            oarr[72], 'degrees', 'CGM Latitude MLT 14', 'Corrected geomagnetic latitude at magnetic local time 14')
-        attrs['cgm_lat_mlt_15'] = Attribute(
-            oarr[73], 'degrees', 'CGM Latitude MLT 15', 'Corrected geomagnetic latitude at magnetic local time 15')
-        attrs['cgm_lat_mlt_16'] = Attribute(
-            oarr[74], 'degrees', 'CGM Latitude MLT 16', 'Corrected geomagnetic latitude at magnetic local time 16')
-        attrs['cgm_lat_mlt_17'] = Attribute(
-            oarr[75], 'degrees', 'CGM Latitude MLT 17', 'Corrected geomagnetic latitude at magnetic local time 17')
-        attrs['cgm_lat_mlt_18'] = Attribute(
-            oarr[76], 'degrees', 'CGM Latitude MLT 18', 'Corrected geomagnetic latitude at magnetic local time 18')
-        attrs['cgm_lat_mlt_19'] = Attribute(
-            oarr[77], 'degrees', 'CGM Latitude MLT 19', 'Corrected geomagnetic latitude at magnetic local time 19')
-        attrs['cgm_lat_mlt_20'] = Attribute(
-            oarr[78], 'degrees', 'CGM Latitude MLT 20', 'Corrected geomagnetic latitude at magnetic local time 20')
-        attrs['cgm_lat_mlt_21'] = Attribute(
-            oarr[79], 'degrees', 'CGM Latitude MLT 21', 'Corrected geomagnetic latitude at magnetic local time 21')
-        attrs['cgm_lat_mlt_22'] = Attribute(
-            oarr[80], 'degrees', 'CGM Latitude MLT 22', 'Corrected geomagnetic latitude at magnetic local time 22')
-        attrs['cgm_lat_mlt_23'] = Attribute(
-            oarr[81], 'degrees', 'CGM Latitude MLT 23', 'Corrected geomagnetic latitude at magnetic local time 23')
-        attrs['kp'] = Attribute(
-            oarr[82], None, 'Kp Geomagnetic Index', 'Planetary geomagnetic index Kp')
-        attrs['declination'] = Attribute(
-            oarr[83], 'degrees', 'Magnetic Declination', 'Magnetic declination angle at the specified location')
-        attrs['L-value'] = Attribute(
-            oarr[84],
-            None, 'L-value', 'McIlwain L-parameter'
-        )
-        attrs['dipole-moment'] = Attribute(
-            oarr[85], 'Unknown',
-            'Dipole Moment', 'Earth\'s magnetic dipole moment'
-        )
-        attrs['SAX300'] = Attribute(
-            oarr[86], 'hours', 'SAX300', 'Sunrise at 300km altitude')
-        attrs['SUX300'] = Attribute(
-            oarr[87], 'hours', 'SUX300', 'Sunset at 300km altitude')
-        attrs['HNEA'] = Attribute(
-            oarr[88], 'km', 'HNEA', 'Lower boundary of Ne valid range')
-        attrs['HNEE'] = Attribute(
-            oarr[89], 'km', 'HNEE', 'Upper boundary of Ne valid range')
-        attrs['es_occ_prob'] = Attribute(
-            oarr[90], '%', 'Es Occurrence Probability', 'Sporadic E layer occurrence probability')
-
-        for key, attr in attrs.items():
-            if isinstance(attr, Attribute):
-                ds.attrs[key] = attr.to_json()
-            elif attr is not None:
-                ds.attrs[key] = str(attr)
+        oarr = oarr.astype(float)
+        for key, field in self._fields().items():
+            ds.attrs[key] = field.attribute(oarr).to_json()
         ds_attrib = perf_counter_ns()
         ds.attrs['settings'] = self.settings.to_json()
         ds_settings = perf_counter_ns()
@@ -358,6 +427,7 @@ class Iri2020(Singleton):
             self._ds_settings += (ds_settings - ds_attrib)*1e-6
             self._total += (ds_settings - start)*1e-6
         ds.attrs['version'] = f'IRI-2020 v{__version__}'
+        self._tableattrs(ds)
         return ds
 
     def evaluate(
@@ -366,7 +436,8 @@ class Iri2020(Singleton):
         lat: Numeric, lon: Numeric, alt: np.ndarray,
         settings: Optional[Settings | ComputedSettings] = None,
         *,
-        tzaware: bool = False
+        tzaware: bool = False,
+        variables: Optional[Sequence[str]] = None
     ) -> Tuple[ComputedSettings, Dataset]:
         """Evaluate the IRI-2020 model.
 
@@ -377,6 +448,7 @@ class Iri2020(Singleton):
             alt (np.ndarray): Altitude in kilometers.
             settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
             tzaware (bool, optional): If time is time zone aware. If true, `time` is recast to 'UTC' using `time.astimezone(pytz.utc)`. Defaults to False.
+            variables (Optional[Sequence[str]], optional): Output variables to compute, e.g. `['Ne']` (see :obj:`iri20py.settings.VARIABLES`). The models not needed for these variables are not evaluated. Defaults to None, i.e. all variables.
         Returns:
             Tuple[ComputedSettings, Dataset]: Computed settings and dataset. Passing in Settings will return ComputedSettings. For subsequent calls, pass in the returned ComputedSettings to avoid recomputation.
         """
@@ -385,11 +457,11 @@ class Iri2020(Singleton):
         year, idate, utsec = iridate(time)
         lon = float(lon) % 360  # ensure lon is in 0-360 range
         (settings, ds) = self.lowlevel(
-            lat, lon, alt, year, idate, utsec, settings)
+            lat, lon, alt, year, idate, utsec, settings, variables=variables)
         ds.attrs['date'] = time.isoformat()
         return (settings, ds)
 
-    def lowlevel(self, lat: Numeric, lon: Numeric, alt: np.ndarray, year: int, day: int, ut: Numeric, settings: Optional[Settings | ComputedSettings] = None) -> Tuple[ComputedSettings, Dataset]:
+    def lowlevel(self, lat: Numeric, lon: Numeric, alt: np.ndarray, year: int, day: int, ut: Numeric, settings: Optional[Settings | ComputedSettings] = None, *, variables: Optional[Sequence[str]] = None) -> Tuple[ComputedSettings, Dataset]:
         """Low level call to evaluate IRI-2020 model.
         Bypasses date and time calculations.
 
@@ -401,6 +473,7 @@ class Iri2020(Singleton):
             day (int): Day of the year (1-365 or 366)
             ut (Numeric): Universal time in seconds
             settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+            variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`evaluate`. Defaults to None.
 
         Raises:
             TypeError: If settings is not of type Settings or ComputedSettings.
@@ -408,18 +481,869 @@ class Iri2020(Singleton):
         Returns:
             Tuple[ComputedSettings, Dataset]: Computed settings and dataset. Passing in Settings will return ComputedSettings. For subsequent calls, pass in the returned ComputedSettings to avoid recomputation.
         """
+        settings = self._computed(settings, variables)
+        ds = self._iricall(lat, lon, alt, year, day, ut, settings)
+        return settings, ds
+
+    def evaluate_adaptive(
+        self,
+        time: datetime,
+        lat: Numeric, lon: Numeric,
+        alt: Optional[np.ndarray] = None,
+        settings: Optional[Settings | ComputedSettings] = None,
+        *,
+        rtol: float = 0.01,
+        hmin: float = 60.0,
+        hmax: float = 2000.0,
+        coarse: int = 32,
+        min_step: float = 0.25,
+        floor: Optional[float] = 1e-3,
+        tzaware: bool = False,
+        variables: Optional[Sequence[str]] = None
+    ) -> Tuple[ComputedSettings, Dataset]:
+        """Evaluate the IRI-2020 model on an altitude grid refined where the profiles need it.
+
+        The model is first evaluated on a coarse uniform grid. Points are
+        then added at the layer peak heights (hmD, hmE, E-valley top, hmF1,
+        hmF2) and, from the curvature of the log profiles, wherever linear
+        interpolation of the log profiles would exceed `rtol`. Finally,
+        intervals are halved while the interpolation at their midpoint
+        differs from the model by more than `rtol`/3, down to `min_step`.
+        Values below `floor` times the profile maximum are not refined (e.g.
+        minor ions at low altitudes), except the electron density between
+        HNEA and hmE, i.e. the D region and the E layer.
+
+        Where the model returns its fill value (e.g. the electron density
+        below HNEA), the fill value is returned.
+
+        Args:
+            time (datetime): Datetime object.
+            lat (Numeric): Geographic latitude.
+            lon (Numeric): Geographic longitude.
+            alt (Optional[np.ndarray], optional): Altitude grid in kilometers to resample the profiles to, by log-linear interpolation. Defaults to None, i.e. the profiles are returned on the adaptive grid.
+            settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+            rtol (float, optional): Relative tolerance of the log-linear interpolation between grid points. Defaults to 0.01.
+            hmin (float, optional): Lowest altitude in kilometers, if `alt` is not given. Defaults to 60.
+            hmax (float, optional): Highest altitude in kilometers, if `alt` is not given. Defaults to 2000.
+            coarse (int, optional): Number of points of the initial grid. Defaults to 32.
+            min_step (float, optional): Smallest grid spacing in kilometers. Defaults to 0.25.
+            floor (Optional[float], optional): Level, relative to the profile maximum, below which the profiles are not refined. None refines all values. Defaults to 1e-3.
+            tzaware (bool, optional): If time is time zone aware. If true, `time` is recast to 'UTC'. Defaults to False.
+            variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`evaluate`. Defaults to None.
+
+        Raises:
+            TypeError: If settings is not of type Settings or ComputedSettings.
+
+        Returns:
+            Tuple[ComputedSettings, Dataset]: Computed settings and dataset. The number of altitudes the model was evaluated at is stored in the `evaluations` attribute.
+        """
+        settings = self._computed(settings, variables)
+        if tzaware:
+            time = time.astimezone(UTC)
+        year, idate, utsec = iridate(time)
+        lon = float(lon) % 360  # ensure lon is in 0-360 range
+        if alt is not None:
+            alt = np.asarray(alt)
+            hmin, hmax = float(alt.min()), float(alt.max())
+        tol = np.log10(1 + rtol)
+        outputs = _outputs(settings)
+        oarr = settings.oarr[:, None].copy(order='F')
+
+        def run(z: np.ndarray) -> np.ndarray:
+            # Outputs at the altitudes z.
+            outf = self._batchcall(
+                np.asarray([lat], dtype=np.float32), np.asarray([lon], dtype=np.float32),
+                z[:, None], np.asarray([year]), np.asarray([idate]), np.asarray([utsec]),
+                settings.jf[:, None], oarr, settings.logfile
+            )
+            return np.stack([outf[idx, :, 0] * scale for _, idx, _, _, scale in outputs])
+
+        def log(v: np.ndarray) -> np.ndarray:
+            # log10 of the outputs, NaN for the fill values.
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(v > 0, np.log10(v), np.nan)
+
+        def floored(f: np.ndarray, z: np.ndarray) -> np.ndarray:
+            g = np.maximum(f, lowest)
+            if ne is not None:
+                dregion = (z >= hnea) & (z <= hme)
+                g[ne, dregion] = f[ne, dregion]
+            return g
+
+        z = np.linspace(hmin, hmax, coarse).astype(np.float32)
+        v = run(z)
+        f = log(v)
+        out = oarr[:, 0]
+        if self._mode == 'model':
+            settings.oarr[:] = out
+        if floor is None:
+            lowest = np.full((len(outputs), 1), -np.inf)
+        else:
+            lowest = np.max(np.nan_to_num(f, nan=-np.inf), axis=1, keepdims=True) + np.log10(floor)
+        names = [out[0] for out in outputs]
+        ne = names.index('Ne') if 'Ne' in names else None
+        hnea, hme, hmd = (
+            float(out[OARR_FIELDS[key].index]) for key in ('HNEA', 'hmE', 'hmD')
+        )
+        # Spacing for which the log-linear interpolation error, h^2 |f''| / 8,
+        # stays within the tolerance.
+        zf = z.astype(float)
+        g = floored(f, zf)
+        slope = np.diff(g, axis=1) / np.diff(zf)
+        curv = np.zeros_like(g)
+        curv[:, 1:-1] = 2 * np.diff(slope, axis=1) / (zf[2:] - zf[:-2])
+        curv = np.nan_to_num(np.abs(curv)).max(axis=0)
+        curv = np.maximum(curv[:-1], curv[1:])
+        width = np.diff(zf)
+        count = np.ceil(width / np.sqrt(8 * tol / np.maximum(curv, 1e-12)))
+        count = np.clip(count, 1, np.maximum(np.floor(width / min_step), 1)).astype(int)
+        new = [
+            np.linspace(zf[i], zf[i + 1], count[i] + 1)[1:-1] for i in np.flatnonzero(count > 1)
+        ]
+        # Peak heights and the heights where the profiles change their form:
+        # the lower boundary of the electron density, and HDX, 4.5 to 4.6 km
+        # above hmD, where the D-region profile joins the E layer.
+        peaks = np.asarray([
+            out[OARR_FIELDS[key].index]
+            for key in ('HNEA', 'hmD', 'hmE', 'valley_top', 'hmF1', 'hmF2')
+        ] + [hmd + 4.5, hmd + 4.6], dtype=float)
+        new.append(peaks[(peaks > hmin) & (peaks < hmax)])
+        new = np.unique(np.concatenate(new)).astype(np.float32)
+        new = new[np.abs(new[:, None] - z[None, :]).min(axis=1) >= min_step]
+        if len(new):
+            v = np.concatenate([v, run(new)], axis=1)
+            z = np.concatenate([z, new])
+        order = np.argsort(z)
+        z = z[order]
+        v = v[:, order]
+        f = log(v)
+        done = np.zeros(len(z) - 1, dtype=bool)
+        while True:
+            zf = z.astype(float)
+            cand = np.flatnonzero(~done & (np.diff(zf) > min_step))
+            if len(cand) == 0:
+                break
+            mids = (0.5 * (zf[cand] + zf[cand + 1])).astype(np.float32)
+            vm = run(mids)
+            fm = log(vm)
+            approx = 0.5 * (floored(f[:, cand], zf[cand]) + floored(f[:, cand + 1], zf[cand + 1]))
+            err = np.nan_to_num(np.abs(approx - floored(fm, mids.astype(float)))).max(axis=0)
+            # A change of form inside an interval (e.g. the topside
+            # corrections) can make the error of its halves twice the
+            # midpoint error, or more with the curvature.
+            passed = err <= tol / 3
+            done[cand] = passed
+            # Interval status, keyed by its lower point (the top point has none).
+            status = np.concatenate([done, [True], passed])
+            z = np.concatenate([z, mids])
+            v = np.concatenate([v, vm], axis=1)
+            order = np.argsort(z, kind='stable')
+            z = z[order]
+            v = v[:, order]
+            f = log(v)
+            done = status[order][:-1]
+        grid = z.astype(float) if alt is None else alt
+        ds = Dataset()
+        ds.coords['alt_km'] = (
+            ('alt_km',), grid.copy(), {'units': 'km', 'long_name': 'Altitude'})
+        # Log-linear interpolation between valid points; elsewhere the fill
+        # value of the invalid end of the interval.
+        zf = z.astype(float)
+        upper = np.clip(np.searchsorted(zf, grid, side='right'), 1, len(zf) - 1)
+        lower = upper - 1
+        for (name, _, long_name, units, _), vk, fk in zip(outputs, v, f):
+            values = 10**np.interp(grid, zf, fk)
+            fill = np.where(np.isnan(fk[lower]), vk[lower], vk[upper])
+            values = np.where(np.isnan(fk[lower]) | np.isnan(fk[upper]), fill, values)
+            ds[name] = (('alt_km',), values, {'units': units, 'long_name': long_name})
+        ds.attrs['attributes'] = 'Stored as JSON strings'
+        ds.attrs['description'] = 'IRI 2020 model output'
+        for key, field in self._fields().items():
+            ds.attrs[key] = field.attribute(out.astype(float)).to_json()
+        ds.attrs['settings'] = self.settings.to_json()
+        ds.attrs['version'] = f'IRI-2020 v{__version__}'
+        ds.attrs['date'] = time.isoformat()
+        ds.attrs['evaluations'] = len(z)
+        self._tableattrs(ds)
+        return (settings, ds)
+
+    def _computed(self, settings: Optional[Settings | ComputedSettings], variables: Optional[Sequence[str]] = None, *, store: bool = True) -> ComputedSettings:
+        # Settings of an evaluation, restricted to the requested variables;
+        # Settings are computed, and become the settings of the model if `store`.
         if settings is None:
             settings = self.settings
         if isinstance(settings, Settings):
-            self.settings = settings
+            if store:
+                self.settings = settings
             settings = ComputedSettings.from_settings(settings)
         if not isinstance(settings, ComputedSettings):
             raise TypeError(
                 "settings must be of type Settings or ComputedSettings")
-        ds = self._iricall(lat, lon, alt, year, day, ut, settings)
+        return self._select(settings, variables)
+
+    def _select(self, settings: ComputedSettings, variables: Optional[Sequence[str]]) -> ComputedSettings:
+        # Restrict the settings to the requested variables; a table only provides Ne.
+        if self._mode == 'table':
+            if variables is not None and any(name != 'Ne' for name in variables):
+                raise ValueError("Only Ne is available in the table mode")
+            variables = ['Ne']
+        if variables is not None:
+            settings = settings.select(variables)
+        return settings
+
+    def _fields(self) -> Dict[str, OarrField]:
+        # OARR parameters of the outputs; a table only provides some of them.
+        if self._mode == 'table':
+            return {
+                key: field for key, field in OARR_FIELDS.items()
+                if key in self._table.peaks or key in TABLE_INPUTS
+            }
+        return OARR_FIELDS
+
+    def _tableattrs(self, ds: Dataset):
+        if self._mode == 'table':
+            ds.attrs['description'] = 'IRI 2020 climatology table interpolation'
+            ds.attrs['table'] = self._table.to_json()
+
+    def _batchcall(
+        self,
+        lat: np.ndarray, lon: np.ndarray, alt: np.ndarray,
+        year: np.ndarray, day: np.ndarray, ut: np.ndarray,
+        jf: np.ndarray, oarr: np.ndarray, logfile: str
+    ) -> np.ndarray:
+        if len(lat) == 0:
+            # f2py rejects empty arrays; there is nothing to evaluate.
+            return np.zeros((20, alt.shape[0], 0), dtype=np.float32, order='F')
+        if self._mode == 'table':
+            return self._tablecall(lat, lon, alt, year, day, ut, jf, oarr)
+        return self._modelcall(lat, lon, alt, year, day, ut, jf, oarr, logfile)
+
+    def _tablecall(
+        self,
+        lat: np.ndarray, lon: np.ndarray, alt: np.ndarray,
+        year: np.ndarray, day: np.ndarray, ut: np.ndarray,
+        jf: np.ndarray, oarr: np.ndarray
+    ) -> np.ndarray:
+        from .table import f107_index
+        for name, (jdx, _) in OVERRIDES.items():
+            if name not in ('f107', 'f107_81') and not np.all(jf[jdx]):
+                raise ValueError(f"{name} can not be set in the table mode")
+        table = self._table
+        daily, mean = f107_index(year, day)
+        daily = np.where(jf[24], daily, oarr[OARR_FIELDS['F10.7'].index])
+        mean = np.where(jf[31], mean, oarr[OARR_FIELDS['F10.7_81'].index])
+        lne, peaks = table.interpolate(day, ut / 3600.0, lat, lon, 0.5*(daily + mean))
+        # Interpolate log10(Ne) to the altitudes of each point.
+        npts = len(lat)
+        idx = np.clip(np.searchsorted(table.alt, alt) - 1, 0, len(table.alt) - 2)
+        w = (alt - table.alt[idx]) / (table.alt[idx + 1] - table.alt[idx])
+        col = np.arange(npts)[None, :]
+        ne = lne[col, idx]*(1 - w) + lne[col, idx + 1]*w
+        ne[(alt < table.alt[0]) | (alt > table.alt[-1])] = np.nan
+        outf = np.full((20, alt.shape[0], npts), np.nan, dtype=np.float32, order='F')
+        outf[0] = 10**ne * 1e6
+        oarr[:] = np.nan
+        for key, value in zip(table.peaks, peaks.T):
+            oarr[OARR_FIELDS[key].index] = value
+        for key, value in zip(TABLE_INPUTS, (lat, lon, daily, day, mean)):
+            oarr[OARR_FIELDS[key].index] = value
+        return outf
+
+    def _modelcall(
+        self,
+        lat: np.ndarray, lon: np.ndarray, alt: np.ndarray,
+        year: np.ndarray, day: np.ndarray, ut: np.ndarray,
+        jf: np.ndarray, oarr: np.ndarray, logfile: str
+    ) -> np.ndarray:
+        # Evaluate the points in date order, so that the coefficient sets
+        # of each month are read once per batch instead of once per change.
+        # Within a year, points using the CCIR and the URSI foF2 coefficients
+        # (jf[4]) are grouped, since switching between them also forces a reload.
+        order = np.lexsort((ut, day, jf[4], year))
+        outf = np.zeros((20, alt.shape[0], len(lat)),
+                        dtype=np.float32, order='F')
+        soarr = np.asfortranarray(oarr[:, order])
+        iri20_eval_batch(
+            np.asfortranarray(jf[:, order]), 0,
+            lat[order], lon[order], year[order], -day[order],
+            (ut[order] / 3600.0 + 25).astype(np.float32),
+            np.asfortranarray(alt[:, order], dtype=np.float32),
+            outf, soarr, str(DATADIR), logfile
+        )
+        oarr[:, order] = soarr
+        out = np.empty_like(outf)
+        out[:, :, order] = outf
+        return out
+
+    def _batchdataset(self, lat: np.ndarray, lon: np.ndarray, alt: np.ndarray, outf: np.ndarray, oarr: np.ndarray, settings: ComputedSettings) -> Dataset:
+        ds = Dataset()
+        ds.coords['alt_km'] = (
+            ('alt_km',), alt.copy(), {'units': 'km', 'long_name': 'Altitude'})
+        ds.coords['lat'] = (('point',), lat.astype(float), {
+                            'units': 'degrees', 'long_name': 'Latitude'})
+        ds.coords['lon'] = (('point',), lon, {
+                            'units': 'degrees', 'long_name': 'Longitude'})
+        for name, idx, long_name, units, scale in _outputs(settings):
+            ds[name] = (('point', 'alt_km'), np.array(outf[idx].T*scale, dtype=float),
+                        {'units': units, 'long_name': long_name})
+        self._oarrvariables(ds, oarr, 'point', self._fields())
+        ds.attrs['description'] = 'IRI 2020 model output'
+        ds.attrs['version'] = f'IRI-2020 v{__version__}'
+        return ds
+
+    @staticmethod
+    def _oarrvariables(ds: Dataset, oarr: np.ndarray, dim: str, fields: Mapping[str, OarrField] = OARR_FIELDS):
+        # Added in one update: adding the variables one at a time merges the
+        # dataset for each of them.
+        oarr = oarr.astype(float)
+        variables = {}
+        for key, field in fields.items():
+            if key in ds.coords:
+                continue
+            variables[key] = Variable((dim,), oarr[field.index]*field.scale, field.attrs)
+        ds.update(variables)
+
+    @staticmethod
+    def _unstack(ds: Dataset, dim: str, count: int) -> Dataset:
+        # Split the leading `count` blocks of the `point` dimension into `dim`.
+        npts = ds.sizes['point'] // count
+        out = Dataset(attrs=ds.attrs)
+        out.coords['alt_km'] = ds.alt_km
+        out.coords[dim] = ((dim,), np.arange(count))
+        for key, var in ds.coords.items():
+            if var.dims == ('point',):
+                out.coords[key] = (('point',), var.values[:npts], var.attrs)
+        for key, var in ds.data_vars.items():
+            out[key] = (
+                (dim,) + var.dims,
+                var.values.reshape((count, npts) + var.shape[1:]),
+                var.attrs
+            )
+        return out
+
+    def evaluate_batch(
+        self,
+        times: Sequence[datetime] | np.ndarray,
+        lats: np.ndarray, lons: np.ndarray, alt: np.ndarray,
+        settings: Optional[Settings | ComputedSettings] = None,
+        *,
+        overrides: Optional[Mapping[str, Any]] = None,
+        tzaware: bool = False,
+        variables: Optional[Sequence[str]] = None
+    ) -> Tuple[ComputedSettings, Dataset]:
+        """Evaluate the IRI-2020 model at a number of locations and times in one call.
+
+        Args:
+            times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+            lats (np.ndarray): Geographic latitudes.
+            lons (np.ndarray): Geographic longitudes.
+            alt (np.ndarray): Altitude in kilometers, common to all points.
+            settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+            overrides (Optional[Mapping[str, Any]], optional): Per-point driver values (see :obj:`iri20py.settings.OVERRIDES`), e.g. `{'foF2': foF2, 'hmF2': hmF2}`. NaN entries use the value from `settings`. Defaults to None.
+            tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+            variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`evaluate`. Defaults to None.
+
+        Raises:
+            ValueError: If a `b1` override is given at a point without B0 (IRI ignores it).
+
+        Returns:
+            Tuple[ComputedSettings, Dataset]: Computed settings and dataset with dimensions (`point`, `alt_km`). The OARR parameters are stored as variables along `point`.
+        """
+        times = utctimes(times, tzaware)
+        year, day, ut = iridates(times)
+        (settings, ds) = self.lowlevel_batch(
+            lats, lons, alt, year, day, ut, settings, overrides=overrides, variables=variables)
+        ds.coords['time'] = (('point',), times.astype('datetime64[ns]'))
+        return (settings, ds)
+
+    def evaluate_timeseries(
+        self,
+        lat: Numeric, lon: Numeric,
+        times: Sequence[datetime] | np.ndarray,
+        alt: np.ndarray,
+        settings: Optional[Settings | ComputedSettings] = None,
+        *,
+        overrides: Optional[Mapping[str, Any]] = None,
+        tzaware: bool = False,
+        variables: Optional[Sequence[str]] = None,
+        rtol: Optional[float] = None,
+        max_step: float = 900.0,
+        min_step: float = 1.0
+    ) -> Tuple[ComputedSettings, Dataset]:
+        """Evaluate the IRI-2020 model at a fixed location for a series of times, in one call.
+
+        The magnetic coordinates of the location (dip, modified dip, L-value
+        and corrected geomagnetic coordinates) are computed once per day
+        (once per year for the corrected geomagnetic coordinates) instead of
+        once per time.
+
+        With `rtol`, the model is only evaluated at knot times, and the
+        profiles and OARR parameters are linearly interpolated in between.
+        The knots start `max_step` apart, with additional knots at the
+        sunrise and sunset times (ground and 300 km), and an interval is
+        halved while any profile differs from the interpolation by more than
+        `rtol`/3 at its midpoint, down to `min_step`, so that the error
+        stays within `rtol` between the knots. Requested times in intervals
+        that are not resolved at `min_step` (steps of the model, e.g. of the
+        3-hour ap index) are evaluated directly. The error is relative to
+        the model value, or to 1e-3 of the profile maximum where that is
+        larger (e.g. minor ions at low altitudes). Only intervals that
+        contain requested times are refined. Series with no more distinct
+        times than initial knots are evaluated at their times. The number of
+        knots is stored in the `knots` attribute.
+
+        Args:
+            lat (Numeric): Geographic latitude.
+            lon (Numeric): Geographic longitude.
+            times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+            alt (np.ndarray): Altitude in kilometers.
+            settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+            overrides (Optional[Mapping[str, Any]], optional): Per-time driver values. See :obj:`evaluate_batch`. Defaults to None.
+            tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+            variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`evaluate`. Defaults to None.
+            rtol (Optional[float], optional): Relative tolerance of the interpolation between knot times. Defaults to None, i.e. the model is evaluated at every time.
+            max_step (float, optional): Initial knot spacing in seconds, with `rtol`. Defaults to 900.
+            min_step (float, optional): Smallest knot spacing in seconds, with `rtol`. Defaults to 1.
+
+        Raises:
+            ValueError: If both `overrides` and `rtol` are given.
+
+        Returns:
+            Tuple[ComputedSettings, Dataset]: Computed settings and dataset with dimensions (`time`, `alt_km`). The OARR parameters are stored as variables along `time`.
+        """
+        times = np.atleast_1d(utctimes(times, tzaware))
+        if rtol is not None:
+            if overrides is not None:
+                raise ValueError("overrides can not be interpolated in time")
+            (settings, ds) = self._interptimeseries(
+                lat, lon, times, alt, settings, variables, rtol, max_step, min_step)
+        else:
+            year, day, ut = iridates(times)
+            (settings, ds) = self.lowlevel_batch(
+                lat, lon, alt, year, day, ut, settings,
+                overrides=overrides, variables=variables
+            )
+        lon = ds.lon.values[0]
+        ds = ds.drop_vars(['lat', 'lon']).rename_dims({'point': 'time'})
+        ds.coords['time'] = (('time',), times.astype('datetime64[ns]'))
+        ds.coords['lat'] = ((), float(lat), {'units': 'degrees', 'long_name': 'Latitude'})
+        ds.coords['lon'] = ((), lon, {'units': 'degrees', 'long_name': 'Longitude'})
+        return (settings, ds)
+
+    def _interptimeseries(
+        self,
+        lat: Numeric, lon: Numeric, times: np.ndarray, alt: np.ndarray,
+        settings: Optional[Settings | ComputedSettings],
+        variables: Optional[Sequence[str]],
+        rtol: float, max_step: float, min_step: float
+    ) -> Tuple[ComputedSettings, Dataset]:
+        t0 = times.min()
+        secs = (times - t0).astype(float) * 1e-6
+        queries = np.sort(secs)
+        span = queries[-1]
+        alt = np.asarray(alt)
+
+        def run(knots: np.ndarray) -> Dataset:
+            nonlocal settings
+            year, day, ut = iridates(t0 + (knots * 1e6).astype('timedelta64[us]'))
+            (settings, ds) = self.lowlevel_batch(
+                lat, lon, alt, year, day, ut, settings, variables=variables)
+            return ds
+
+        def profiles(ds: Dataset) -> np.ndarray:
+            return np.stack([
+                var.values for var in ds.data_vars.values() if var.dims == ('point', 'alt_km')
+            ], axis=1)
+
+        knots = np.linspace(0.0, span, int(np.ceil(span / max_step)) + 1)
+        unique = np.unique(queries)
+        if len(unique) <= len(knots):
+            # Sparse series: evaluating the requested times directly takes
+            # fewer evaluations than the initial knots alone.
+            knots = unique
+            ds = run(knots)
+        else:
+            ds = run(knots)
+            # Knots at the terminators, where the profiles change fastest. The
+            # local times of sunrise and sunset are converted to UT on the day
+            # of each knot.
+            lt = np.stack([ds[key].values for key in ('sunrise', 'sunset', 'SAX300', 'SUX300')])
+            midnight = knots - iridates(t0 + (knots * 1e6).astype('timedelta64[us]'))[2]
+            extra = midnight + np.mod(lt - float(lon) / 15.0, 24.0) * 3600.0
+            extra = extra[(lt >= 0) & (lt <= 24) & (extra > 0) & (extra < span)]
+            extra = np.unique(np.round(extra / min_step)) * min_step
+            near = np.abs(extra[:, None] - knots[None, :]) < min_step
+            extra = extra[~near.any(axis=1)]
+            if len(extra):
+                ds = concat([ds, run(extra)], dim='point')
+                knots = np.concatenate([knots, extra])
+            order = np.argsort(knots)
+            knots = knots[order]
+            ds = ds.isel(point=order)
+            values = profiles(ds)
+            done = np.zeros(len(knots) - 1, dtype=bool)
+            while True:
+                left, right = knots[:-1], knots[1:]
+                inside = np.searchsorted(queries, right, 'left') - np.searchsorted(queries, left, 'right')
+                cand = np.flatnonzero(~done & (inside > 0) & (right - left > 2 * min_step))
+                if len(cand) == 0:
+                    break
+                mids = 0.5 * (left[cand] + right[cand])
+                mds = run(mids)
+                mvalues = profiles(mds)
+                approx = 0.5 * (values[cand] + values[cand + 1])
+                # Relative error; values below 1e-3 of the profile maximum (e.g.
+                # minor ions) are compared against that floor instead.
+                valid = np.isfinite(mvalues) & (mvalues > 0)
+                scale = np.maximum(
+                    mvalues, 1e-3 * np.max(np.where(valid, mvalues, 0.0), axis=-1, keepdims=True))
+                err = np.where(valid, np.abs(approx - mvalues) / np.where(valid, scale, 1.0), 0.0)
+                # A kink inside an interval (e.g. of the night E region) can make
+                # the error next to it twice the midpoint error.
+                passed = err.reshape(len(cand), -1).max(axis=1) <= rtol / 3
+                done[cand] = passed
+                # Interval status, keyed by its left knot (the last knot has none).
+                status = np.concatenate([done, [True], passed])
+                knots = np.concatenate([knots, mids])
+                ds = concat([ds, mds], dim='point')
+                values = np.concatenate([values, mvalues])
+                order = np.argsort(knots, kind='stable')
+                knots = knots[order]
+                ds = ds.isel(point=order)
+                values = values[order]
+                done = status[order][:-1]
+            # Intervals that are not resolved at `min_step` contain a step of the
+            # model (e.g. of the 3-hour ap index, or the local date at local
+            # midnight); their requested times are evaluated directly.
+            unresolved = np.zeros(len(queries), dtype=bool)
+            if len(done):
+                interval = np.minimum(np.searchsorted(knots, queries, 'right') - 1, len(done) - 1)
+                unresolved = ~done[interval] & (queries > knots[interval]) & (queries < knots[interval + 1])
+            if np.any(unresolved):
+                exact = np.unique(queries[unresolved])
+                ds = concat([ds, run(exact)], dim='point')
+                knots = np.concatenate([knots, exact])
+                order = np.argsort(knots, kind='stable')
+                knots = knots[order]
+                ds = ds.isel(point=order)
+        # Interpolate the knots to the requested times.
+        idx = np.clip(np.searchsorted(knots, secs, 'right') - 1, 0, max(len(knots) - 2, 0))
+        nxt = np.minimum(idx + 1, len(knots) - 1)
+        width = knots[nxt] - knots[idx]
+        w = np.where(width > 0, (secs - knots[idx]) / np.where(width > 0, width, 1.0), 0.0)
+        out = ds.isel(point=idx)
+        for key, var in ds.data_vars.items():
+            lo = var.values[idx]
+            hi = var.values[nxt]
+            wk = w.reshape((-1,) + (1,) * (var.ndim - 1))
+            if key in OARR_FIELDS and OARR_FIELDS[key].units == 'hours':
+                # Local times wrap around at 24 hours.
+                hi = lo + np.mod(hi - lo + 12.0, 24.0) - 12.0
+                out[key] = (var.dims, np.mod(lo + (hi - lo) * wk, 24.0), var.attrs)
+            else:
+                out[key] = (var.dims, lo + (hi - lo) * wk, var.attrs)
+        out.attrs['knots'] = len(knots)
+        return (settings, out)
+
+    def evaluate_ensemble(
+        self,
+        times: Sequence[datetime] | np.ndarray,
+        lats: np.ndarray, lons: np.ndarray, alt: np.ndarray,
+        drivers: Mapping[str, Any],
+        settings: Optional[Settings | ComputedSettings] = None,
+        *,
+        tzaware: bool = False,
+        variables: Optional[Sequence[str]] = None
+    ) -> Tuple[ComputedSettings, Dataset]:
+        """Evaluate the IRI-2020 model at a number of locations and times under an ensemble of perturbed drivers, in one call.
+
+        Args:
+            times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+            lats (np.ndarray): Geographic latitudes.
+            lons (np.ndarray): Geographic longitudes.
+            alt (np.ndarray): Altitude in kilometers, common to all points.
+            drivers (Mapping[str, Any]): Driver values of the ensemble members, keyed by the names in :obj:`iri20py.settings.OVERRIDES`, e.g. `{'f107': f107, 'f107_81': f107_81}`. Each value is an array of shape (`ensemble`,), or (`ensemble`, `point`) for per-point values. NaN entries use the value from `settings`.
+            settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+            tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+            variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`evaluate`. Defaults to None.
+
+        Raises:
+            ValueError: If `drivers` is empty, the driver arrays do not agree on the ensemble size, or `b1` is perturbed without B0 (IRI ignores B1 without B0; perturb `b0` as well, or set `Settings.b0_value`).
+
+        Returns:
+            Tuple[ComputedSettings, Dataset]: Computed settings and dataset with dimensions (`ensemble`, `point`, `alt_km`). The OARR parameters are stored as variables along (`ensemble`, `point`).
+        """
+        times = utctimes(times, tzaware)
+        lat, lon, times = np.broadcast_arrays(
+            np.asarray(lats, dtype=float), np.asarray(lons, dtype=float), times)
+        npts = len(times)
+        drivers = {
+            name: np.asarray(value, dtype=float) for name, value in drivers.items()
+        }
+        if len(drivers) == 0:
+            raise ValueError("At least one driver must be perturbed")
+        members = {value.shape[0] if value.ndim else 1 for value in drivers.values()}
+        if len(members) != 1:
+            raise ValueError("Driver arrays must have the same ensemble size")
+        nens = members.pop()
+        # Members of a point share its date, so the batch evaluates them back to back.
+        overrides = {
+            name: np.broadcast_to(value.reshape(nens, -1), (nens, npts)).ravel()
+            for name, value in drivers.items()
+        }
+        year, day, ut = iridates(times)
+        (settings, ds) = self.lowlevel_batch(
+            np.tile(lat, nens), np.tile(lon, nens), alt,
+            np.tile(year, nens), np.tile(day, nens), np.tile(ut, nens),
+            settings, overrides=overrides, variables=variables
+        )
+        ds.coords['time'] = (('point',), np.tile(times.astype('datetime64[ns]'), nens))
+        ens = self._unstack(ds, 'ensemble', nens)
+        return (settings, ens)
+
+    def compare(
+        self,
+        settings_list: Sequence[Settings | ComputedSettings],
+        times: Sequence[datetime] | np.ndarray,
+        lats: np.ndarray, lons: np.ndarray, alt: np.ndarray,
+        *,
+        overrides: Optional[Mapping[str, Any]] = None,
+        tzaware: bool = False,
+        variables: Optional[Sequence[str]] = None
+    ) -> Tuple[List[ComputedSettings], Dataset]:
+        """Evaluate the IRI-2020 model with several settings variants over the same locations and times, in one call.
+
+        The model still runs once per variant and point, but shares what it
+        caches between consecutive calls. The batch is ordered by date, so
+        the solar and geomagnetic indices are looked up once per date, and
+        the monthly coefficients are loaded once per month and foF2 model
+        (CCIR or URSI). The variants of a point are evaluated in a row, so
+        its magnetic coordinates are computed once for the variants that
+        use the same foF2 model and the same magnetic field, temperature and
+        ion composition models (see `IRI_SUB`).
+
+        Args:
+            settings_list (Sequence[Settings | ComputedSettings]): Settings variants to compare.
+            times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+            lats (np.ndarray): Geographic latitudes.
+            lons (np.ndarray): Geographic longitudes.
+            alt (np.ndarray): Altitude in kilometers, common to all points.
+            overrides (Optional[Mapping[str, Any]], optional): Per-point driver values, common to all variants. See :obj:`evaluate_batch`. Defaults to None.
+            tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+            variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`evaluate`. Defaults to None.
+
+        Raises:
+            TypeError: If a variant is not of type Settings or ComputedSettings.
+            ValueError: If `settings_list` is empty.
+
+        Returns:
+            Tuple[List[ComputedSettings], Dataset]: Computed settings of the variants, and dataset with dimensions (`variant`, `point`, `alt_km`). The `settings` coordinate holds the JSON string of each variant's Settings, where available.
+        """
+        if len(settings_list) == 0:
+            raise ValueError("At least one settings variant is required")
+        computed = []
+        for settings in settings_list:
+            computed.append(self._computed(settings, variables, store=False))
+        times = utctimes(times, tzaware)
+        lat, lon, times = np.broadcast_arrays(
+            np.asarray(lats, dtype=np.float32),
+            np.asarray(lons, dtype=float) % 360,  # ensure lon is in 0-360 range
+            times
+        )
+        npts = len(times)
+        nvar = len(computed)
+        year, day, ut = iridates(times)
+        alt = np.asarray(alt)
+        expanded = [settings.expand(npts, overrides) for settings in computed]
+        jf = np.concatenate([e[0] for e in expanded], axis=1)
+        oarr = np.asfortranarray(np.concatenate([e[1] for e in expanded], axis=1))
+        # The variants of a point are evaluated in a row (the batch order is
+        # stable within a date), so that IRI_SUB reuses the magnetic
+        # coordinates of the point instead of recomputing them per variant.
+        # The index lookups are shared by all points of a date.
+        interleave = np.arange(npts*nvar).reshape(nvar, npts).T.ravel()
+        ioarr = np.asfortranarray(oarr[:, interleave])
+        outf = self._batchcall(
+            np.repeat(lat, nvar), np.repeat(lon, nvar).astype(np.float32),
+            np.broadcast_to(alt[:, None], (len(alt), npts*nvar)),
+            np.repeat(year, nvar), np.repeat(day, nvar), np.repeat(ut, nvar),
+            np.asfortranarray(jf[:, interleave]), ioarr, computed[0].logfile
+        )
+        oarr[:, interleave] = ioarr
+        outf = outf[:, :, np.argsort(interleave)]
+        ds = self._batchdataset(
+            np.tile(lat, nvar), np.tile(lon, nvar), alt, outf, oarr, computed[0])
+        ds.coords['time'] = (('point',), np.tile(times.astype('datetime64[ns]'), nvar))
+        ds = self._unstack(ds, 'variant', nvar)
+        ds.coords['settings'] = (('variant',), [
+            settings.to_json() if isinstance(settings, Settings) else ''
+            for settings in settings_list
+        ])
+        self._tableattrs(ds)
+        return (computed, ds)
+
+    def evaluate_track(
+        self,
+        times: Sequence[datetime] | np.ndarray,
+        lats: np.ndarray, lons: np.ndarray, alts: np.ndarray,
+        settings: Optional[Settings | ComputedSettings] = None,
+        *,
+        overrides: Optional[Mapping[str, Any]] = None,
+        tzaware: bool = False,
+        variables: Optional[Sequence[str]] = None
+    ) -> Tuple[ComputedSettings, Dataset]:
+        """Evaluate the IRI-2020 model along a trajectory, with one altitude per sample.
+
+        Samples that share the time, location and driver overrides (e.g. a
+        vertical scan) are evaluated as one profile, and the profiles with
+        the same number of samples are evaluated in one call to the model.
+
+        Args:
+            times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+            lats (np.ndarray): Geographic latitudes.
+            lons (np.ndarray): Geographic longitudes.
+            alts (np.ndarray): Altitudes in kilometers.
+            settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+            overrides (Optional[Mapping[str, Any]], optional): Per-sample driver values. See :obj:`evaluate_batch`. Defaults to None.
+            tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+            variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`evaluate`. Defaults to None.
+
+        Raises:
+            TypeError: If settings is not of type Settings or ComputedSettings.
+            ValueError: If the sample arrays do not have the same length.
+
+        Returns:
+            Tuple[ComputedSettings, Dataset]: Computed settings and dataset with dimension `sample`. The OARR parameters are stored as variables along `sample`.
+        """
+        settings = self._computed(settings, variables)
+        times = utctimes(times, tzaware)
+        lat, lon, alt, times = np.broadcast_arrays(
+            np.asarray(lats, dtype=np.float32),
+            np.asarray(lons, dtype=float) % 360,  # ensure lon is in 0-360 range
+            np.asarray(alts, dtype=np.float32),
+            times
+        )
+        if lat.ndim != 1:
+            raise ValueError("Samples must be one-dimensional arrays")
+        nsamp = len(lat)
+        year, day, ut = iridates(times)
+        names = list(overrides or {})
+        values = [
+            np.broadcast_to(np.asarray(overrides[name], dtype=float), (nsamp,))
+            for name in names
+        ]
+        # Group the samples sharing a profile setup; missing overrides (NaN)
+        # are keyed as infinity, which is also not a valid driver value.
+        keys = np.column_stack(
+            [year, day, ut, lat, lon] + [np.nan_to_num(v, nan=np.inf) for v in values])
+        _, first, group = np.unique(
+            keys, axis=0, return_index=True, return_inverse=True)
+        group = group.ravel()
+        ngroup = len(first)
+        order = np.argsort(group, kind='stable')
+        counts = np.bincount(group, minlength=ngroup)
+        starts = np.cumsum(counts) - counts
+        rank = np.empty(nsamp, dtype=int)
+        rank[order] = np.arange(nsamp) - starts[group[order]]
+        jf, oarr = settings.expand(
+            ngroup, {name: v[first] for name, v in zip(names, values)})
+        # Profiles with the same number of samples are evaluated in one call,
+        # without padding: the model takes the altitude range of a profile
+        # from its first and last altitudes (e.g. for the height of the
+        # corrected geomagnetic coordinates).
+        outf = np.empty((20, nsamp), dtype=np.float32)
+        for count in np.unique(counts):
+            sel = np.flatnonzero(counts == count)
+            column = np.empty(ngroup, dtype=int)
+            column[sel] = np.arange(len(sel))
+            member = np.flatnonzero(counts[group] == count)
+            zkm = np.empty((count, len(sel)), dtype=np.float32, order='F')
+            zkm[rank[member], column[group[member]]] = alt[member]
+            ofirst = first[sel]
+            soarr = oarr[:, sel]
+            out = self._batchcall(
+                lat[ofirst], lon[ofirst].astype(np.float32), zkm,
+                year[ofirst], day[ofirst], ut[ofirst], jf[:, sel], soarr, settings.logfile
+            )
+            oarr[:, sel] = soarr
+            outf[:, member] = out[:, rank[member], column[group[member]]]
+        ds = Dataset()
+        ds.coords['time'] = (('sample',), times.astype('datetime64[ns]'))
+        ds.coords['lat'] = (('sample',), lat.astype(float), {
+                            'units': 'degrees', 'long_name': 'Latitude'})
+        ds.coords['lon'] = (('sample',), lon, {
+                            'units': 'degrees', 'long_name': 'Longitude'})
+        ds.coords['alt_km'] = (('sample',), np.asarray(alts, dtype=float) * np.ones(nsamp), {
+                               'units': 'km', 'long_name': 'Altitude'})
+        for name, idx, long_name, units, scale in _outputs(settings):
+            ds[name] = (('sample',), np.array(outf[idx]*scale, dtype=float),
+                        {'units': units, 'long_name': long_name})
+        self._oarrvariables(ds, oarr[:, group], 'sample', self._fields())
+        ds.attrs['description'] = 'IRI 2020 model output'
+        ds.attrs['settings'] = self.settings.to_json()
+        ds.attrs['version'] = f'IRI-2020 v{__version__}'
+        self._tableattrs(ds)
+        return (settings, ds)
+
+    def lowlevel_batch(
+        self,
+        lats: np.ndarray, lons: np.ndarray, alt: np.ndarray,
+        years: np.ndarray, days: np.ndarray, uts: np.ndarray,
+        settings: Optional[Settings | ComputedSettings] = None,
+        *,
+        overrides: Optional[Mapping[str, Any]] = None,
+        variables: Optional[Sequence[str]] = None
+    ) -> Tuple[ComputedSettings, Dataset]:
+        """Low level call to evaluate IRI-2020 model at a number of points.
+        Bypasses date and time calculations.
+
+        Args:
+            lats (np.ndarray): Geographic latitudes.
+            lons (np.ndarray): Geographic longitudes.
+            alt (np.ndarray): Altitude in kilometers, common to all points.
+            years (np.ndarray): Years (four digits).
+            days (np.ndarray): Days of the year (1-365 or 366).
+            uts (np.ndarray): Universal times in seconds.
+            settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+            overrides (Optional[Mapping[str, Any]], optional): Per-point driver values. See :obj:`evaluate_batch`. Defaults to None.
+            variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`evaluate`. Defaults to None.
+
+        Raises:
+            TypeError: If settings is not of type Settings or ComputedSettings.
+            ValueError: If the point arrays do not have the same length.
+
+        Returns:
+            Tuple[ComputedSettings, Dataset]: Computed settings and dataset with dimensions (`point`, `alt_km`).
+        """
+        settings = self._computed(settings, variables)
+        lat, lon, year, day, ut = np.broadcast_arrays(
+            np.asarray(lats, dtype=np.float32),
+            np.asarray(lons, dtype=float) % 360,  # ensure lon is in 0-360 range
+            np.asarray(years, dtype=np.int32),
+            np.asarray(days, dtype=np.int32),
+            np.asarray(uts, dtype=float),
+        )
+        if lat.ndim != 1:
+            raise ValueError("Points must be one-dimensional arrays")
+        npts = len(lat)
+        alt = np.asarray(alt)
+        jf, oarr = settings.expand(npts, overrides)
+        outf = self._batchcall(
+            lat, lon.astype(np.float32), np.broadcast_to(alt[:, None], (len(alt), npts)),
+            year, day, ut, jf, oarr, settings.logfile
+        )
+        ds = self._batchdataset(lat, lon, alt, outf, oarr, settings)
+        ds.attrs['settings'] = self.settings.to_json()
+        self._tableattrs(ds)
         return settings, ds
 
 
+def _restore(settings: Settings) -> Iri2020:
+    iri = Iri2020()
+    iri.settings = settings
+    return iri
+
+
 # %%
 def test():
     import matplotlib.pyplot as plt
@@ -0,0 +1,378 @@
+# %%
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from datetime import UTC, datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from queue import Queue
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base import Iri2020
+from .settings import Settings
+from .utils import alt_grid
+
+"""
+iri20py.batch
+=============
+
+Command line batch runner (`Iri20Batch`).
+
+The input points are split into chunks of a fixed number of points, which
+are evaluated by a pool of workers. The input is read a chunk at a time, as
+the workers take on new chunks. Every chunk is written to its own part
+file in the output directory, which also holds a manifest of the job. A
+part file is only renamed into place once complete, so an interrupted job
+is resumed by running the same command again: the parts that exist are
+skipped.
+"""
+
+MANIFEST = '_manifest.json'  # skipped by Arrow and Spark dataset readers
+FORMATS = {'parquet': '.parquet', 'netcdf': '.nc'}
+# Time zone designator of an ISO 8601 time: Z, +hh:mm, +hhmm or +hh
+_OFFSET = re.compile(r'(Z|[+-]\d{2}(:?\d{2})?)$', re.IGNORECASE)
+
+
+def _parse_times(times: np.ndarray) -> np.ndarray:
+    # ISO 8601 strings to UTC datetime64; times without an offset are UTC.
+    times = np.char.strip(times.astype(str))
+    if not any(_OFFSET.search(time) for time in times):
+        return np.asarray(times, dtype='datetime64[us]')
+    out = np.empty(len(times), dtype='datetime64[us]')
+    for idx, time in enumerate(times):
+        try:
+            value = datetime.fromisoformat(time)
+        except ValueError:
+            raise ValueError(f"Invalid ISO 8601 time in the input: {time!r}") from None
+        if value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        out[idx] = np.datetime64(value, 'us')
+    return out
+
+
+def _columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # Input columns as typed arrays.
+    time = columns['time']
+    if time.dtype.kind in 'US':
+        time = _parse_times(time)
+    out = {
+        'time': np.asarray(time, dtype='datetime64[us]'),
+        'lat': np.asarray(columns['lat'], dtype=float),
+        'lon': np.asarray(columns['lon'], dtype=float),
+    }
+    if 'alt' in columns:
+        out['alt'] = np.asarray(columns['alt'], dtype=float)
+    return out
+
+
+def _parquet(path: Path) -> bool:
+    return path.suffix.lower() in ('.parquet', '.pq')
+
+
+def _check_columns(names: Sequence[str]):
+    missing = {'time', 'lat', 'lon'} - set(names)
+    if missing:
+        raise ValueError(f"Missing input columns: {', '.join(sorted(missing))}")
+
+
+def _csv_rows(fd) -> Tuple[List[str], Iterator[List[str]]]:
+    # Header and (non-empty) rows of a CSV file.
+    reader = csv.reader(fd)
+    header = [name.strip() for name in next(reader, [])]
+    return header, (row for row in reader if row)
+
+
+def scan_points(path: Path | str) -> Tuple[int, List[str]]:
+    """Count the input points and check the columns of a CSV or Parquet file, without loading it.
+
+    The number of points of a Parquet file is read from its metadata; a CSV
+    file is read through once.
+
+    Args:
+        path (Path | str): Input file, `.csv` or `.parquet`.
+
+    Raises:
+        ValueError: If a required column is missing.
+
+    Returns:
+        Tuple[int, List[str]]: Number of points, and names of the columns.
+    """
+    path = Path(path)
+    if _parquet(path):
+        import pyarrow.parquet as pq
+        meta = pq.ParquetFile(path).metadata
+        count, names = meta.num_rows, list(meta.schema.names)
+    else:
+        with open(path, newline='') as fd:
+            names, rows = _csv_rows(fd)
+            count = sum(1 for _ in rows)
+    _check_columns(names)
+    return count, names
+
+
+def iter_points(path: Path | str, chunk: int) -> Iterator[Dict[str, np.ndarray]]:
+    """Read the input points from a CSV or Parquet file, `chunk` points at a time.
+
+    The file has the columns `time` (ISO 8601, UTC unless it has a time
+    zone offset), `lat`, `lon` and, optionally, `alt` (km). CSV files have a
+    header row. Only one chunk of the file is held in memory at a time.
+
+    Args:
+        path (Path | str): Input file, `.csv` or `.parquet`.
+        chunk (int): Number of points per chunk; the last chunk may be smaller.
+
+    Raises:
+        ValueError: If a required column is missing, or a time can not be parsed.
+
+    Yields:
+        Dict[str, np.ndarray]: The columns of a chunk, with `time` as `datetime64[us]`.
+    """
+    path = Path(path)
+    if _parquet(path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pfile = pq.ParquetFile(path)
+        _check_columns(pfile.schema_arrow.names)
+
+        def convert(table: pa.Table) -> Dict[str, np.ndarray]:
+            columns = {}
+            for name in table.column_names:
+                col = table[name]
+                if name == 'time' and pa.types.is_timestamp(col.type):
+                    col = col.cast(pa.timestamp('us'))  # UTC, time zone naive
+                columns[name] = col.to_numpy()
+            return _columns(columns)
+
+        # Batches can end at row group boundaries; regroup them into chunks.
+        pending: List[pa.RecordBatch] = []
+        count = 0
+        for batch in pfile.iter_batches(batch_size=chunk):
+            pending.append(batch)
+            count += batch.num_rows
+            while count >= chunk:
+                table = pa.Table.from_batches(pending)
+                yield convert(table.slice(0, chunk))
+                pending = table.slice(chunk).to_batches()
+                count -= chunk
+        if count:
+            yield convert(pa.Table.from_batches(pending))
+    else:
+        with open(path, newline='') as fd:
+            header, rows = _csv_rows(fd)
+            _check_columns(header)
+            while True:
+                block = list(islice(rows, chunk))
+                if not block:
+                    break
+                yield _columns({name: np.asarray(col) for name, col in zip(header, zip(*block))})
+
+
+def read_points(path: Path | str) -> Dict[str, np.ndarray]:
+    """Read all the input points from a CSV or Parquet file. See :obj:`iter_points`.
+
+    Args:
+        path (Path | str): Input file, `.csv` or `.parquet`.
+
+    Raises:
+        ValueError: If a required column is missing, or a time can not be parsed.
+
+    Returns:
+        Dict[str, np.ndarray]: The columns, with `time` as `datetime64[us]`.
+    """
+    chunks = list(iter_points(path, 65536))
+    if not chunks:
+        _, names = scan_points(path)
+        return {
+            name: np.empty(0, dtype='datetime64[us]' if name == 'time' else float)
+            for name in ('time', 'lat', 'lon', 'alt') if name in names
+        }
+    return {key: np.concatenate([c[key] for c in chunks]) for key in chunks[0]}
+
+
+def _part(output: Path, index: int, fmt: str) -> Path:
+    return output / f'part-{index:06d}{FORMATS[fmt]}'
+
+
+def _run(args: Tuple[Path, int, int, Dict[str, np.ndarray], Optional[np.ndarray], str, Optional[Sequence[str]]]) -> Tuple[int, int]:
+    # Evaluate and write one chunk with the model and settings of this process.
+    path, index, start, points, grid, fmt, variables = args
+    tmp = path.with_name(path.name + '.tmp')
+    alt = points['alt'][:, None] if grid is None else grid
+    if fmt == 'parquet':
+        from .columnar import write_parquet
+        write_parquet(
+            tmp, points['time'], points['lat'], points['lon'], alt,
+            variables=variables, chunk=len(points['time']), start=start
+        )
+    else:
+        iri = Iri2020()
+        if grid is None:
+            _, ds = iri.evaluate_track(
+                points['time'], points['lat'], points['lon'], points['alt'],
+                variables=variables)
+            dim = 'sample'
+        else:
+            _, ds = iri.evaluate_batch(
+                points['time'], points['lat'], points['lon'], grid,
+                variables=variables)
+            dim = 'point'
+        ds.coords[dim] = ((dim,), np.arange(start, start + len(points['time'])))
+        ds.to_netcdf(tmp)
+    os.replace(tmp, path)
+    return index, len(points['time'])
+
+
+def _manifest(args: argparse.Namespace, npts: int, grid: Optional[np.ndarray], settings: Settings) -> Dict:
+    # The size and the modification time identify the version of the input.
+    stat = Path(args.input).stat()
+    return {
+        'input': str(Path(args.input).resolve()),
+        'input_size': stat.st_size,
+        'input_mtime_ns': stat.st_mtime_ns,
+        'points': npts,
+        'chunk': args.chunk,
+        'format': args.format,
+        'alt': None if grid is None else [float(x) for x in grid],
+        'variables': args.variables,
+        'settings': json.loads(settings.to_json()),
+    }
+
+
+def _progress(done: int, total: int, points: int, npts: int, elapsed: float):
+    rate = points / elapsed if elapsed > 0 else 0.0
+    eta = (npts - points) / rate if rate > 0 else 0.0
+    print(
+        f'[{done}/{total}] {points}/{npts} points, '
+        f'{rate:.1f} points/s, ETA {timedelta(seconds=round(eta))}',
+        file=sys.stderr, flush=True
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the `Iri20Batch` command.
+
+    Args:
+        argv (Optional[List[str]], optional): Command line arguments. Defaults to None, i.e. `sys.argv[1:]`.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(
+        prog='Iri20Batch',
+        description='Evaluate the IRI-2020 model at the points of a CSV or Parquet file '
+        '(columns: time, lat, lon[, alt]). Without an alt column, every point is evaluated '
+        'on an altitude grid. The output directory holds one part file per chunk; '
+        'rerun an interrupted job to resume it.'
+    )
+    parser.add_argument('input', type=Path, help='input points, .csv or .parquet')
+    parser.add_argument('output', type=Path, help='output directory')
+    parser.add_argument('-s', '--settings', type=Path,
+                        help='settings JSON file, as written by Settings.to_json')
+    parser.add_argument('-f', '--format', choices=list(FORMATS), default='parquet',
+                        help='output format (default: parquet)')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('-c', '--chunk', type=int, default=4096,
+                        help='points per chunk (default: 4096)')
+    parser.add_argument('--variables', nargs='+',
+                        help='output variables to compute (default: all)')
+    parser.add_argument('--alt-num', type=int, default=250,
+                        help='number of altitudes of the grid (default: 250), see alt_grid')
+    parser.add_argument('--alt-min', type=float, default=60,
+                        help='lowest altitude of the grid in km (default: 60)')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='discard the results of a previous, different job in the output directory')
+    args = parser.parse_args(argv)
+    if args.chunk < 1:
+        parser.error('--chunk must be at least 1')
+
+    settings = Settings()
+    if args.settings is not None:
+        settings = Settings.from_json(args.settings.read_text())
+    npts, names = scan_points(args.input)
+    grid = None if 'alt' in names else alt_grid(args.alt_num, args.alt_min)
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    manifest = _manifest(args, npts, grid, settings)
+    mpath = args.output / MANIFEST
+    if mpath.exists() and json.loads(mpath.read_text()) != manifest:
+        if not args.overwrite:
+            print(f'{args.output} holds the results of a different job; '
+                  'use --overwrite to discard them', file=sys.stderr)
+            return 1
+        for part in args.output.glob('part-*'):
+            part.unlink()
+    mpath.write_text(json.dumps(manifest, indent=2))
+
+    nchunks = (npts + args.chunk - 1) // args.chunk
+    todo = [
+        index for index in range(nchunks)
+        if not _part(args.output, index, args.format).exists()
+    ]
+    skipped = nchunks - len(todo)
+    if skipped:
+        print(f'Resuming: {skipped}/{nchunks} chunks already done',
+              file=sys.stderr)
+    total = sum(min(args.chunk, npts - index * args.chunk) for index in todo)
+
+    def tasks():
+        # The input is read one chunk at a time, as the tasks are consumed.
+        for index, points in enumerate(iter_points(args.input, args.chunk)):
+            path = _part(args.output, index, args.format)
+            if path.exists():
+                continue
+            yield path, index, index * args.chunk, points, grid, args.format, args.variables
+
+    done, count = 0, 0
+    start = perf_counter()
+    if args.workers > 1 and len(todo) > 1:
+        from .pool import IriPool
+        workers = min(args.workers, len(todo))
+        results: Queue = Queue()
+        pending = 0
+
+        def collect():
+            nonlocal done, count, pending
+            result = results.get()
+            pending -= 1
+            if isinstance(result, BaseException):
+                raise result
+            done, count = done + 1, count + result[1]
+            _progress(done, len(todo), count, total, perf_counter() - start)
+
+        with IriPool(workers, settings) as pool:
+            # At most two chunks per worker are in memory at a time.
+            for task in tasks():
+                if pending >= 2 * workers:
+                    collect()
+                pool.apply_async(_run, (task,), callback=results.put, error_callback=results.put)
+                pending += 1
+            while pending:
+                collect()
+            pool.close()
+    else:
+        Iri2020().settings = settings
+        for task in tasks():
+            _, n = _run(task)
+            done, count = done + 1, count + n
+            _progress(done, len(todo), count, total, perf_counter() - start)
+    elapsed = perf_counter() - start
+    print(
+        f'Evaluated {count} points in {timedelta(seconds=round(elapsed))} '
+        f'({count / elapsed if elapsed > 0 else 0.0:.1f} points/s), '
+        f'output in {args.output}',
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# %%
+from __future__ import annotations
+import threading
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from xarray import DataArray, Dataset, broadcast
+
+from .base import Iri2020, _outputs
+from .settings import Settings, ComputedSettings
+from .utils import iridates
+from . import __version__
+
+if TYPE_CHECKING:
+    from .table import IriTable
+
+"""
+iri20py.chunked
+===============
+
+Lazy, chunked evaluation of the IRI-2020 model with dask.
+
+Every chunk is evaluated by a task that uses the `Iri2020` instance of
+the process it runs in, so the chunks can be computed by any dask
+scheduler, including multi-process and distributed ones. The tasks only
+carry the model settings (see :obj:`iri20py.settings.ComputedSettings`)
+and the coordinates of their chunk, and return a float32 array.
+"""
+
+# The Fortran model is not thread safe: chunks computed by the threaded
+# scheduler are evaluated one at a time.
+_LOCK = threading.Lock()
+
+
+def _block(
+    time: np.ndarray, lat: np.ndarray, lon: np.ndarray,
+    *, iri: Iri2020, settings: ComputedSettings, alt: np.ndarray,
+    index: List[int], table: Optional[IriTable]
+) -> np.ndarray:
+    # Evaluate a chunk: profiles of the outputs in `index`, then OARR, along a new last axis.
+    shape = time.shape
+    year, day, ut = iridates(time.ravel())
+    npts = len(year)
+    jf, oarr = settings.expand(npts)
+    with _LOCK, (nullcontext() if table is None else iri.tabulated(table)):
+        outf = iri._batchcall(
+            lat.ravel().astype(np.float32), (lon.ravel() % 360).astype(np.float32),
+            np.broadcast_to(alt[:, None], (len(alt), npts)),
+            year, day, ut, jf, oarr, settings.logfile
+        )
+    out = np.concatenate([
+        outf[index].transpose(2, 0, 1).reshape(npts, -1),
+        oarr.T,
+    ], axis=1)
+    return out.reshape(shape + (out.shape[1],))
+
+
+def evaluate_chunked(
+    times: Any, lats: Any, lons: Any, alt: np.ndarray,
+    settings: Optional[Settings | ComputedSettings] = None,
+    *,
+    variables: Optional[Sequence[str]] = None,
+    chunks: Any = 4096,
+) -> Dataset:
+    """Evaluate the IRI-2020 model lazily over chunked coordinate arrays.
+
+    The coordinates are broadcast against each other. Dask arrays keep their
+    chunks; NumPy arrays and sequences are chunked with `chunks`. For xarray
+    DataArrays, the dimensions of the output are those of the broadcast
+    coordinates, otherwise (`point`,) for one-dimensional coordinates, and
+    (`dim_0`, `dim_1`, ...) for others. The model is evaluated when the data
+    is computed; the current settings of the model, and the table of an
+    enclosing :obj:`Iri2020.tabulated` block, are used by the workers.
+
+    Args:
+        times (Any): Times, as `datetime64` (UTC) or time zone naive datetime objects.
+        lats (Any): Geographic latitudes.
+        lons (Any): Geographic longitudes.
+        alt (np.ndarray): Altitude in kilometers, common to all points.
+        settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+        variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`Iri2020.evaluate`. Defaults to None.
+        chunks (Any, optional): Chunks of coordinates that are not dask arrays, see `dask.array.from_array`. Defaults to 4096.
+
+    Raises:
+        ImportError: If dask is not installed.
+        TypeError: If settings is not of type Settings or ComputedSettings.
+
+    Returns:
+        Dataset: Lazy dataset with the profiles along the coordinate dimensions and `alt_km`, and the OARR parameters along the coordinate dimensions.
+    """
+    try:
+        import dask.array as da
+    except ImportError as e:
+        raise ImportError(
+            "dask is required for chunked evaluation: pip install dask[array]") from e
+    iri = Iri2020()
+    settings = iri._computed(settings, variables)
+    coords = [times, lats, lons]
+    dims: Optional[Tuple[str, ...]] = None
+    if any(isinstance(x, DataArray) for x in coords):
+        coords = list(broadcast(*[
+            x if isinstance(x, DataArray) else DataArray(x) for x in coords
+        ]))
+        dims = coords[0].dims
+        coords = [x.data for x in coords]
+    if not isinstance(coords[0], da.Array):
+        coords[0] = np.asarray(coords[0], dtype='datetime64[us]')
+    coords = [
+        x if isinstance(x, da.Array) else da.from_array(np.asarray(x), chunks=chunks)
+        for x in coords
+    ]
+    time, lat, lon = da.broadcast_arrays(*coords)
+    time = time.astype('datetime64[us]')
+    lat = lat.rechunk(time.chunks)
+    lon = lon.rechunk(time.chunks)
+    if dims is None:
+        dims = ('point',) if time.ndim == 1 else tuple(f'dim_{i}' for i in range(time.ndim))
+    alt = np.asarray(alt, dtype=float)
+    nalt = len(alt)
+    outputs = _outputs(settings)
+    index = [idx for _, idx, _, _, _ in outputs]
+    width = len(index) * nalt + len(settings.oarr)
+    out = da.map_blocks(
+        _block, time, lat, lon,
+        iri=iri, settings=settings, alt=alt, index=index, table=iri.table,
+        dtype=np.float32, new_axis=time.ndim,
+        chunks=time.chunks + ((width,),),
+    )
+    ds = Dataset()
+    ds.coords['alt_km'] = (
+        ('alt_km',), alt.copy(), {'units': 'km', 'long_name': 'Altitude'})
+    ds.coords['time'] = (dims, time.astype('datetime64[ns]'))
+    ds.coords['lat'] = (dims, lat.astype(float), {
+                        'units': 'degrees', 'long_name': 'Latitude'})
+    ds.coords['lon'] = (dims, lon.astype(float) % 360, {
+                        'units': 'degrees', 'long_name': 'Longitude'})
+    for k, (name, _, long_name, units, scale) in enumerate(outputs):
+        ds[name] = (
+            dims + ('alt_km',),
+            out[..., k*nalt:(k + 1)*nalt].astype(float) * scale,
+            {'units': units, 'long_name': long_name}
+        )
+    start = len(index) * nalt
+    for key, field in iri._fields().items():
+        if key in ds.coords:
+            continue
+        ds[key] = (dims, out[..., start + field.index].astype(float) * field.scale, field.attrs)
+    ds.attrs['description'] = 'IRI 2020 model output'
+    ds.attrs['settings'] = iri.settings.to_json()
+    ds.attrs['version'] = f'IRI-2020 v{__version__}'
+    iri._tableattrs(ds)
+    return ds
@@ -0,0 +1,275 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base import OARR_FIELDS, Iri2020, _outputs
+from .settings import Settings, ComputedSettings
+from .utils import iridates, utctimes
+from . import __version__
+
+"""
+iri20py.columnar
+================
+
+Columnar (Apache Arrow and Parquet) export of batch evaluations.
+
+The points are evaluated in chunks, and every chunk is converted directly
+from the model outputs to an Arrow record batch with one row per point and
+altitude. The peak parameters of every point are repeated on its rows as
+typed columns, and are compressed away by the dictionary and run-length
+encodings of Parquet.
+"""
+
+PEAK_COLUMNS: Tuple[str, ...] = (
+    'nmF2', 'hmF2', 'nmF1', 'hmF1', 'nmE', 'hmE', 'nmD', 'hmD',
+    'B0', 'B1', 'valley_base', 'valley_top', 'M(3000)F2',
+)
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for columnar export: pip install pyarrow") from e
+    return pa
+
+
+def schema(
+    settings: Optional[Settings | ComputedSettings] = None,
+    *,
+    variables: Optional[Sequence[str]] = None,
+    peaks: Sequence[str] = PEAK_COLUMNS
+):
+    """Arrow schema of the exported records.
+
+    The columns are `point` (int64), `time` (timestamp, UTC), `lat`, `lon`
+    and `alt` (float32), the computed profile outputs (float32, densities in
+    cm^-3, temperatures in K) and the peak parameters (float32). The units
+    and long names are stored in the field metadata, and the model settings
+    and version in the schema metadata.
+
+    Args:
+        settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+        variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`Iri2020.evaluate`. Defaults to None.
+        peaks (Sequence[str], optional): OARR parameters to include, see :obj:`iri20py.base.OARR_FIELDS`. Defaults to PEAK_COLUMNS.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+        KeyError: If a peak parameter is unknown.
+
+    Returns:
+        pyarrow.Schema: The schema.
+    """
+    pa = _pyarrow()
+    settings = Iri2020()._computed(settings, variables)
+    f32 = pa.float32()
+
+    def field(name, dtype, units, long_name):
+        meta = {'long_name': long_name}
+        if units is not None:
+            meta['units'] = units
+        return pa.field(name, dtype, metadata=meta)
+
+    fields = [
+        field('point', pa.int64(), None, 'Point Index'),
+        field('time', pa.timestamp('us', tz='UTC'), None, 'Time'),
+        field('lat', f32, 'degrees', 'Latitude'),
+        field('lon', f32, 'degrees', 'Longitude'),
+        field('alt', f32, 'km', 'Altitude'),
+    ]
+    fields += [
+        field(name, f32, units, long_name)
+        for name, _, long_name, units, _ in _outputs(settings)
+    ]
+    for key in peaks:
+        oarr = OARR_FIELDS[key]
+        fields.append(field(key, f32, oarr.units, oarr.long_name))
+    return pa.schema(fields, metadata={
+        'settings': Iri2020().settings.to_json(),
+        'version': f'IRI-2020 v{__version__}',
+    })
+
+
+def record_batches(
+    times: Sequence[datetime] | np.ndarray,
+    lats: np.ndarray, lons: np.ndarray, alt: np.ndarray,
+    settings: Optional[Settings | ComputedSettings] = None,
+    *,
+    variables: Optional[Sequence[str]] = None,
+    peaks: Sequence[str] = PEAK_COLUMNS,
+    chunk: int = 1024,
+    start: int = 0,
+    tzaware: bool = False,
+) -> Iterator[Any]:
+    """Evaluate the IRI-2020 model at a number of points, as a stream of Arrow record batches.
+
+    Every batch holds the rows of `chunk` points, ordered by point and then
+    altitude. See :obj:`schema` for the columns.
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        lats (np.ndarray): Geographic latitudes.
+        lons (np.ndarray): Geographic longitudes.
+        alt (np.ndarray): Altitudes in kilometers, either common to all points (nalt,), or per point (npoints, nalt).
+        settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+        variables (Optional[Sequence[str]], optional): Output variables to compute. See :obj:`Iri2020.evaluate`. Defaults to None.
+        peaks (Sequence[str], optional): OARR parameters to include. Defaults to PEAK_COLUMNS.
+        chunk (int, optional): Number of points per record batch. Defaults to 1024.
+        start (int, optional): Index of the first point, used for the `point` column. Defaults to 0.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+        ValueError: If the point arrays do not have the same length.
+
+    Yields:
+        pyarrow.RecordBatch: Records of consecutive points.
+    """
+    pa = _pyarrow()
+    iri = Iri2020()
+    settings = iri._computed(settings, variables)
+    sch = schema(settings, peaks=peaks)
+    outputs = _outputs(settings)
+    time, lat, lon = np.broadcast_arrays(
+        utctimes(times, tzaware),
+        np.asarray(lats, dtype=np.float32),
+        np.asarray(lons, dtype=float) % 360,
+    )
+    if time.ndim != 1:
+        raise ValueError("Points must be one-dimensional arrays")
+    npts = len(time)
+    alt = np.asarray(alt, dtype=np.float32)
+    if alt.ndim == 1:
+        alt = np.broadcast_to(alt, (npts, len(alt)))
+    if alt.shape[0] != npts:
+        raise ValueError("Per point altitudes must have one row per point")
+    nalt = alt.shape[1]
+    index = [OARR_FIELDS[key] for key in peaks]
+    for lo in range(0, npts, chunk):
+        hi = min(lo + chunk, npts)
+        n = hi - lo
+        year, day, ut = iridates(time[lo:hi])
+        jf, oarr = settings.expand(n)
+        outf = iri._batchcall(
+            lat[lo:hi], lon[lo:hi].astype(np.float32), alt[lo:hi].T,
+            year, day, ut, jf, oarr, settings.logfile
+        )
+        columns = [
+            pa.array(np.repeat(np.arange(start + lo, start + hi, dtype=np.int64), nalt)),
+            pa.array(np.repeat(time[lo:hi], nalt), type=pa.timestamp('us', tz='UTC')),
+            pa.array(np.repeat(lat[lo:hi], nalt)),
+            pa.array(np.repeat(lon[lo:hi].astype(np.float32), nalt)),
+            pa.array(alt[lo:hi].ravel()),
+        ]
+        for _, idx, _, _, scale in outputs:
+            columns.append(pa.array((outf[idx].T * np.float32(scale)).ravel()))
+        for field in index:
+            columns.append(pa.array(np.repeat(
+                (oarr[field.index] * field.scale).astype(np.float32), nalt)))
+        yield pa.RecordBatch.from_arrays(columns, schema=sch)
+
+
+def write_parquet(
+    path: Path | str,
+    times: Sequence[datetime] | np.ndarray,
+    lats: np.ndarray, lons: np.ndarray, alt: np.ndarray,
+    settings: Optional[Settings | ComputedSettings] = None,
+    *,
+    variables: Optional[Sequence[str]] = None,
+    peaks: Sequence[str] = PEAK_COLUMNS,
+    chunk: int = 1024,
+    start: int = 0,
+    compression: str = 'zstd',
+    tzaware: bool = False,
+) -> int:
+    """Evaluate the IRI-2020 model at a number of points, and stream the results to a Parquet file.
+
+    Every chunk of points is written as a row group when it is evaluated,
+    so the memory use is bounded by `chunk`. See :obj:`record_batches`.
+
+    Args:
+        path (Path | str): Output file.
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        lats (np.ndarray): Geographic latitudes.
+        lons (np.ndarray): Geographic longitudes.
+        alt (np.ndarray): Altitudes in kilometers, (nalt,) or (npoints, nalt).
+        settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+        variables (Optional[Sequence[str]], optional): Output variables to compute. Defaults to None.
+        peaks (Sequence[str], optional): OARR parameters to include. Defaults to PEAK_COLUMNS.
+        chunk (int, optional): Number of points per row group. Defaults to 1024.
+        start (int, optional): Index of the first point. Defaults to 0.
+        compression (str, optional): Parquet compression codec. Defaults to 'zstd'.
+        tzaware (bool, optional): If times are time zone aware. Defaults to False.
+
+    Returns:
+        int: Number of rows written.
+    """
+    _pyarrow()
+    import pyarrow.parquet as pq
+    settings = Iri2020()._computed(settings, variables)
+    rows = 0
+    with pq.ParquetWriter(
+        str(path), schema(settings, peaks=peaks), compression=compression
+    ) as writer:
+        for batch in record_batches(
+            times, lats, lons, alt, settings,
+            peaks=peaks, chunk=chunk, start=start, tzaware=tzaware
+        ):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def write_arrow(
+    path: Path | str,
+    times: Sequence[datetime] | np.ndarray,
+    lats: np.ndarray, lons: np.ndarray, alt: np.ndarray,
+    settings: Optional[Settings | ComputedSettings] = None,
+    *,
+    variables: Optional[Sequence[str]] = None,
+    peaks: Sequence[str] = PEAK_COLUMNS,
+    chunk: int = 1024,
+    start: int = 0,
+    compression: Optional[str] = 'zstd',
+    tzaware: bool = False,
+) -> int:
+    """Evaluate the IRI-2020 model at a number of points, and stream the results to an Arrow IPC file.
+
+    See :obj:`write_parquet`.
+
+    Args:
+        path (Path | str): Output file.
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        lats (np.ndarray): Geographic latitudes.
+        lons (np.ndarray): Geographic longitudes.
+        alt (np.ndarray): Altitudes in kilometers, (nalt,) or (npoints, nalt).
+        settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+        variables (Optional[Sequence[str]], optional): Output variables to compute. Defaults to None.
+        peaks (Sequence[str], optional): OARR parameters to include. Defaults to PEAK_COLUMNS.
+        chunk (int, optional): Number of points per record batch. Defaults to 1024.
+        start (int, optional): Index of the first point. Defaults to 0.
+        compression (Optional[str], optional): Buffer compression, 'zstd', 'lz4' or None. Defaults to 'zstd'.
+        tzaware (bool, optional): If times are time zone aware. Defaults to False.
+
+    Returns:
+        int: Number of rows written.
+    """
+    pa = _pyarrow()
+    settings = Iri2020()._computed(settings, variables)
+    rows = 0
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_file(
+        sink, schema(settings, peaks=peaks), options=options
+    ) as writer:
+        for batch in record_batches(
+            times, lats, lons, alt, settings,
+            peaks=peaks, chunk=chunk, start=start, tzaware=tzaware
+        ):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
@@ -1,15 +1,10 @@
 # %% Imports
 from __future__ import annotations
 from pathlib import Path
-import ftplib
 from typing import Optional
 import warnings
-import requests
 from urllib.parse import urlparse
 from datetime import datetime, timedelta
-import socket
-import requests.exceptions
-import numpy as np
 import importlib.resources
 import logging
 
@@ -67,6 +62,8 @@ def download(url: str, fn: Path):
 
 
 def http_download(url: str, fn: Path):
+    import requests
+    import requests.exceptions
     if not fn.parent.is_dir():
         raise NotADirectoryError(fn.parent)
 
@@ -81,6 +78,8 @@ def http_download(url: str, fn: Path):
 
 
 def ftp_download(url: str, fn: Path):
+    import ftplib
+    import socket
 
     p = urlparse(url)
 
@@ -0,0 +1,301 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+from xarray import Dataset
+
+from .base import Iri2020
+from .settings import Settings, ComputedSettings
+from .utils import alt_grid, utctimes
+from . import __version__
+
+"""
+iri20py.field
+=============
+
+Electron density of one epoch over a region, for fast point queries (e.g.
+for ray tracing).
+
+The model is evaluated on a regular latitude-longitude mesh of profiles, and
+log(Ne) is interpolated between them with tensor product cubic Hermite
+(Catmull-Rom) or linear interpolation. The gradient is the derivative of the
+interpolant, so it is consistent with the interpolated density and, for the
+cubic interpolation, continuous.
+
+The model does not compute Ne below HNEA (65 km by day, 80 km by night), and
+these nodes are not interpolated: where the cubic stencil reaches one, the
+interpolation is linear, and where the linear one does, the density is NaN.
+"""
+
+# Points interpolated at a time.
+_CHUNK = 16384
+
+
+def _stencil(
+    x: np.ndarray, q: np.ndarray, cubic: bool, period: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Node indices, weights and derivative weights of the 1-D interpolation
+    # at `q`, each of shape (npts, 2) or (npts, 4). The Hermite slopes are
+    # finite differences over the neighbouring nodes, one-sided at the ends.
+    n = len(x)
+    if period is not None:
+        xs = np.concatenate([[x[-1] - period], x, [x[0] + period, x[1] + period]])
+        nodes = np.concatenate([[n - 1], np.arange(n), [0, 1]])
+        q = x[0] + (q - x[0]) % period
+    else:
+        xs = x
+        nodes = np.arange(n)
+    m = len(xs)
+    i = np.clip(np.searchsorted(xs, q, side='right') - 1, 0, m - 2)
+    h = xs[i + 1] - xs[i]
+    t = (q - xs[i]) / h
+    if not cubic:
+        idx = np.stack([i, i + 1], axis=-1)
+        w = np.stack([1 - t, t], axis=-1)
+        dw = np.stack([-1 / h, 1 / h], axis=-1)
+        return nodes[idx], w, dw
+    im1 = np.maximum(i - 1, 0)
+    ip2 = np.minimum(i + 2, m - 1)
+    a = h / (xs[i + 1] - xs[im1])
+    b = h / (xs[ip2] - xs[i])
+    t2 = t * t
+    t3 = t2 * t
+    h00, h10, h01, h11 = 2*t3 - 3*t2 + 1, t3 - 2*t2 + t, 3*t2 - 2*t3, t3 - t2
+    d00, d10, d01, d11 = 6*t2 - 6*t, 3*t2 - 4*t + 1, 6*t - 6*t2, 3*t2 - 2*t
+    idx = np.stack([im1, i, i + 1, ip2], axis=-1)
+    w = np.stack([-h10*a, h00 - h11*b, h01 + h10*a, h11*b], axis=-1)
+    dw = np.stack([-d10*a, d00 - d11*b, d01 + d10*a, d11*b], axis=-1) / h[:, None]
+    return nodes[idx], w, dw
+
+
+class IonosphereField:
+    """Electron density of one epoch over a region, for fast point queries.
+
+    The profiles of the mesh nodes are evaluated in one batch call (see
+    :obj:`Iri2020.evaluate_batch`). With `refine`, the mesh is subdivided,
+    and the profiles of the finer mesh are evaluated when a query needs
+    them, i.e. only where the field is queried.
+
+    Points outside the region or the altitude grid, or next to mesh nodes
+    where the model does not compute Ne, are NaN.
+
+    Attributes:
+        time (np.datetime64): Epoch (UTC).
+        lat (np.ndarray): Latitudes of the (refined) mesh, degrees.
+        lon (np.ndarray): Longitudes of the (refined) mesh, degrees.
+        alt (np.ndarray): Altitude grid, km.
+        settings (ComputedSettings): Settings used to evaluate the profiles.
+        periodic (bool): If the mesh covers all longitudes.
+    """
+
+    def __init__(
+        self,
+        time: datetime | np.datetime64,
+        lat: Tuple[float, float] = (-90.0, 90.0),
+        lon: Tuple[float, float] = (0.0, 360.0),
+        alt: Optional[np.ndarray] = None,
+        settings: Optional[Settings | ComputedSettings] = None,
+        *,
+        resolution: float | Tuple[float, float] = 2.0,
+        refine: int = 1,
+        cubic: bool = True,
+        tzaware: bool = False,
+    ):
+        """Evaluate the electron density on a mesh.
+
+        Args:
+            time (datetime | np.datetime64): Epoch.
+            lat (Tuple[float, float], optional): Latitude range of the region, degrees. Defaults to (-90.0, 90.0).
+            lon (Tuple[float, float], optional): Longitude range of the region, degrees. A range of 360 degrees wraps around. Defaults to (0.0, 360.0).
+            alt (Optional[np.ndarray], optional): Altitude grid of the profiles, km, increasing. Defaults to None, i.e. :obj:`iri20py.utils.alt_grid()`.
+            settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+            resolution (float | Tuple[float, float], optional): Latitude and longitude spacing of the mesh, degrees. The spacing is adjusted to fit the region. Defaults to 2.0.
+            refine (int, optional): Subdivision of the mesh, evaluated where the field is queried. Defaults to 1, i.e. all profiles are evaluated here.
+            cubic (bool, optional): Cubic Hermite interpolation, with a continuous gradient. Otherwise, linear interpolation. Defaults to True.
+            tzaware (bool, optional): If time is time zone aware. If true, `time` is recast to 'UTC'. Defaults to False.
+
+        Raises:
+            ValueError: If the region, the altitude grid, `resolution` or `refine` are invalid.
+            TypeError: If settings is not of type Settings or ComputedSettings.
+        """
+        self.time = utctimes(time, tzaware)[()]
+        dlat, dlon = np.broadcast_to(np.asarray(resolution, dtype=float), (2,))
+        if dlat <= 0 or dlon <= 0:
+            raise ValueError("resolution must be positive")
+        if int(refine) != refine or refine < 1:
+            raise ValueError("refine must be a positive integer")
+        refine = int(refine)
+        lat0, lat1 = float(lat[0]), float(lat[1])
+        if not (-90 <= lat0 < lat1 <= 90):
+            raise ValueError("Latitude range must be increasing, within [-90, 90]")
+        lon0, lon1 = float(lon[0]), float(lon[1])
+        if not (lon0 < lon1 <= lon0 + 360):
+            raise ValueError("Longitude range must be increasing, and at most 360 degrees")
+        if alt is None:
+            alt = alt_grid()
+        self.alt = np.asarray(alt, dtype=float)
+        if self.alt.ndim != 1 or len(self.alt) < 2 or np.any(np.diff(self.alt) <= 0):
+            raise ValueError("alt must be an increasing grid of at least two altitudes")
+        nlat = max(int(np.ceil((lat1 - lat0) / dlat - 1e-9)), 1)
+        self.lat = np.linspace(lat0, lat1, nlat*refine + 1)
+        self.periodic = lon1 - lon0 >= 360
+        if self.periodic:
+            nlon = max(int(np.ceil(360 / dlon - 1e-9)), 2)
+            self.lon = lon0 + np.arange(nlon*refine) * (360 / (nlon*refine))
+        else:
+            nlon = max(int(np.ceil((lon1 - lon0) / dlon - 1e-9)), 1)
+            self.lon = np.linspace(lon0, lon1, nlon*refine + 1)
+        self.cubic = cubic
+        self.refine = refine
+        self.settings = Iri2020()._computed(settings, ['Ne'])
+        # Profile of each mesh node, as a row of `_lne`; -1 if not evaluated.
+        self._index = np.full((len(self.lat), len(self.lon)), -1, dtype=np.int64)
+        self._lne = np.empty((0, len(self.alt)), dtype=float)
+        self._count = 0
+        ilat, ilon = np.meshgrid(
+            np.arange(0, len(self.lat), refine), np.arange(0, len(self.lon), refine),
+            indexing='ij'
+        )
+        self._evaluate(ilat.ravel(), ilon.ravel())
+
+    @property
+    def evaluated(self) -> int:
+        """Number of evaluated profiles."""
+        return self._count
+
+    def _evaluate(self, ilat: np.ndarray, ilon: np.ndarray):
+        # Evaluate the profiles of the given mesh nodes in one call.
+        if len(ilat) == 0:
+            return
+        npts = len(ilat)
+        _, ds = Iri2020().evaluate_batch(
+            np.full(npts, self.time), self.lat[ilat], self.lon[ilon] % 360,
+            self.alt, self.settings
+        )
+        count = self._count + npts
+        if count > len(self._lne):  # grow geometrically for repeated lazy evaluations
+            lne = np.empty((max(count, 2*len(self._lne)), len(self.alt)), dtype=float)
+            lne[:self._count] = self._lne[:self._count]
+            self._lne = lne
+        ne = ds.Ne.values
+        # NaN at the fill value of the model
+        self._lne[self._count:count] = np.log(np.where(ne > 0, ne, np.nan))
+        self._index[ilat, ilon] = self._count + np.arange(npts)
+        self._count = count
+
+    def _nodes(self, ilat: np.ndarray, ilon: np.ndarray) -> np.ndarray:
+        # Profile rows of the stencil nodes, evaluating the missing ones.
+        node = self._index[ilat[:, :, None], ilon[:, None, :]]
+        missing = node < 0
+        if np.any(missing):
+            keys = np.unique(
+                np.stack(np.broadcast_arrays(ilat[:, :, None], ilon[:, None, :]), axis=-1)[missing],
+                axis=0)
+            self._evaluate(keys[:, 0], keys[:, 1])
+            node = self._index[ilat[:, :, None], ilon[:, None, :]]
+        return node
+
+    def _query(self, lat: np.ndarray, lon: np.ndarray, alt: np.ndarray, gradient: bool) -> Tuple[np.ndarray, ...]:
+        lat, lon, alt = np.broadcast_arrays(
+            np.asarray(lat, dtype=float), np.asarray(lon, dtype=float),
+            np.asarray(alt, dtype=float))
+        shape = lat.shape
+        lat, lon, alt = lat.ravel(), lon.ravel(), alt.ravel()
+        out = [np.full(lat.shape, np.nan) for _ in range(4 if gradient else 1)]
+        inside = (lat >= self.lat[0]) & (lat <= self.lat[-1]) & \
+            (alt >= self.alt[0]) & (alt <= self.alt[-1])
+        if not self.periodic:
+            lon = self.lon[0] + (lon - self.lon[0]) % 360
+            inside &= lon <= self.lon[-1]
+        points = np.flatnonzero(inside)
+        for start in range(0, len(points), _CHUNK):
+            sel = points[start:start + _CHUNK]
+            values = self._interpolate(lat[sel], lon[sel], alt[sel], self.cubic, gradient)
+            for x, value in zip(out, values):
+                x[sel] = value
+            # Linear interpolation where the cubic stencil reaches a fill value
+            fill = sel[np.isnan(values[0])]
+            if self.cubic and len(fill):
+                values = self._interpolate(lat[fill], lon[fill], alt[fill], False, gradient)
+                for x, value in zip(out, values):
+                    x[fill] = value
+        return tuple(x.reshape(shape) for x in out)
+
+    def _interpolate(self, lat: np.ndarray, lon: np.ndarray, alt: np.ndarray, cubic: bool, gradient: bool) -> Tuple[np.ndarray, ...]:
+        # Density (and gradient) at points inside the mesh.
+        period = 360.0 if self.periodic else None
+        ilat, wlat, dlat = _stencil(self.lat, lat, cubic)
+        ilon, wlon, dlon = _stencil(self.lon, lon, cubic, period)
+        ialt, walt, dalt = _stencil(self.alt, alt, cubic)
+        node = self._nodes(ilat, ilon)
+        lne = self._lne[node[..., None], ialt[:, None, None, :]]
+        # Contract the altitude, then the longitude and latitude axes.
+        col = np.einsum('nijk,nk->nij', lne, walt)
+        row = np.einsum('nij,nj->ni', col, wlon)
+        ne = np.exp(np.einsum('ni,ni->n', row, wlat))
+        if not gradient:
+            return (ne,)
+        return (
+            ne,
+            ne * np.einsum('ni,ni->n', row, dlat),
+            ne * np.einsum('nij,nj,ni->n', col, dlon, wlat),
+            ne * np.einsum('nijk,nk,nj,ni->n', lne, dalt, wlon, wlat, optimize=True),
+        )
+
+    def __call__(self, lat: np.ndarray, lon: np.ndarray, alt: np.ndarray) -> np.ndarray:
+        """Electron density at a number of points.
+
+        The inputs are broadcast against each other.
+
+        Args:
+            lat (np.ndarray): Geographic latitudes, degrees.
+            lon (np.ndarray): Geographic longitudes, degrees.
+            alt (np.ndarray): Altitudes, km.
+
+        Returns:
+            np.ndarray: Electron density (cm^-3). NaN where it is not defined (see :obj:`IonosphereField`).
+        """
+        return self._query(lat, lon, alt, False)[0]
+
+    def gradient(self, lat: np.ndarray, lon: np.ndarray, alt: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Electron density and its gradient at a number of points.
+
+        The inputs are broadcast against each other. The gradient is the
+        derivative of the interpolated density.
+
+        Args:
+            lat (np.ndarray): Geographic latitudes, degrees.
+            lon (np.ndarray): Geographic longitudes, degrees.
+            alt (np.ndarray): Altitudes, km.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Electron density (cm^-3), and its derivatives with respect to latitude (cm^-3/degree), longitude (cm^-3/degree) and altitude (cm^-3/km).
+        """
+        return self._query(lat, lon, alt, True)  # type: ignore
+
+    def to_dataset(self) -> Dataset:
+        """Electron density of the mesh nodes. Nodes that are not evaluated, or below HNEA, are NaN.
+
+        Returns:
+            Dataset: Dataset with dimensions (`lat`, `lon`, `alt_km`).
+        """
+        ne = np.full(self._index.shape + (len(self.alt),), np.nan)
+        done = self._index >= 0
+        ne[done] = np.exp(self._lne[self._index[done]])
+        ds = Dataset()
+        ds.coords['lat'] = (('lat',), self.lat, {
+                            'units': 'degrees', 'long_name': 'Latitude'})
+        ds.coords['lon'] = (('lon',), self.lon % 360, {
+                            'units': 'degrees', 'long_name': 'Longitude'})
+        ds.coords['alt_km'] = (('alt_km',), self.alt.copy(), {
+                               'units': 'km', 'long_name': 'Altitude'})
+        ds['Ne'] = (('lat', 'lon', 'alt_km'), ne, {
+                    'units': 'cm^-3', 'long_name': 'Electron Density'})
+        ds.attrs['description'] = 'IRI 2020 electron density field'
+        ds.attrs['date'] = str(self.time)
+        ds.attrs['evaluated'] = self.evaluated
+        ds.attrs['settings'] = Iri2020().settings.to_json()
+        ds.attrs['version'] = f'IRI-2020 v{__version__}'
+        return ds
@@ -0,0 +1,296 @@
+# %%
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from .utils import utctimes
+
+"""
+iri20py.indices
+===============
+
+Solar and geomagnetic indices of the IRI-2020 model data files.
+
+The index files `apf107.dat` (daily F10.7, 3-hour and daily Ap) and
+`ig_rz.dat` (monthly IG12 and Rz12) are parsed into NumPy arrays as the
+model does (`readapf107`, `read_ig_rz`), and the lookups reproduce those
+of the model (`APF_ONLY`, `APF`, `ckp` and `tcon`) for arrays of times.
+Values for dates not covered by the files are NaN.
+"""
+
+DATADIR = (Path(__file__).parent / "data").resolve()
+
+APF107_START = np.datetime64('1958-01-01', 'D')
+
+# Ap to Kp conversion table of `ckp`
+_AP = np.array([0, 2, 3, 4, 5, 6, 7, 9, 12, 15, 18, 22, 27, 32, 39, 48, 56, 67,
+                80, 94, 111, 132, 154, 179, 207, 236, 300, 400])
+_KP = np.arange(28) / 3.0
+
+
+@dataclass(frozen=True)
+class Apf107:
+    """Contents of `apf107.dat`, one entry per day.
+
+    Attributes:
+        date (np.ndarray): Dates (`datetime64[D]`).
+        ap (np.ndarray): 3-hour Ap indices for the UT intervals [0, 3), [3, 6), ..., [21, 24), (ndays, 8).
+        ap_daily (np.ndarray): Daily Ap index.
+        f107 (np.ndarray): Daily F10.7 (sfu, adjusted to 1 AU).
+        f107_81 (np.ndarray): 81-day centered average of F10.7 (sfu).
+        f107_365 (np.ndarray): 365-day centered average of F10.7 (sfu).
+    """
+    date: np.ndarray
+    ap: np.ndarray
+    ap_daily: np.ndarray
+    f107: np.ndarray
+    f107_81: np.ndarray
+    f107_365: np.ndarray
+
+
+@dataclass(frozen=True)
+class IgRz:
+    """Contents of `ig_rz.dat`, one entry per month.
+
+    Attributes:
+        month (np.ndarray): Months (`datetime64[M]`).
+        ig12 (np.ndarray): 12-month running mean of the IG index.
+        rz12 (np.ndarray): 12-month running mean of the sunspot number (scaled by 0.7 from 2014 for the new sunspot number).
+        updated (np.datetime64): Date of the last update of the file; later values are predictions.
+    """
+    month: np.ndarray
+    ig12: np.ndarray
+    rz12: np.ndarray
+    updated: np.datetime64
+
+
+def _check(path: Path | str, name: str):
+    # The model refreshes its data files before reading them; do the same so
+    # that the lookups see the indices the model uses.
+    if Path(path).resolve() == DATADIR / name:
+        from .download import check_files
+        check_files()
+
+
+@lru_cache(maxsize=None)
+def apf107(path: Path | str = DATADIR / 'apf107.dat') -> Apf107:
+    """Parse `apf107.dat`. The result is cached; see `apf107.cache_clear()`.
+
+    Args:
+        path (Path | str, optional): File to read. Defaults to the file of the model, which is first updated as by :obj:`iri20py.Iri2020` (see :obj:`iri20py.check_files`).
+
+    Returns:
+        Apf107: The index table.
+    """
+    _check(path, 'apf107.dat')
+    with open(path, 'rb') as fd:
+        lines = [line for line in fd.read().splitlines() if len(line) >= 54]
+    # Fixed format (3I3, 9I3, I3, 3F5.1): one row of characters per line
+    chars = np.array(lines, dtype='S54').view('S1').reshape(len(lines), 54)
+
+    def field(start: int, stop: int) -> np.ndarray:
+        return chars[:, start:stop].copy().view(f'S{stop - start}').ravel()
+
+    ap = np.stack([field(9 + 3*i, 12 + 3*i).astype(np.int32)
+                   for i in range(8)], axis=1)
+    f107 = field(39, 44).astype(np.float32)
+    f107_81 = field(44, 49).astype(np.float32)
+    f107_365 = field(49, 54).astype(np.float32)
+    f107_81 = np.where(f107_81 < -4, f107, f107_81)
+    f107_365 = np.where(f107_365 < -4, f107, f107_365)
+    return Apf107(
+        date=APF107_START + np.arange(len(lines)),
+        ap=ap,
+        ap_daily=field(33, 36).astype(np.int32),
+        f107=f107,
+        f107_81=f107_81,
+        f107_365=f107_365,
+    )
+
+
+@lru_cache(maxsize=None)
+def ig_rz(path: Path | str = DATADIR / 'ig_rz.dat') -> IgRz:
+    """Parse `ig_rz.dat`. The result is cached; see `ig_rz.cache_clear()`.
+
+    Args:
+        path (Path | str, optional): File to read. Defaults to the file of the model, which is first updated as by :obj:`iri20py.Iri2020` (see :obj:`iri20py.check_files`).
+
+    Returns:
+        IgRz: The index table, starting at the month before the first month of the file.
+    """
+    _check(path, 'ig_rz.dat')
+    with open(path) as fd:
+        values = [float(x) for x in re.split(r'[,\s]+', fd.read()) if x]
+    upm, upd, upy, imst, iyst, imend, iyend = (int(x) for x in values[:7])
+    num = 3 - imst + (iyend - iyst)*12 + imend
+    ig12 = np.asarray(values[7:7 + num], dtype=np.float32)
+    rz12 = np.asarray(values[7 + num:7 + 2*num], dtype=np.float32)
+    if upy*100 + upm > 201609:
+        # new sunspot number from January 2014
+        start = 2 - imst + (2014 - iyst)*12
+        rz12[start:] *= np.float32(0.7)
+    first = np.datetime64(f'{iyst:04d}-{imst:02d}', 'M') - 1
+    return IgRz(
+        month=first + np.arange(num),
+        ig12=ig12,
+        rz12=rz12,
+        updated=np.datetime64(f'{upy:04d}-{upm:02d}-{upd:02d}', 'D'),
+    )
+
+
+def _day_index(time: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Row of the day in `apf107.dat`, and whether it is covered.
+    idx = (time.astype('datetime64[D]') - APF107_START).astype(np.int64)
+    valid = (idx >= 0) & (idx < len(apf107().date))
+    return np.where(valid, idx, 0), valid
+
+
+def f107(times: Sequence[datetime] | np.ndarray, *, tzaware: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Daily, 81-day and 365-day F10.7 (sfu) of the given times, as used by the model.
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Daily, 81-day and 365-day F10.7.
+    """
+    table = apf107()
+    idx, valid = _day_index(utctimes(times, tzaware))
+    return tuple(
+        np.where(valid, values[idx], np.nan)
+        for values in (table.f107, table.f107_81, table.f107_365)
+    )
+
+
+def ap(times: Sequence[datetime] | np.ndarray, *, tzaware: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """3-hour and daily Ap indices of the given times.
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 3-hour Ap of the UT interval of each time, and the daily Ap. Missing values are NaN.
+    """
+    table = apf107()
+    time = utctimes(times, tzaware)
+    idx, valid = _day_index(time)
+    hour = (time - time.astype('datetime64[D]')).astype('timedelta64[h]').astype(np.int64)
+    ap3 = table.ap[idx, np.minimum(hour // 3, 7)].astype(float)
+    daily = table.ap_daily[idx].astype(float)
+    ap3[~valid | (ap3 < 0)] = np.nan
+    daily[~valid | (daily < 0)] = np.nan
+    return ap3, daily
+
+
+def ap_to_kp(ap: np.ndarray) -> np.ndarray:
+    """Convert 3-hour Ap indices to Kp indices, as the model does (`ckp`).
+
+    Args:
+        ap (np.ndarray): Ap indices.
+
+    Returns:
+        np.ndarray: Kp indices.
+    """
+    ap = np.asarray(ap, dtype=float)
+    kp = np.interp(np.log(np.maximum(ap, 1)), np.log(_AP[6:]), _KP[6:])
+    small = np.clip(np.nan_to_num(ap), 0, 7).astype(int)
+    kp = np.where(ap < 8, _KP[np.maximum(small - 1, 0)], kp)
+    kp = np.where(ap == 1, _KP[1] / 2, kp)
+    kp = np.where(ap == 0, 0.0, kp)
+    return np.where(np.isnan(ap), np.nan, kp)
+
+
+def kp(times: Sequence[datetime] | np.ndarray, *, tzaware: bool = False) -> np.ndarray:
+    """Kp index of the given times, converted from the 3-hour Ap index.
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Returns:
+        np.ndarray: Kp indices. Missing values are NaN.
+    """
+    return ap_to_kp(ap(times, tzaware=tzaware)[0])
+
+
+def _monthly(times: Sequence[datetime] | np.ndarray, tzaware: bool) -> Tuple[np.ndarray, np.ndarray]:
+    # IG12 and Rz12, interpolated between the middle of the months (`tcon`).
+    table = ig_rz()
+    day = utctimes(times, tzaware).astype('datetime64[D]')
+    month = day.astype('datetime64[M]')
+    # the middle of a month is the 15th (14th in February)
+    def middle(m): return m.astype('datetime64[D]') + np.where(
+        m.astype(np.int64) % 12 == 1, 13, 14)
+    mid1 = middle(month)
+    after = day >= mid1
+    other = np.where(after, month + 1, month - 1)
+    mid2 = middle(other)
+    idx1 = (month - table.month[0]).astype(np.int64)
+    idx2 = (other - table.month[0]).astype(np.int64)
+    valid = (idx1 >= 1) & (idx1 < len(table.month) - 1)
+    idx1 = np.where(valid, idx1, 1)
+    idx2 = np.where(valid, idx2, 1)
+    d = (day - mid1).astype(np.float32)
+    d2 = (mid2 - mid1).astype(np.float32)
+    rsn = np.where(after, d / d2, (d - d2) / -d2).astype(np.float32)
+    out = []
+    for values in (table.ig12, table.rz12):
+        v1, v2 = values[idx1], values[idx2]
+        value = np.where(after, v1 + (v2 - v1)*rsn, v2 + (v1 - v2)*rsn)
+        out.append(np.where(valid, value, np.nan))
+    return out[0], out[1]
+
+
+def ig12(times: Sequence[datetime] | np.ndarray, *, tzaware: bool = False) -> np.ndarray:
+    """12-month running mean IG index of the given times, interpolated between the months.
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Returns:
+        np.ndarray: IG12 index.
+    """
+    return _monthly(times, tzaware)[0]
+
+
+def rz12(times: Sequence[datetime] | np.ndarray, *, tzaware: bool = False) -> np.ndarray:
+    """12-month running mean sunspot number of the given times, interpolated between the months.
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Returns:
+        np.ndarray: Rz12 index.
+    """
+    return _monthly(times, tzaware)[1]
+
+
+def lookup(times: Sequence[datetime] | np.ndarray, *, tzaware: bool = False) -> Dict[str, np.ndarray]:
+    """All indices of the given times, named as the OARR parameters (see :obj:`iri20py.base.OARR_FIELDS`).
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Returns:
+        Dict[str, np.ndarray]: `F10.7`, `F10.7_81`, `F10.7_365`, `ap`, `ap_daily`, `kp`, `RZ12` and `IG12`.
+    """
+    time = utctimes(times, tzaware)
+    daily, mean, year = f107(time)
+    ap3, apd = ap(time)
+    ig, rz = _monthly(time, False)
+    return {
+        'F10.7': daily, 'F10.7_81': mean, 'F10.7_365': year,
+        'ap': ap3, 'ap_daily': apd, 'kp': ap_to_kp(ap3),
+        'RZ12': rz, 'IG12': ig,
+    }
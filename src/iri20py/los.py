@@ -0,0 +1,252 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from xarray import Dataset
+
+from .base import Iri2020
+from .settings import Settings, ComputedSettings
+from .utils import utctimes
+from . import __version__
+
+"""
+iri20py.los
+================
+
+This module provides slant total electron content (TEC) along receiver to
+satellite lines of sight.
+"""
+
+# WGS-84 ellipsoid
+WGS84_A = 6378.137  # km
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+WGS84_EP2 = WGS84_E2 / (1 - WGS84_E2)
+
+TECU = 1e16  # electrons/m^2
+
+
+def geodetic_to_ecef(lat: np.ndarray, lon: np.ndarray, alt: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convert geodetic (WGS-84) coordinates to Earth-centered, Earth-fixed coordinates.
+
+    Args:
+        lat (np.ndarray): Geodetic latitude in degrees.
+        lon (np.ndarray): Longitude in degrees.
+        alt (np.ndarray): Altitude in kilometers.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: ECEF x, y and z in kilometers.
+    """
+    lat = np.deg2rad(lat)
+    lon = np.deg2rad(lon)
+    slat = np.sin(lat)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * slat**2)
+    x = (n + alt) * np.cos(lat) * np.cos(lon)
+    y = (n + alt) * np.cos(lat) * np.sin(lon)
+    z = (n * (1 - WGS84_E2) + alt) * slat
+    return (x, y, z)
+
+
+def ecef_to_geodetic(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convert Earth-centered, Earth-fixed coordinates to geodetic (WGS-84) coordinates,
+    using Bowring's method.
+
+    Args:
+        x (np.ndarray): ECEF x in kilometers.
+        y (np.ndarray): ECEF y in kilometers.
+        z (np.ndarray): ECEF z in kilometers.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Geodetic latitude (degrees), longitude (degrees, 0-360) and altitude (km).
+    """
+    p = np.hypot(x, y)
+    theta = np.arctan2(z * WGS84_A, p * WGS84_B)
+    lat = np.arctan2(
+        z + WGS84_EP2 * WGS84_B * np.sin(theta)**3,
+        p - WGS84_E2 * WGS84_A * np.cos(theta)**3
+    )
+    slat = np.sin(lat)
+    alt = p * np.cos(lat) + z * slat - \
+        WGS84_A * np.sqrt(1 - WGS84_E2 * slat**2)
+    lon = np.rad2deg(np.arctan2(y, x)) % 360
+    return (np.rad2deg(lat), lon, alt)
+
+
+def _up(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    # Local vertical (ellipsoid normal), shape (..., 3)
+    lat = np.deg2rad(lat)
+    lon = np.deg2rad(lon)
+    return np.stack([
+        np.cos(lat) * np.cos(lon),
+        np.cos(lat) * np.sin(lon),
+        np.sin(lat),
+    ], axis=-1)
+
+
+def _sphere(r: np.ndarray, u: np.ndarray, radius: float | np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Distances along r + s*u (|u| = 1) where the ray crosses a sphere.
+    b = np.sum(r * u, axis=-1)
+    c = np.sum(r * r, axis=-1) - radius**2
+    disc = np.sqrt(np.maximum(b**2 - c, 0))
+    miss = b**2 < c
+    s0 = np.where(miss, np.nan, -b - disc)
+    s1 = np.where(miss, np.nan, -b + disc)
+    return (s0, s1)
+
+
+def slant_tec(
+    times: Sequence[datetime] | np.ndarray,
+    receivers: np.ndarray, satellites: np.ndarray,
+    settings: Optional[Settings | ComputedSettings] = None,
+    *,
+    ecef: bool = False,
+    step: float = 5.0,
+    hmin: float = 60.0,
+    hmax: float = 2000.0,
+    hpierce: float = 350.0,
+    alt: Optional[np.ndarray] = None,
+    resolution: Optional[float] = 1.0,
+    time_resolution: Optional[float] = 300.0,
+    tzaware: bool = False,
+) -> Dataset:
+    """Integrate the IRI-2020 electron density along receiver to satellite lines of sight.
+
+    Every ray is sampled at (about) `step` kilometer intervals between the
+    altitudes `hmin` and `hmax`, and integrated using the midpoint rule. The
+    electron density at a sample is interpolated from the profile of its
+    column: the samples are binned into columns of `resolution` degrees and
+    `time_resolution` seconds, and all rays share the profiles of the
+    columns they pass through. All profiles are evaluated in one batch call
+    (see :obj:`Iri2020.evaluate_batch`).
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array, one per ray.
+        receivers (np.ndarray): Receiver positions, shape (`ray`, 3). Geodetic latitude (degrees), longitude (degrees) and altitude (km), or ECEF x, y and z (km) if `ecef` is set.
+        satellites (np.ndarray): Satellite positions, shape (`ray`, 3), in the same frame as `receivers`.
+        settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+        ecef (bool, optional): Positions are ECEF coordinates. Defaults to False.
+        step (float, optional): Integration step along the ray in kilometers. Defaults to 5.0.
+        hmin (float, optional): Lower altitude bound of the integration in kilometers. Defaults to 60.0.
+        hmax (float, optional): Upper altitude bound of the integration in kilometers. Defaults to 2000.0.
+        hpierce (float, optional): Altitude of the ionospheric piercing point (thin shell) in kilometers. Defaults to 350.0.
+        alt (Optional[np.ndarray], optional): Altitude grid of the column profiles in kilometers. Defaults to None, i.e. `step` spacing from `hmin` to `hmax`.
+        resolution (Optional[float], optional): Latitude and longitude size of the columns in degrees. If None, every sample has its own column. Defaults to 1.0.
+        time_resolution (Optional[float], optional): Time bin of the columns in seconds. If None, the ray times are used. Defaults to 300.0.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Raises:
+        ValueError: If the positions are not of shape (`ray`, 3), or `step` is not positive.
+
+    Returns:
+        Dataset: Dataset with dimension `ray`, containing the slant TEC (`stec`), the vertical TEC at the piercing point (`vtec`, thin shell mapping), the elevation and azimuth of the satellite at the receiver, and the piercing point location.
+    """
+    if step <= 0:
+        raise ValueError("step must be positive")
+    times = utctimes(times, tzaware)
+    receivers = np.atleast_2d(np.asarray(receivers, dtype=float))
+    satellites = np.atleast_2d(np.asarray(satellites, dtype=float))
+    if receivers.shape[-1] != 3 or satellites.shape[-1] != 3:
+        raise ValueError("Positions must be of shape (ray, 3)")
+    times, _ = np.broadcast_arrays(times, receivers[:, 0])
+    receivers, satellites = np.broadcast_arrays(receivers, satellites)
+    if not ecef:
+        receivers = np.stack(geodetic_to_ecef(*receivers.T), axis=-1)
+        satellites = np.stack(geodetic_to_ecef(*satellites.T), axis=-1)
+    nray = len(receivers)
+
+    # Line of sight geometry at the receiver
+    length = np.linalg.norm(satellites - receivers, axis=-1)
+    u = (satellites - receivers) / length[:, None]
+    rlat, rlon, _ = ecef_to_geodetic(*receivers.T)
+    up = _up(rlat, rlon)
+    east = np.stack(
+        [-np.sin(np.deg2rad(rlon)), np.cos(np.deg2rad(rlon)), np.zeros(nray)], axis=-1)
+    north = np.cross(up, east)
+    elevation = np.rad2deg(np.arcsin(np.clip(np.sum(u * up, axis=-1), -1, 1)))
+    azimuth = np.rad2deg(np.arctan2(
+        np.sum(u * east, axis=-1), np.sum(u * north, axis=-1))) % 360
+
+    # Part of each ray within the (conservative) shell of the ionosphere
+    s0, s1 = _sphere(receivers, u, WGS84_A + hmax)
+    start = np.clip(np.nan_to_num(s0, nan=0), 0, length)
+    stop = np.clip(np.nan_to_num(s1, nan=0), 0, length)
+    nstep = np.ceil((stop - start) / step).astype(int)
+    ds_ray = np.where(nstep > 0, (stop - start) / np.maximum(nstep, 1), 0)
+    ray = np.repeat(np.arange(nray), nstep)
+    k = np.arange(len(ray)) - np.repeat(np.cumsum(nstep) - nstep, nstep)
+    s = start[ray] + (k + 0.5) * ds_ray[ray]
+    pos = receivers[ray] + s[:, None] * u[ray]
+    lat, lon, height = ecef_to_geodetic(*pos.T)
+    inside = (height >= hmin) & (height <= hmax)
+    ray, lat, lon, height = ray[inside], lat[inside], lon[inside], height[inside]
+
+    # Columns shared between samples and rays
+    t = times[ray].astype(np.int64)  # microseconds
+    if time_resolution is not None:
+        dt = int(time_resolution * 1e6)
+        t = np.round(t / dt).astype(np.int64) * dt
+    if resolution is not None:
+        # Columns of the poles are not centred beyond them.
+        clat = np.clip(np.round(lat / resolution) * resolution, -90, 90)
+        clon = (np.round(lon / resolution) % np.round(360 / resolution)) * resolution
+    else:
+        clat, clon = lat, lon
+    keys, column = np.unique(
+        np.column_stack([t, clat, clon]), axis=0, return_inverse=True)
+    column = column.ravel()
+    ctime = keys[:, 0].astype(np.int64).astype('datetime64[us]')
+    if alt is None:
+        alt = np.arange(hmin, hmax + step, step)
+    alt = np.asarray(alt, dtype=float)
+
+    if len(keys):
+        _, profiles = Iri2020().evaluate_batch(
+            ctime, keys[:, 1], keys[:, 2], alt, settings, variables=['Ne'])
+        ne = np.clip(profiles.Ne.values, 0, None) * 1e6  # m^-3
+    else:
+        # No ray crosses the ionosphere: the TEC is zero.
+        ne = np.zeros((0, len(alt)))
+    idx = np.clip(np.searchsorted(alt, height) - 1, 0, len(alt) - 2)
+    w = np.clip((height - alt[idx]) / (alt[idx + 1] - alt[idx]), 0, 1)
+    nes = ne[column, idx] * (1 - w) + ne[column, idx + 1] * w
+    stec = np.bincount(
+        ray, weights=nes * ds_ray[ray] * 1e3, minlength=nray) / TECU
+
+    # Piercing point: refine the spherical shell crossing to the geodetic altitude
+    surface = np.stack(geodetic_to_ecef(rlat, rlon, 0), axis=-1)
+    _, spierce = _sphere(
+        receivers, u, np.linalg.norm(surface, axis=-1) + hpierce)
+    spierce = np.where((spierce >= 0) & (spierce <= length), spierce, np.nan)
+    for _ in range(3):
+        plat, plon, pheight = ecef_to_geodetic(
+            *(receivers + spierce[:, None] * u).T)
+        sin_el = np.sum(u * _up(plat, plon), axis=-1)
+        spierce = spierce + (hpierce - pheight) / sin_el
+    plat, plon, _ = ecef_to_geodetic(*(receivers + spierce[:, None] * u).T)
+    cos_zenith = np.sum(u * _up(plat, plon), axis=-1)
+
+    out = Dataset()
+    out.coords['time'] = (('ray',), times.astype('datetime64[ns]'))
+    out['stec'] = (('ray',), stec, {
+        'units': 'TECU', 'long_name': 'Slant Total Electron Content'})
+    out['vtec'] = (('ray',), stec * cos_zenith, {
+        'units': 'TECU', 'long_name': 'Vertical Total Electron Content',
+        'description': 'Slant TEC mapped to the vertical at the piercing point (thin shell)'})
+    out['elevation'] = (('ray',), elevation, {
+        'units': 'degrees', 'long_name': 'Elevation'})
+    out['azimuth'] = (('ray',), azimuth, {
+        'units': 'degrees', 'long_name': 'Azimuth'})
+    out['ipp_lat'] = (('ray',), plat, {
+        'units': 'degrees', 'long_name': 'Piercing Point Latitude'})
+    out['ipp_lon'] = (('ray',), plon, {
+        'units': 'degrees', 'long_name': 'Piercing Point Longitude'})
+    out.attrs['description'] = 'IRI 2020 slant TEC'
+    out.attrs['hpierce'] = hpierce
+    out.attrs['step'] = step
+    out.attrs['columns'] = len(keys)
+    out.attrs['settings'] = Iri2020().settings.to_json()
+    out.attrs['version'] = f'IRI-2020 v{__version__}'
+    return out
@@ -0,0 +1,117 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+from xarray import Dataset
+
+from .iri20shim import iri20_magnetic  # type: ignore
+from .base import DATADIR, OARR_FIELDS
+from .utils import iridates, utctimes
+from . import __version__
+
+"""
+iri20py.magnetic
+================
+
+Geomagnetic coordinates used by the IRI-2020 model, without evaluating
+the ionosphere.
+
+The quantities are computed by the IGRF routines of the model: `IGRF_DIP`
+(dip, declination, dip latitude and modified dip latitude), `SHELLG`
+(McIlwain L-value and field strength), `GEODIP` (centered dipole
+coordinates) and `GEOCGM01` (corrected geomagnetic coordinates).
+"""
+
+# name, OUTF row, attributes
+_OUTPUTS = [
+    ('dip', 0, OARR_FIELDS['dip']),
+    ('declination', 1, OARR_FIELDS['declination']),
+    ('dip-lat', 2, OARR_FIELDS['dip-lat']),
+    ('dip-lat-mod', 3, OARR_FIELDS['dip-lat-mod']),
+    ('L-value', 4, OARR_FIELDS['L-value']),
+    ('B', 5, None),
+    ('L-code', 6, None),
+    ('geomag_lat', 7, OARR_FIELDS['geomag_lat']),
+    ('geomag_lon', 8, OARR_FIELDS['geomag_lon']),
+    ('cgm_lat', 9, OARR_FIELDS['cgm_lat']),
+    ('cgm_lon', 10, OARR_FIELDS['cgm_lon']),
+    ('cgm_mlt', 11, OARR_FIELDS['cgm_mlt']),
+]
+_CGM = ('cgm_lat', 'cgm_lon', 'cgm_mlt')
+
+
+def magnetic_coordinates(
+    times: Sequence[datetime] | np.ndarray,
+    lats: np.ndarray, lons: np.ndarray, alts: np.ndarray | float = 300.0,
+    *,
+    cgm: bool = False,
+    tzaware: bool = False,
+) -> Dataset:
+    """Compute the geomagnetic coordinates of a number of points.
+
+    The inputs are broadcast against each other. The output dimensions are
+    (`point`,) for one-dimensional inputs, and (`dim_0`, `dim_1`, ...) for
+    others. The IGRF coefficients are loaded once per distinct day.
+
+    The model evaluates the dip, declination and modified dip latitude at
+    300 km, the L-value at 600 km with the default settings (110 or 1000 km,
+    depending on the electron and ion temperature models; limited to 10),
+    and the CGM coordinates at the center of the altitude grid. Use the same
+    altitudes to reproduce the OARR outputs.
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        lats (np.ndarray): Geographic latitudes.
+        lons (np.ndarray): Geographic longitudes.
+        alts (np.ndarray | float, optional): Altitudes in kilometers. Defaults to 300.0.
+        cgm (bool, optional): Compute the corrected geomagnetic coordinates. Tracing the field lines costs more than a full profile (see :obj:`iri20py.settings.Settings.cgm_compute`). Defaults to False.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Returns:
+        Dataset: Dataset with variables `dip`, `declination`, `dip-lat`, `dip-lat-mod` (modip), `L-value`, `B` (field strength), `L-code` (see `SHELLG`), `geomag_lat`, `geomag_lon` and, if `cgm`, `cgm_lat`, `cgm_lon` and `cgm_mlt`.
+    """
+    time, lat, lon, alt = np.broadcast_arrays(
+        utctimes(times, tzaware),
+        np.asarray(lats, dtype=np.float32),
+        np.asarray(lons, dtype=float) % 360,
+        np.asarray(alts, dtype=np.float32),
+    )
+    shape = time.shape
+    dims = ('point',) if len(shape) == 1 else tuple(
+        f'dim_{i}' for i in range(len(shape)))
+    year, day, ut = iridates(time.ravel())
+    # Sort by date, so that the IGRF coefficients are loaded once per day.
+    order = np.lexsort((day, year))
+    out = np.empty((12, len(order)), dtype=np.float32)
+    out[:, order] = iri20_magnetic(
+        lat.ravel()[order], lon.ravel()[order].astype(np.float32),
+        alt.ravel()[order], year[order], day[order],
+        (ut[order] / 3600.0).astype(np.float32), cgm, str(DATADIR)
+    )
+    ds = Dataset()
+    ds.coords['time'] = (dims, time.astype('datetime64[ns]'))
+    ds.coords['lat'] = (dims, lat.astype(float), {
+                        'units': 'degrees', 'long_name': 'Latitude'})
+    ds.coords['lon'] = (dims, lon, {
+                        'units': 'degrees', 'long_name': 'Longitude'})
+    ds.coords['alt_km'] = (dims, alt.astype(float), {
+                           'units': 'km', 'long_name': 'Altitude'})
+    for name, idx, field in _OUTPUTS:
+        if not cgm and name in _CGM:
+            continue
+        if field is not None:
+            attr = field.attrs
+        elif name == 'B':
+            attr = {'units': 'Gauss', 'long_name': 'Magnetic Field Strength'}
+        else:
+            attr = {
+                'long_name': 'L-value Code',
+                'description': '1: normal, 2: unphysical conjugate point, 3: approximation used'
+            }
+        ds[name] = (dims, out[idx].astype(float).reshape(shape), attr)
+    ds['L-code'] = ds['L-code'].astype(int)
+    ds.attrs['description'] = 'IRI 2020 geomagnetic coordinates'
+    ds.attrs['version'] = f'IRI-2020 v{__version__}'
+    return ds
@@ -0,0 +1,170 @@
+# %%
+from __future__ import annotations
+import multiprocessing as mp
+from multiprocessing.pool import AsyncResult
+import sys
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, SupportsFloat as Numeric
+
+import numpy as np
+from xarray import Dataset
+
+from .base import Iri2020
+from .settings import Settings
+
+"""
+iri20py.pool
+================
+
+This module provides a process pool of IRI-2020 workers.
+"""
+
+
+def _worker_init(settings: Optional[Settings]):
+    # Under 'fork' the singleton, and the Fortran state it initialized,
+    # is inherited from the parent and this is a no-op.
+    Iri2020(settings)
+
+
+def _evaluate(args: Tuple[datetime, Numeric, Numeric, np.ndarray, Optional[Settings], bool]) -> Dataset:
+    time, lat, lon, alt, settings, tzaware = args
+    _, ds = Iri2020().evaluate(time, lat, lon, alt, settings, tzaware=tzaware)
+    return ds
+
+
+class IriPool:
+    """Process pool of IRI-2020 workers.
+
+    The model is initialized, and its coefficient caches are populated
+    (see :obj:`Iri2020.preload`), once in the calling process before the
+    workers are started. On Linux, the workers are forked and inherit the
+    index tables, the cached coefficients and the loaded modules of the
+    parent copy-on-write, so these are neither read again nor stored per
+    worker. The coefficients that the model rereads when the month or date
+    changes (the CCIR/URSI foF2 coefficients of the month, and the IGRF
+    coefficients of the date) are still read by each worker into its own
+    copy, which is small (tens of kB); evaluating the profiles of a worker in
+    date order limits the rereads. On other platforms, where forking after
+    the model is initialized is not safe, every worker initializes its own
+    copy of the model.
+
+    Args:
+        processes (Optional[int], optional): Number of worker processes. Defaults to None, i.e. `os.cpu_count()`.
+        settings (Optional[Settings], optional): Default settings of the workers. Defaults to None.
+        preload (bool, optional): Populate the coefficient caches before starting the workers. Defaults to True.
+    """
+
+    def __init__(self, processes: Optional[int] = None, settings: Optional[Settings] = None, *, preload: bool = True):
+        iri = Iri2020(settings)
+        if settings is not None:
+            iri.settings = settings
+        if preload:
+            iri.preload()
+        self._shared = sys.platform.startswith('linux')
+        ctx = mp.get_context('fork' if self._shared else 'spawn')
+        self._pool = ctx.Pool(
+            processes, initializer=_worker_init, initargs=(settings,)
+        )
+
+    @property
+    def shared(self) -> bool:
+        """Whether the workers share the model data of the parent process."""
+        return self._shared
+
+    def map(self, func: Callable[[Any], Any], iterable: Iterable[Any], chunksize: Optional[int] = None) -> List[Any]:
+        """Apply `func` to every element of `iterable` in the worker processes.
+        `func` can use `Iri2020()` to access the model instance of the worker.
+
+        Args:
+            func (Callable[[Any], Any]): Picklable function.
+            iterable (Iterable[Any]): Function arguments.
+            chunksize (Optional[int], optional): Number of elements sent to a worker at a time. Defaults to None.
+
+        Returns:
+            List[Any]: Function results, in order.
+        """
+        return self._pool.map(func, iterable, chunksize)
+
+    def imap_unordered(self, func: Callable[[Any], Any], iterable: Iterable[Any], chunksize: int = 1) -> Iterator[Any]:
+        """Apply `func` to every element of `iterable` in the worker processes,
+        yielding the results as they complete. See :obj:`map`.
+
+        Args:
+            func (Callable[[Any], Any]): Picklable function.
+            iterable (Iterable[Any]): Function arguments.
+            chunksize (int, optional): Number of elements sent to a worker at a time. Defaults to 1.
+
+        Returns:
+            Iterator[Any]: Function results, in order of completion.
+        """
+        return self._pool.imap_unordered(func, iterable, chunksize)
+
+    def apply_async(
+        self, func: Callable[[Any], Any], args: Tuple[Any, ...] = (),
+        callback: Optional[Callable[[Any], None]] = None,
+        error_callback: Optional[Callable[[BaseException], None]] = None,
+    ) -> AsyncResult:
+        """Apply `func` to `args` in a worker process, without waiting for the result.
+        Unlike :obj:`imap_unordered`, which reads all of its arguments ahead,
+        this lets the caller bound the number of tasks in flight. See :obj:`map`.
+
+        Args:
+            func (Callable[[Any], Any]): Picklable function.
+            args (Tuple[Any, ...], optional): Function arguments. Defaults to ().
+            callback (Optional[Callable[[Any], None]], optional): Called with the result. Defaults to None.
+            error_callback (Optional[Callable[[BaseException], None]], optional): Called with the exception if `func` fails. Defaults to None.
+
+        Returns:
+            AsyncResult: Pending result.
+        """
+        return self._pool.apply_async(func, args, callback=callback, error_callback=error_callback)
+
+    def evaluate(
+        self,
+        times: Sequence[datetime],
+        lats: Sequence[Numeric], lons: Sequence[Numeric], alt: np.ndarray,
+        settings: Optional[Settings] = None,
+        *,
+        tzaware: bool = False,
+        chunksize: Optional[int] = None,
+    ) -> List[Dataset]:
+        """Evaluate the IRI-2020 model at a number of locations and times in the worker processes.
+
+        Args:
+            times (Sequence[datetime]): Datetime objects.
+            lats (Sequence[Numeric]): Geographic latitudes.
+            lons (Sequence[Numeric]): Geographic longitudes.
+            alt (np.ndarray): Altitude in kilometers, common to all profiles.
+            settings (Optional[Settings], optional): Settings to use. Defaults to None, i.e. the settings of the workers.
+            tzaware (bool, optional): If times are time zone aware. See :obj:`Iri2020.evaluate`. Defaults to False.
+            chunksize (Optional[int], optional): Number of profiles sent to a worker at a time. Defaults to None.
+
+        Raises:
+            ValueError: If `times`, `lats` and `lons` do not have the same length.
+
+        Returns:
+            List[Dataset]: One dataset per location and time, in order.
+        """
+        if not (len(times) == len(lats) == len(lons)):
+            raise ValueError("times, lats and lons must have the same length")
+        args = [
+            (time, lat, lon, alt, settings, tzaware)
+            for time, lat, lon in zip(times, lats, lons)
+        ]
+        return self._pool.map(_evaluate, args, chunksize)
+
+    def close(self):
+        """Stop accepting work and wait for the workers to exit."""
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        """Stop the workers immediately."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self) -> IriPool:
+        return self
+
+    def __exit__(self, *args):
+        self.terminate()
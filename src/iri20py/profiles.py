@@ -0,0 +1,444 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from xarray import Dataset
+
+from .iri20shim import iri20_profile  # type: ignore
+from .base import DATADIR, Iri2020
+from .settings import Settings, ComputedSettings
+from .utils import iridates, utctimes
+from . import __version__
+
+"""
+iri20py.profiles
+================
+
+Electron density profiles rebuilt from their parameters, for many points and
+altitudes at once.
+
+:obj:`profile_parameters` runs the model once per point to compute the
+parameters of the profile: the OARR peak parameters (NmF2, hmF2, NmF1, hmF1,
+NmE, hmE, B0, B1, ...) and the shape parameters that IRI keeps internally
+(valley, D region, topside and plasmasphere). :obj:`synthesize_profiles`
+then evaluates the profile function of IRI (`XE_1`) at any altitudes with
+array arithmetic:
+
+- topside (h >= hmF2): IRI-90 (Bent), IRICor, NeQuick or IRICor2, with the
+  plasmaspheric extension of IRICor and IRICor2 up to HNEE,
+- bottomside: NmF2 exp(-x^B1) / cosh(x), x = (hmF2 - h) / B0,
+- F1 layer and intermediate region: the bottomside at a height
+  transformed with C1 (Reinisch and Huang, 2000) and HZ, HST,
+- E valley: polynomial in h - hmE,
+- D region and E bottomside.
+"""
+
+# Maximum exponent (ARGMAX of IRI).
+ARGMAX = 87.3
+# Transition widths of the plasmaspheric Booker profile (DPLAS of IRI_SUB), km
+_DPLAS = np.array([100.0, 150.0, 10.0, 10.0])
+
+# Shape parameters: name, (row of IRI_PROFILE, units, long name).
+# The peak parameters are the OARR variables.
+_PARAMETERS: Dict[str, Tuple[int, Optional[str], str]] = {
+    'F1REG': (3, None, 'F1 layer present (1) or not (0)'),
+    'HZ': (7, 'km', 'Base of the F1 layer region'),
+    'T': (8, 'cm^-3/km', 'Gradient of the intermediate region, if HST < 0'),
+    'HST': (9, 'km', 'Height of the E valley top density in the F1 region'),
+    'HEF': (12, 'km', 'E valley top'),
+    'NIGHT': (13, None, 'Nighttime E valley shape (1) or daytime (0)'),
+    **{f'E{i + 1}': (14 + i, None, f'E valley coefficient {i + 1}') for i in range(4)},
+    'HDX': (20, 'km', 'Transition height from the D region to the E bottomside'),
+    'D1': (21, None, 'E bottomside coefficient'),
+    'XKK': (22, None, 'E bottomside exponent'),
+    'FP30': (23, None, 'D region coefficient above hmD'),
+    'FP3U': (24, None, 'D region coefficient below hmD'),
+    'FP1': (25, None, 'D region coefficient 1'),
+    'FP2': (26, None, 'D region coefficient 2'),
+    'BETA': (27, None, 'Topside parameter BETA'),
+    'ETA': (28, None, 'Topside parameter ETA'),
+    'DELTA': (29, None, 'Topside parameter DELTA'),
+    'ZETA': (30, None, 'Topside parameter ZETA'),
+    'B2TOP': (31, 'km', 'NeQuick topside scale height'),
+    'ITOPN': (32, None, 'Topside model: 0 IRI-90, 1 IRICor, 2 NeQuick, 3 IRICor2'),
+    **{f'PAH{i + 1}': (33 + i, 'km', f'Plasmaspheric extension height {i + 1}') for i in range(6)},
+    **{f'PALOGNE{i + 1}': (39 + i, None, f'ln(Ne/NmF2) at PAH{i + 1}') for i in range(6)},
+    'HCOR1': (45, 'km', 'Lower height of the IRICor correction'),
+    'HCOR2': (46, 'km', 'Lower height of the full IRICor2 correction'),
+    'SHC': (47, 'km', 'Scale height of the IRICor2 correction below HCOR2'),
+    'LT': (48, 'hours', 'Local time'),
+    'MODIP': (49, 'degrees', 'Modified dip latitude'),
+    'PF107': (50, 'sfu', 'Mean of the daily and the 81-day F10.7'),
+    'DAYNR': (53, None, 'Day of the year'),
+}
+# OARR parameters of the profile
+_PEAKS = ('nmF2', 'hmF2', 'hmF1', 'nmE', 'hmE', 'nmD', 'hmD', 'B0', 'B1', 'c1', 'HNEA', 'HNEE')
+
+# Coefficients of the IRICor2 correction (TOPS_COR2): values and heights of the
+# Booker profiles (height, modip band, A0/A1, day/night).
+_COR2_PA = np.array([
+    0, 0, -2.4, -2.4, 0, 0, 0, 0, -1.6, -1.6, 0, 0, 0, 0, -2.2, -2.2, 0, 0,
+    0, 0, 0.0185, 0.0185, 0, 0, 0, 0, 0.018, 0.018, 0, 0,
+    0, 0, 0.0175, 0.0175, 0, 0, 0, 0, -1.1, -1.1, 0, 0,
+    0, 0, -0.7, -0.7, 0, 0, 0, 0, -1.4, -1.4, 0, 0,
+    0, 0, 0.007, 0.007, 0, 0, 0, 0, 0.005, 0.005, 0, 0,
+    0, 0, 0.01, 0.01, 0, 0,
+], dtype=float).reshape((6, 3, 2, 2), order='F')
+_COR2_HA = np.array([
+    0, 200, 600, 900, 1400, 1700,
+    0, 550, 700, 1100, 1400, 1700,
+    0, 200, 600, 950, 1600, 1700,
+    0, 300, 650, 750, 1300, 1700,
+    0, 450, 750, 850, 1400, 1700,
+    0, 300, 650, 750, 1500, 1700,
+    0, 400, 500, 900, 1200, 1700,
+    0, 400, 500, 900, 1200, 1700,
+    0, 350, 550, 800, 1200, 1700,
+    0, 400, 500, 750, 900, 1700,
+    0, 400, 550, 750, 900, 1700,
+    0, 400, 550, 750, 900, 1700,
+], dtype=float).reshape((6, 3, 2, 2), order='F')
+_COR2_MODIP = np.array([-90.0, -60.0, -25.0, 0.0, 25.0, 60.0, 90.0])
+
+def profile_parameters(
+    times: Sequence[datetime] | np.ndarray,
+    lats: np.ndarray, lons: np.ndarray,
+    settings: Optional[Settings | ComputedSettings] = None,
+    *,
+    overrides: Optional[Mapping[str, Any]] = None,
+    tzaware: bool = False,
+) -> Dataset:
+    """Compute the parameters of the electron density profiles of a number of points.
+
+    The model is run once per point, without evaluating the profile.
+
+    Args:
+        times (Sequence[datetime] | np.ndarray): Datetime objects, or `datetime64` array.
+        lats (np.ndarray): Geographic latitudes.
+        lons (np.ndarray): Geographic longitudes.
+        settings (Optional[Settings  |  ComputedSettings], optional): Settings to use. Defaults to None.
+        overrides (Optional[Mapping[str, Any]], optional): Per-point driver values (see :obj:`iri20py.settings.OVERRIDES`). Defaults to None.
+        tzaware (bool, optional): If times are time zone aware. If true, `times` are recast to 'UTC'. Defaults to False.
+
+    Raises:
+        TypeError: If settings is not of type Settings or ComputedSettings.
+        ValueError: If the settings use the Lay-function electron density or the FT-2001 D region, which are not synthesized.
+
+    Returns:
+        Dataset: Dataset along `point` with the OARR parameters (densities in cm^-3) and the shape parameters of the profile.
+    """
+    settings = Iri2020()._computed(settings, store=False)
+    if not settings.jf[10]:
+        raise ValueError("The Lay-function electron density is not synthesized")
+    if not settings.jf[23]:
+        raise ValueError("The FT-2001 D region is not synthesized")
+    settings = settings.select(['Ne'])
+    times, lat, lon = np.broadcast_arrays(
+        utctimes(times, tzaware),
+        np.asarray(lats, dtype=np.float32),
+        np.asarray(lons, dtype=float) % 360,
+    )
+    if lat.ndim != 1:
+        raise ValueError("times, lats and lons must be one-dimensional")
+    npts = len(lat)
+    year, day, ut = iridates(times)
+    jf, oarr = settings.expand(npts, overrides)
+    # Date order, as in Iri2020.evaluate_batch.
+    order = np.lexsort((ut, day, jf[4], year))
+    soarr = np.asfortranarray(oarr[:, order])
+    prf = np.empty((54, npts), dtype=np.float32)
+    prf[:, order] = iri20_profile(
+        np.asfortranarray(jf[:, order]), 0,
+        lat[order], lon[order].astype(np.float32), year[order], -day[order],
+        (ut[order] / 3600.0 + 25).astype(np.float32),
+        soarr, str(DATADIR), settings.logfile
+    )
+    oarr[:, order] = soarr
+    prf = prf.astype(float)
+    intermediate = prf[9] < 0
+    prf[8] = np.where(intermediate, prf[8]*1e-6, np.nan)
+
+    ds = Dataset()
+    ds.coords['time'] = (('point',), times.astype('datetime64[ns]'))
+    ds.coords['lat'] = (('point',), lat.astype(float), {
+                        'units': 'degrees', 'long_name': 'Latitude'})
+    ds.coords['lon'] = (('point',), lon, {
+                        'units': 'degrees', 'long_name': 'Longitude'})
+    Iri2020._oarrvariables(ds, oarr, 'point')
+    for name, (idx, units, long_name) in _PARAMETERS.items():
+        attr = {'long_name': long_name}
+        if units is not None:
+            attr['units'] = units
+        ds[name] = (('point',), prf[idx], attr)
+    ds.attrs['description'] = 'IRI 2020 electron density profile parameters'
+    ds.attrs['version'] = f'IRI-2020 v{__version__}'
+    return ds
+
+
+def synthesize_profiles(params: Dataset, alt: np.ndarray) -> np.ndarray:
+    """Evaluate electron density profiles from their parameters.
+
+    The profile function is that of the model, so the profiles agree with
+    :obj:`iri20py.Iri2020.evaluate_batch` up to the single precision
+    arithmetic of the model. The parameters are used as they are: changing
+    a peak parameter does not update the shape parameters derived from it.
+
+    Args:
+        params (Dataset): Profile parameters along `point` (see :obj:`profile_parameters`).
+        alt (np.ndarray): Altitudes in kilometers, common to all points (`nalt`,) or per point (`point`, `nalt`).
+
+    Raises:
+        ValueError: If `alt` has neither shape.
+
+    Returns:
+        np.ndarray: Electron density in cm^-3, (`point`, `nalt`). NaN outside HNEA to HNEE, where the model does not compute Ne.
+    """
+    npts = params.sizes['point']
+    alt = np.asarray(alt, dtype=float)
+    if alt.ndim == 1:
+        alt = np.broadcast_to(alt, (npts, len(alt)))
+    elif alt.ndim != 2 or alt.shape[0] != npts:
+        raise ValueError("alt must have the shape (nalt,) or (point, nalt)")
+    names = _PEAKS + tuple(_PARAMETERS) + ('lat', 'lon')
+    values = {name: np.asarray(params[name].values, dtype=float) for name in names}
+    top = {name: values[name][:, None] for name in ('hmF2', 'nmF2', 'HNEA', 'HNEE')}
+    hmf1 = np.where(values['F1REG'] > 0, values['hmF1'], values['hmF2'])[:, None]
+    region = np.select([
+        alt >= top['hmF2'], alt >= hmf1, alt >= values['HZ'][:, None],
+        alt >= values['HEF'][:, None], alt >= values['hmE'][:, None],
+    ], [0, 1, 2, 3, 4], 5)
+    col = np.broadcast_to(np.arange(npts)[:, None], alt.shape)
+    ne = np.empty(alt.shape)
+    with np.errstate(all='ignore'):
+        columns = _Columns({**values, **_derived(values)})
+        for idx, func in enumerate(_REGIONS):
+            sel = region == idx
+            if np.any(sel):
+                ne[sel] = func(alt[sel], columns.take(col[sel]))
+    ne = np.where((alt > top['hmF2']) & (ne > top['nmF2']), top['nmF2'], ne)
+    ne[(alt < top['HNEA']) | (alt > top['HNEE'])] = np.nan
+    return ne
+
+
+class _Columns:
+    # Parameters of the points (first axis), gathered for a set of profile
+    # samples on first use.
+
+    def __init__(self, values: Dict[str, np.ndarray], idx: Optional[np.ndarray] = None):
+        self._values = values
+        self._idx = idx
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._cache:
+            value = self._values[name]
+            self._cache[name] = value if self._idx is None else value[self._idx]
+        return self._cache[name]
+
+    def take(self, idx: np.ndarray) -> _Columns:
+        # Samples `idx` (indices or mask) of these samples.
+        return _Columns(self._values, idx if self._idx is None else self._idx[idx])
+
+
+def _eptr(x: np.ndarray, sc: Any, hx: Any) -> np.ndarray:
+    # Transition function EPTR: ln(1 + exp((x - hx)/sc)).
+    return np.logaddexp(0.0, (x - hx) / sc)
+
+
+def _epst(x: np.ndarray, sc: Any, hx: Any) -> np.ndarray:
+    # Step function EPST: 1 / (1 + exp(-(x - hx)/sc)).
+    return 1.0 / (1.0 + np.exp(-(x - hx) / sc))
+
+
+def _booker(ah: np.ndarray, av: np.ndarray, d: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Booker profile BOOKER through the values `av` at the heights `ah`
+    # (last axis), with transition widths `d`, as the coefficients of
+    # c0 + c1*h + sum_i k_i*EPTR(h, d_i, ah_i+1).
+    st = np.diff(av, axis=-1) / np.diff(ah, axis=-1)
+    k = np.diff(st, axis=-1)*d
+    c0 = av[..., 0] - st[..., 0]*ah[..., 0] - np.sum(
+        k*_eptr(ah[..., :-2], d, ah[..., 1:-1]), axis=-1)
+    return c0, st[..., 0], k
+
+
+def _bookerval(h: np.ndarray, ah: np.ndarray, coef: Tuple[np.ndarray, np.ndarray, np.ndarray], d: np.ndarray) -> np.ndarray:
+    c0, c1, k = coef
+    out = c0 + c1*h
+    for i in range(len(d)):
+        out = out + k[..., i]*_eptr(h, d[i], ah[..., i + 1])
+    return out
+
+
+def _derived(values: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # Parameters of the points that do not depend on the height.
+    out = {}
+    # Topside (XE1) at the peak
+    x0 = 300.0 - values['DELTA']
+    out['_eptr0'] = values['BETA']*values['ETA']*_eptr(x0, values['BETA'], 394.5)
+    out['_eptr1'] = _eptr(x0, 100.0, 300.0)
+    # Plasmaspheric extension (TCOR1)
+    ah = np.stack([values[f'PAH{i + 1}'] for i in range(6)], axis=-1)
+    av = np.stack([values[f'PALOGNE{i + 1}'] for i in range(6)], axis=-1)
+    out['_pah'] = ah
+    out['_tcor1_c0'], out['_tcor1_c1'], out['_tcor1_k'] = _booker(ah, av, _DPLAS)
+    # IRICor2 (TCOR2CAL): weights of the modip bands, and the sun position (SOCO)
+    modip = values['MODIP']
+    coef = _booker(_COR2_MODIP, np.eye(7)[2:5], np.full(5, 0.1))
+    out['_cor2_w'] = _bookerval(modip[:, None], _COR2_MODIP, coef, np.full(5, 0.1))
+    dtr = np.pi / 180.0
+    te = values['DAYNR'] + (values['LT'] + (360.0 - values['lon']) / 15.0) / 24.0 + 0.9369
+    dcl = (
+        23.256*np.sin(0.017203534*(te - 82.242)) + 0.381*np.sin(0.034407068*(te - 44.855))
+        + 0.167*np.sin(0.051610602*(te - 23.355)) - 0.013*np.sin(0.068814136*(te + 11.97))
+        + 0.011*np.sin(0.103221204*(te - 10.41)) + 0.339137
+    ) * dtr
+    tf = te - 0.5
+    eqt = (
+        -7.38*np.sin(0.017203534*(tf - 4.0)) - 9.87*np.sin(0.034407068*(tf + 9.0))
+        + 0.27*np.sin(0.051610602*(tf - 53.0)) - 0.2*np.cos(0.068814136*(tf - 17.0))
+    )
+    out['_sun_et'] = eqt / 60.0
+    out['_sun_a'] = np.sin(values['lat']*dtr)*np.sin(dcl)
+    out['_sun_b'] = np.cos(values['lat']*dtr)*np.cos(dcl)
+    return out
+
+
+def _sunrise(h: np.ndarray, q: _Columns) -> Tuple[np.ndarray, np.ndarray]:
+    # Local times of sunrise and sunset at height h (km), as in SOCO.
+    day, lat, a, et = q['DAYNR'], q['lat'], q['_sun_a'], q['_sun_et']
+    chih = 90.83 + 0.0347*np.sqrt(h*1000.0)
+    cosphi = (np.cos(np.deg2rad(chih)) - a) / q['_sun_b']
+    secphi = np.where(cosphi != 0, 1.0 / cosphi, 999999.0)
+    phi = np.arccos(np.clip(cosphi, -1.0, 1.0)) * (12.0 / np.pi)
+    sunrise = 12.0 - phi - et
+    sunset = 12.0 + phi - et
+    sunrise = np.where(sunrise < 0, sunrise + 24.0, sunrise)
+    sunset = np.where(sunset >= 24.0, sunset - 24.0, sunset)
+    # Sun never sets (99) or never rises (-99).
+    sunx = np.where(
+        (day > 91) & (day < 273), np.copysign(99.0, lat), -np.copysign(99.0, lat))
+    polar = np.select([
+        (secphi > -1.0) & (secphi <= 0.0), (secphi > 0.0) & (secphi < 1.0),
+        sunrise > sunset,
+    ], [99.0, -99.0, sunx], np.nan)
+    sunrise = np.where(np.isnan(polar), sunrise, polar)
+    sunset = np.where(np.isnan(polar), sunset, polar)
+    return sunrise, sunset
+
+
+def _hpol(hour: np.ndarray, day: np.ndarray, night: np.ndarray, sunrise: np.ndarray, sunset: np.ndarray) -> np.ndarray:
+    # Day-night interpolation HPOL with steps of 1 hour.
+    value = night + (day - night)*_epst(hour, 1.0, sunrise) + (night - day)*_epst(hour, 1.0, sunset)
+    return np.where(np.abs(sunset) > 25.0, np.where(sunset > 0, day, night), value)
+
+
+def _tcor2(h: np.ndarray, q: _Columns) -> np.ndarray:
+    # IRICor2 correction TCOR2CAL (TOPS_COR2 and HPOL) at heights above hmF2.
+    # The coefficients of the modip bands only depend on the height.
+    hu, inv = np.unique(h, return_inverse=True)
+    thh = np.full(4, 30.0)
+    ap01 = np.empty((len(hu), 3, 2, 2))
+    for j, k, l in np.ndindex(3, 2, 2):
+        ah = _COR2_HA[:, j, k, l]
+        ap01[:, j, k, l] = _bookerval(hu, ah, _booker(ah, _COR2_PA[:, j, k, l], thh), thh)
+    # A0 and A1, day and night, at modip.
+    a01 = np.einsum('nj,njkl->nkl', q['_cor2_w'], ap01[inv])
+    day = a01[:, 0, 0] + a01[:, 1, 0]*q['PF107']
+    night = a01[:, 0, 1] + a01[:, 1, 1]*q['PF107']
+    sunrise, sunset = _sunrise(h, q)
+    tcor2 = _hpol(q['LT'], day, night, sunrise, sunset)
+    return np.where(h < q['HCOR2'], (np.exp((h - q['hmF2']) / q['SHC']) - 1)*tcor2, tcor2)
+
+
+def _topq(h: np.ndarray, q: _Columns) -> np.ndarray:
+    # NeQuick topside TOPQ.
+    dh = h - q['hmF2']
+    g1 = 0.125*dh
+    ho = q['B2TOP']
+    z = dh / (ho*(1.0 + 100.0*g1/(100.0*ho + g1)))
+    ee = np.exp(np.minimum(z, 40.0))
+    ep = np.where(ee > 1e7, 4.0/ee, 4.0*ee/(1.0 + ee)**2)
+    return np.where(z > 40.0, 0.0, q['nmF2']*ep)
+
+
+def _xe1(h: np.ndarray, q: _Columns) -> np.ndarray:
+    # Topside XE1.
+    itopn = q['ITOPN']
+    out = np.empty_like(h)
+    sel = itopn == 2
+    if np.any(sel):
+        out[sel] = _topq(h[sel], q.take(sel))
+    sel = ~sel
+    if not np.any(sel):
+        return out
+    h, q, itopn = h[sel], q.take(sel), itopn[sel]
+    hmf2 = q['hmF2']
+    dxdh = (1000.0 - hmf2) / 700.0
+    xmx0 = (h - hmf2) / dxdh
+    x = xmx0 + 300.0 - q['DELTA']
+    y = (
+        q['BETA']*q['ETA']*_eptr(x, q['BETA'], 394.5) - q['_eptr0']
+        + q['ZETA']*(100.0*(_eptr(x, 100.0, 300.0) - q['_eptr1']) - xmx0)
+    )*dxdh
+    tcor = np.zeros_like(h)
+    cor = ((itopn == 1) | (itopn == 3)) & (h >= q['HCOR1'])
+    if np.any(cor):
+        qc = q.take(cor)
+        tcor[cor] = _bookerval(
+            h[cor], qc['_pah'], (qc['_tcor1_c0'], qc['_tcor1_c1'], qc['_tcor1_k']), _DPLAS)
+    cor = (itopn == 3) & (h > hmf2)
+    if np.any(cor):
+        tcor[cor] += _tcor2(h[cor], q.take(cor))
+    out[sel] = q['nmF2']*np.exp(np.clip(tcor - y, -ARGMAX, ARGMAX))
+    return out
+
+
+def _xe2(h: np.ndarray, q: _Columns) -> np.ndarray:
+    # Bottomside XE2.
+    x = np.maximum((q['hmF2'] - h) / q['B0'], 0.0)
+    z = np.minimum(x**q['B1'], ARGMAX)
+    return q['nmF2']*np.exp(-z)/np.cosh(x)
+
+
+def _h1bar(h: np.ndarray, q: _Columns) -> np.ndarray:
+    # Height transformation of the F1 layer.
+    hmf1 = q['hmF1']
+    return np.where(q['F1REG'] > 0, hmf1*(1.0 - ((hmf1 - h) / hmf1)**(1.0 + q['c1'])), h)
+
+
+def _xe3(h: np.ndarray, q: _Columns) -> np.ndarray:
+    # F1 region XE3_1.
+    return _xe2(_h1bar(h, q), q)
+
+
+def _xe4(h: np.ndarray, q: _Columns) -> np.ndarray:
+    # Intermediate region XE4_1.
+    hz, hst, hef = q['HZ'], q['HST'], q['HEF']
+    t = (hz - hst)**2 / (hst - hef)
+    root = np.sqrt(t*(0.25*t + hz - h))
+    haha = np.where(hst == hef, h, hz + 0.5*t + np.where(hst > hef, -root, root))
+    return np.where(hst < 0, q['nmE'] + q['T']*(h - hef), _xe2(_h1bar(haha, q), q))
+
+
+def _xe5(h: np.ndarray, q: _Columns) -> np.ndarray:
+    # E valley XE5.
+    t3 = h - q['hmE']
+    t1 = t3*t3*(q['E1'] + t3*(q['E2'] + t3*(q['E3'] + t3*q['E4'])))
+    return q['nmE']*np.where(q['NIGHT'] > 0, np.exp(t1), 1.0 + t1)
+
+
+def _xe6(h: np.ndarray, q: _Columns) -> np.ndarray:
+    # D region and E bottomside XE6.
+    z = h - q['hmD']
+    fp3 = np.where(z > 0, q['FP30'], q['FP3U'])
+    lower = q['nmD']*np.exp(z*(q['FP1'] + z*(q['FP2'] + z*fp3)))
+    upper = q['nmE']*np.exp(-q['D1']*(q['hmE'] - h)**q['XKK'])
+    return np.where(h > q['HDX'], upper, lower)
+
+
+# Regions of XE_1, from the top.
+_REGIONS: Tuple[Callable[[np.ndarray, _Columns], np.ndarray], ...] = (
+    _xe1, _xe2, _xe3, _xe4, _xe5, _xe6,
+)
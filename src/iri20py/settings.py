@@ -2,8 +2,8 @@
 from __future__ import annotations
 from numbers import Number
 import platform
-from typing import Any, Callable, List, Literal, Optional, Tuple
-from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Literal, Mapping, Optional, Sequence, Tuple
+from dataclasses import dataclass, replace
 from pathlib import Path
 
 import numpy as np
@@ -35,6 +35,33 @@ PlasmasphereModel = Literal['Ozhogin', 'Gallagher']  # [48] T, F
 
 LOGFILE_NUL = 'nul' if platform.system() == 'Windows' else '/dev/null'
 
+# Drivers that can be specified per point in batch evaluations.
+# name: (JF index, OARR index)
+# IRI applies a user B1 only together with a user B0, so a `b1` override
+# requires B0 at the same point (the `b0` override or `Settings.b0_value`).
+OVERRIDES: Dict[str, Tuple[int, int]] = {
+    'foF2': (7, 0),  # foF2 in MHz or NmF2 in m-3
+    'hmF2': (8, 1),  # hmF2 in km or M(3000)F2
+    'foF1': (12, 2),  # foF1 in MHz or NmF1 in m-3
+    'hmF1': (13, 3),  # hmF1 in km
+    'foE': (14, 4),  # foE in MHz or NmE in m-3
+    'hmE': (15, 5),  # hmE in km
+    'rz12': (16, 32),
+    'f107': (24, 40),  # daily F10.7
+    'ig12': (26, 38),
+    'f107_81': (31, 45),  # 81-day average F10.7
+    'b0': (42, 9),  # B0 in km
+    'b1': (43, 34),
+}
+
+# Output variables, and the JF switch that enables their computation
+# (0: electron density, 1: temperatures, 2: ion composition).
+VARIABLES: Dict[str, int] = {
+    'Ne': 0,
+    'Tn': 1, 'Te': 1, 'Ti': 1,
+    'O+': 2, 'H+': 2, 'He+': 2, 'O2+': 2, 'NO+': 2, 'Cluster': 2, 'N+': 2,
+}
+
 
 def _b0b1model_flags(inp: B0B1Model) -> List[Tuple[int, bool]]:
     if inp == 'Bil-2000':
@@ -305,8 +332,8 @@ class Settings:
     b0_value: Optional[Number] = None  # [42] Bool -> True, OARR[9]
     """User-defined B0 value. If None, B0 is computed by IRI [default: None]
     """
-    b1_value: Optional[Number] = None  # [43] Bool -> True, OARR[35]
-    """User-defined B1 value. If None, B1 is computed by IRI [default: None]
+    b1_value: Optional[Number] = None  # [43] Bool -> True, OARR[34]
+    """User-defined B1 value, only used together with `b0_value`. If None, B1 is computed by IRI [default: None]
     """
     es_occ_prob: bool = True  # [44] -> True
     es_prob_no_solar: bool = True  # [45] -> True
@@ -340,6 +367,28 @@ class Settings:
             self.logfile) if self.logfile is not None else None
         return json.dumps(settings)
 
+    @staticmethod
+    def from_json(data: str) -> Settings:
+        """Create settings from a JSON string, as written by :obj:`to_json`.
+
+        Args:
+            data (str): JSON string representation of settings.
+
+        Raises:
+            TypeError: If the JSON string holds an unknown setting.
+
+        Returns:
+            Settings: Settings.
+        """
+        import json
+        settings = json.loads(data)
+        if settings.get('logfile') is not None:
+            settings['logfile'] = Path(settings['logfile'])
+        for key in ('te_mode', 'f107'):
+            if settings.get(key) is not None:
+                settings[key] = tuple(settings[key])
+        return Settings(**settings)
+
 
 @dataclass
 class ComputedSettings:
@@ -349,6 +398,16 @@ class ComputedSettings:
     jf: np.ndarray
     oarr: np.ndarray
     logfile: str
+    variables: Optional[Tuple[str, ...]] = None
+    """Output variables to compute. If None, all variables are computed [default: None]
+    """
+
+    def __reduce__(self):
+        # Compact pickle: the switches as a bit field, OARR as raw float32.
+        return (_computed, (
+            np.packbits(self.jf).tobytes(), self.oarr.astype(np.float32).tobytes(),
+            self.logfile, self.variables
+        ))
 
     @staticmethod
     def from_settings(settings: Settings) -> ComputedSettings:
@@ -427,7 +486,7 @@ class ComputedSettings:
             oarr[9] = settings.b0_value
         if settings.b1_value is not None:
             jf[43] = False
-            oarr[35] = settings.b1_value
+            oarr[34] = settings.b1_value
         jf[44] = settings.es_occ_prob
         jf[45] = settings.es_prob_no_solar
         jf[46] = settings.cgm_compute
@@ -468,3 +527,88 @@ class ComputedSettings:
         # Additional flags and oarr values would be set here...
 
         return ComputedSettings(jf=jf, oarr=oarr.astype(np.float32), logfile=logfile_str)
+
+    def computes(self, variable: str) -> bool:
+        """Whether an output variable is computed with these settings.
+
+        Args:
+            variable (str): Output variable.
+
+        Returns:
+            bool: True if the variable is computed.
+        """
+        if self.variables is None:
+            return True
+        return variable in self.variables
+
+    def select(self, variables: Sequence[str]) -> ComputedSettings:
+        """Restrict the computation to the given output variables.
+        The density, temperature and ion composition models that are
+        not needed for these variables are switched off.
+
+        Args:
+            variables (Sequence[str]): Output variables, see :obj:`VARIABLES`, e.g. `['Ne']`.
+
+        Raises:
+            KeyError: If a variable name is not known.
+            ValueError: If no variable is selected.
+
+        Returns:
+            ComputedSettings: Settings computing only the given variables.
+        """
+        variables = tuple(variables)
+        if len(variables) == 0:
+            raise ValueError("At least one output variable must be selected")
+        jf = self.jf.copy()
+        jf[0:3] = False
+        for name in variables:
+            if name not in VARIABLES:
+                raise KeyError(f"Unknown output variable: {name}")
+            jf[VARIABLES[name]] = True
+        if jf[2] and not jf[5]:
+            # The RBV-2010 ion composition below 300 km uses the electron
+            # and ion temperature profiles, whose parameters are only set
+            # up when the temperatures are computed.
+            jf[1] = True
+        return replace(self, jf=jf, oarr=self.oarr.copy(), variables=variables)
+
+    def expand(self, npts: int, overrides: Optional[Mapping[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Build per-point switches and OARR input arrays for a batch evaluation.
+
+        Args:
+            npts (int): Number of points.
+            overrides (Optional[Mapping[str, Any]], optional): Per-point driver values, keyed by the names in :obj:`OVERRIDES`. Each value is a scalar or an array of length `npts`. NaN entries fall back to the value from these settings for that point. Defaults to None.
+
+        Raises:
+            KeyError: If an override name is not known.
+            ValueError: If an override array does not have `npts` elements, or `b1` is given at a point without B0.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Switches (50, npts) and OARR (100, npts), in Fortran order.
+        """
+        jf = np.empty((50, npts), dtype=bool, order='F')
+        jf[:] = self.jf[:, None]
+        oarr = np.empty((100, npts), dtype=np.float32, order='F')
+        oarr[:] = self.oarr[:, None]
+        for name, value in (overrides or {}).items():
+            if name not in OVERRIDES:
+                raise KeyError(f"Unknown override: {name}")
+            value = np.broadcast_to(np.asarray(value, dtype=float), (npts,))
+            jdx, odx = OVERRIDES[name]
+            valid = np.isfinite(value)
+            jf[jdx, valid] = False
+            oarr[odx, valid] = value[valid]
+        if overrides and 'b1' in overrides:
+            b1 = np.isfinite(np.broadcast_to(np.asarray(overrides['b1'], dtype=float), (npts,)))
+            if np.any(b1 & jf[OVERRIDES['b0'][0]]):
+                raise ValueError("A b1 override requires B0 at the same point (b0 override or b0_value)")
+        return jf, oarr
+
+
+def _computed(jf: bytes, oarr: bytes, logfile: str, variables: Optional[Tuple[str, ...]]) -> ComputedSettings:
+    return ComputedSettings(
+        jf=np.unpackbits(np.frombuffer(jf, dtype=np.uint8))[:50].astype(bool),
+        oarr=np.frombuffer(oarr, dtype=np.float32).copy(),
+        logfile=logfile,
+        variables=variables,
+    )
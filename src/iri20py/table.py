@@ -0,0 +1,390 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+import json
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base import OARR_FIELDS, Iri2020
+from .indices import f107
+from .settings import Settings, ComputedSettings
+from .utils import alt_grid
+from . import __version__
+
+"""
+iri20py.table
+=============
+
+Precomputed IRI-2020 climatology tables.
+
+A table holds log10(Ne) on an altitude grid, and a number of peak
+parameters, on a lattice of (day of year, UT, latitude, longitude, F10.7).
+The solar activity of a lattice point is described by a single F10.7
+value, from which the daily and 81-day F10.7 and the Rz12 index of the
+model are derived. Tables are stored as a directory of `.npy` files that
+are memory-mapped when opened, and are interpolated multilinearly, with
+day of year, UT and longitude treated as periodic.
+"""
+
+# Lattice axes, in storage order.
+AXES: Tuple[str, ...] = ('day', 'ut', 'lat', 'lon', 'f107')
+# Periods of the cyclic axes.
+PERIODS: Dict[str, float] = {'day': 365.0, 'ut': 24.0, 'lon': 360.0}
+# Peak parameters stored by default (see :obj:`iri20py.base.OARR_FIELDS`).
+TABLE_PEAKS: Tuple[str, ...] = (
+    'nmF2', 'hmF2', 'nmF1', 'hmF1', 'nmE', 'hmE', 'B0', 'B1')
+
+_META = 'table.json'
+_NE = 'ne.npy'
+_PEAKS = 'peaks.npy'
+
+
+def solar_overrides(f107: np.ndarray) -> Dict[str, np.ndarray]:
+    """Driver overrides describing the solar activity by a single F10.7 value.
+
+    The daily and 81-day F10.7 are set to `f107`, and Rz12 is obtained by
+    inverting the F10.7-Rz12 relation used by IRI; IG12 is derived from
+    Rz12 by the model.
+
+    Args:
+        f107 (np.ndarray): F10.7 values (sfu).
+
+    Returns:
+        Dict[str, np.ndarray]: Overrides, keyed by the names in :obj:`iri20py.settings.OVERRIDES`.
+    """
+    f107 = np.asarray(f107, dtype=float)
+    # COV = 63.75 + R*(0.728 + R*0.00089)
+    a, b, c = 0.00089, 0.728, 63.75
+    rz12 = (np.sqrt(b*b + 4*a*np.maximum(f107 - c, 0.0)) - b) / (2*a)
+    return {'f107': f107, 'f107_81': f107, 'rz12': rz12}
+
+
+def f107_index(years: np.ndarray, days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Daily and 81-day F10.7 of the given dates, from `apf107.dat`.
+
+    Tables are looked up with the mean of the two (the PF10.7 index of IRI).
+
+    Args:
+        years (np.ndarray): Years (four digits).
+        days (np.ndarray): Days of the year (1-365 or 366).
+
+    Raises:
+        ValueError: If a date is not covered by `apf107.dat`.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Daily and 81-day F10.7 values (sfu).
+    """
+    years, days = np.broadcast_arrays(
+        np.asarray(years, dtype=int), np.asarray(days, dtype=int))
+    start = (years - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+    daily, mean, _ = f107(start + (days - 1))
+    if np.any(np.isnan(daily)):
+        raise ValueError("Date is not covered by apf107.dat")
+    return daily, mean
+
+
+class IriTable:
+    """Precomputed IRI-2020 climatology table.
+
+    Use :obj:`build_table` to compute a table, and :obj:`IriTable.open` to
+    open a stored one.
+
+    Attributes:
+        path (Path): Directory of the table.
+        axes (Dict[str, np.ndarray]): Lattice coordinates, see :obj:`AXES`.
+        alt (np.ndarray): Altitude grid (km).
+        peaks (Tuple[str, ...]): Stored peak parameters.
+        year (int): Year the table was computed for.
+        settings (Settings): Settings the table was computed with.
+        errors (Dict[str, Dict[str, float]]): Relative interpolation errors (median, 95th percentile and maximum) found when the table was built, for `Ne` and each peak parameter.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        with open(self.path / _META) as fd:
+            meta = json.load(fd)
+        self.axes: Dict[str, np.ndarray] = {
+            name: np.asarray(meta['axes'][name], dtype=float) for name in AXES
+        }
+        self.alt = np.asarray(meta['alt'], dtype=float)
+        self.peaks: Tuple[str, ...] = tuple(meta['peaks'])
+        self.year: int = meta['year']
+        self.settings = Settings.from_json(meta['settings'])
+        self.errors: Dict[str, Dict[str, float]] = meta.get('errors', {})
+        self._ne = np.load(self.path / _NE, mmap_mode='r')
+        self._peaks = np.load(self.path / _PEAKS, mmap_mode='r')
+
+    def __reduce__(self):
+        # Pickled by path: the memory-mapped data is not copied.
+        return (IriTable, (str(self.path),))
+
+    @staticmethod
+    def open(path: Path | str) -> IriTable:
+        """Open a table computed by :obj:`build_table`.
+
+        The table data is memory-mapped, not read.
+
+        Args:
+            path (Path | str): Directory of the table.
+
+        Returns:
+            IriTable: The table.
+        """
+        return IriTable(path)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Shape of the lattice."""
+        return tuple(len(self.axes[name]) for name in AXES)
+
+    def _weights(self, name: str, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Bracketing lattice indices and the weight of the upper one.
+        axis = self.axes[name]
+        n = len(axis)
+        if name in PERIODS:
+            period = PERIODS[name]
+            x = np.mod(x - axis[0], period)
+            lo = np.searchsorted(axis - axis[0], x, side='right') - 1
+            hi = (lo + 1) % n
+            span = np.append(np.diff(axis), axis[0] + period - axis[-1])[lo]
+            return lo, hi, (x - (axis[lo] - axis[0])) / span
+        if n == 1:
+            zero = np.zeros(x.shape, dtype=int)
+            return zero, zero, np.zeros(x.shape)
+        x = np.clip(x, axis[0], axis[-1])
+        lo = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, n - 2)
+        return lo, lo + 1, (x - axis[lo]) / (axis[lo + 1] - axis[lo])
+
+    def interpolate(
+        self,
+        days: np.ndarray, uts: np.ndarray,
+        lats: np.ndarray, lons: np.ndarray,
+        f107: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Interpolate the table.
+
+        Coordinates outside the latitude and F10.7 range of the lattice are
+        clamped to its boundary.
+
+        Args:
+            days (np.ndarray): Days of the year.
+            uts (np.ndarray): Universal times in hours.
+            lats (np.ndarray): Geographic latitudes.
+            lons (np.ndarray): Geographic longitudes.
+            f107 (np.ndarray): F10.7 values (sfu).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: log10(Ne in cm^-3) with shape (`point`, `alt`), and the peak parameters with shape (`point`, `peak`), as stored in OARR.
+        """
+        coords = np.broadcast_arrays(*[
+            np.atleast_1d(np.asarray(x, dtype=float))
+            for x in (days, uts, lats, lons, f107)
+        ])
+        npts = coords[0].size
+        shape = self.shape
+        strides = np.cumprod((1,) + shape[:0:-1])[::-1]
+        brackets = [
+            self._weights(name, x.ravel()) for name, x in zip(AXES, coords)
+        ]
+        ne = self._ne.reshape(-1, len(self.alt))
+        peaks = self._peaks.reshape(-1, len(self.peaks))
+        outne = np.zeros((npts, len(self.alt)), dtype=float)
+        outpk = np.zeros((npts, len(self.peaks)), dtype=float)
+        for corner in range(1 << len(AXES)):
+            index = np.zeros(npts, dtype=np.intp)
+            weight = np.ones(npts)
+            for axis, (lo, hi, w) in enumerate(brackets):
+                if (corner >> axis) & 1:
+                    index += hi * strides[axis]
+                    weight *= w
+                else:
+                    index += lo * strides[axis]
+                    weight *= 1 - w
+            if not np.any(weight):
+                continue
+            outne += weight[:, None] * ne[index]
+            outpk += weight[:, None] * peaks[index]
+        return outne, outpk
+
+    def validate(self, npts: int = 256, seed: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """Compare the table against the full model at random points of the lattice.
+
+        Args:
+            npts (int, optional): Number of points. Defaults to 256.
+            seed (Optional[int], optional): Seed of the random generator. Defaults to None.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Relative errors (`p50`, `p95` and `max`) of `Ne` and of each peak parameter.
+        """
+        rng = np.random.default_rng(seed)
+        coords = {}
+        for name in AXES:
+            axis = self.axes[name]
+            if name in PERIODS:
+                coords[name] = axis[0] + rng.uniform(0, PERIODS[name], npts)
+            else:
+                coords[name] = rng.uniform(axis[0], axis[-1], npts)
+        days = np.floor(coords['day'] - 1) % 365 + 1
+        uts = coords['ut'] % 24
+        ne, peaks = self.interpolate(
+            days, uts, coords['lat'], coords['lon'], coords['f107'])
+        truth, truthpk = _evaluate(
+            self.settings, self.year, self.alt, self.peaks,
+            days, uts, coords['lat'], coords['lon'], coords['f107']
+        )
+        errors = {'Ne': _stats(np.abs(10**(ne - truth) - 1))}
+        for idx, name in enumerate(self.peaks):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rel = np.abs(peaks[:, idx] / truthpk[:, idx] - 1)
+            errors[name] = _stats(rel)
+        return errors
+
+    def to_json(self) -> str:
+        """Description of the table as a JSON string: path, lattice, and interpolation errors.
+
+        Returns:
+            str: JSON string.
+        """
+        return json.dumps({
+            'path': str(self.path),
+            'axes': {name: self.axes[name].tolist() for name in AXES},
+            'year': self.year,
+            'errors': self.errors,
+        })
+
+
+def _stats(err: np.ndarray) -> Dict[str, float]:
+    err = err[np.isfinite(err)]
+    if err.size == 0:
+        return {'p50': float('nan'), 'p95': float('nan'), 'max': float('nan')}
+    return {
+        'p50': float(np.percentile(err, 50)),
+        'p95': float(np.percentile(err, 95)),
+        'max': float(err.max()),
+    }
+
+
+def _evaluate(
+    settings: Settings, year: int, alt: np.ndarray, peaks: Sequence[str],
+    days: np.ndarray, uts: np.ndarray, lats: np.ndarray, lons: np.ndarray,
+    f107: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Full model log10(Ne in cm^-3) and peak parameters at the given points.
+    iri = Iri2020()
+    csettings = ComputedSettings.from_settings(settings).select(['Ne'])
+    jf, oarr = csettings.expand(len(days), solar_overrides(f107))
+    outf = iri._modelcall(
+        np.asarray(lats, dtype=np.float32),
+        (np.asarray(lons, dtype=float) % 360).astype(np.float32),
+        np.broadcast_to(alt[:, None], (len(alt), len(days))),
+        np.full(len(days), year, dtype=np.int32),
+        np.asarray(days, dtype=np.int32),
+        np.asarray(uts, dtype=float) * 3600.0,
+        jf, oarr, csettings.logfile
+    )
+    ne = outf[0].T.astype(float) * 1e-6
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ne = np.where(ne > 0, np.log10(ne), np.nan)
+    index = [OARR_FIELDS[name].index for name in peaks]
+    return ne, oarr[index].T.astype(float)
+
+
+def build_table(
+    path: Path | str,
+    *,
+    days: Sequence[float] = tuple(range(15, 365, 30)),
+    uts: Sequence[float] = tuple(range(0, 24, 2)),
+    lats: Sequence[float] = tuple(range(-90, 91, 10)),
+    lons: Sequence[float] = tuple(range(0, 360, 30)),
+    f107: Sequence[float] = (70.0, 130.0, 200.0),
+    alt: Optional[np.ndarray] = None,
+    year: int = 2020,
+    settings: Optional[Settings] = None,
+    peaks: Sequence[str] = TABLE_PEAKS,
+    chunk: int = 4096,
+    validate: int = 256,
+    seed: Optional[int] = 0,
+) -> IriTable:
+    """Precompute an IRI-2020 climatology table.
+
+    The full model is evaluated at every lattice point, `chunk` profiles per
+    call, and the results are written to memory-mapped files in `path`.
+    The interpolation errors are then estimated at `validate` random points
+    and stored with the table.
+
+    Args:
+        path (Path | str): Directory to store the table in. Created if needed; an existing table is overwritten.
+        days (Sequence[float], optional): Days of the year of the lattice. Defaults to the middle of every month.
+        uts (Sequence[float], optional): Universal times of the lattice, in hours. Defaults to every two hours.
+        lats (Sequence[float], optional): Geographic latitudes of the lattice. Defaults to every 10 degrees.
+        lons (Sequence[float], optional): Geographic longitudes of the lattice. Defaults to every 30 degrees.
+        f107 (Sequence[float], optional): F10.7 values of the lattice (see :obj:`solar_overrides`). Defaults to (70, 130, 200).
+        alt (Optional[np.ndarray], optional): Altitude grid in kilometers. Defaults to :obj:`iri20py.alt_grid()`.
+        year (int, optional): Year to evaluate, which sets the epoch of the magnetic field. Defaults to 2020.
+        settings (Optional[Settings], optional): Settings to use. Driver values (F10.7, Rz12) are set by the lattice. Defaults to None.
+        peaks (Sequence[str], optional): Peak parameters to store, keyed by the names in :obj:`iri20py.base.OARR_FIELDS`. Defaults to :obj:`TABLE_PEAKS`.
+        chunk (int, optional): Number of profiles per model call. Defaults to 4096.
+        validate (int, optional): Number of random points used to estimate the interpolation errors. Zero skips the estimate. Defaults to 256.
+        seed (Optional[int], optional): Seed of the random validation points. Defaults to 0.
+
+    Raises:
+        KeyError: If a peak parameter is not known.
+        ValueError: If a lattice axis is empty or not strictly increasing.
+
+    Returns:
+        IriTable: The opened table.
+    """
+    path = Path(path)
+    settings = settings or Settings()
+    alt = np.asarray(alt_grid() if alt is None else alt, dtype=float)
+    for name in peaks:
+        if name not in OARR_FIELDS:
+            raise KeyError(f"Unknown peak parameter: {name}")
+    axes = {
+        name: np.asarray(values, dtype=float)
+        for name, values in zip(AXES, (days, uts, lats, lons, f107))
+    }
+    for name, axis in axes.items():
+        if axis.ndim != 1 or len(axis) == 0 or np.any(np.diff(axis) <= 0):
+            raise ValueError(f"Lattice axis {name} must be non-empty and strictly increasing")
+        if name in PERIODS and axis[-1] - axis[0] >= PERIODS[name]:
+            raise ValueError(f"Lattice axis {name} must span less than {PERIODS[name]}")
+    path.mkdir(parents=True, exist_ok=True)
+    shape = tuple(len(axes[name]) for name in AXES)
+    ne = np.lib.format.open_memmap(
+        path / _NE, mode='w+', dtype=np.float32, shape=shape + (len(alt),))
+    pk = np.lib.format.open_memmap(
+        path / _PEAKS, mode='w+', dtype=np.float32, shape=shape + (len(peaks),))
+    flatne = ne.reshape(-1, len(alt))
+    flatpk = pk.reshape(-1, len(peaks))
+    grid = np.meshgrid(*[axes[name] for name in AXES], indexing='ij')
+    grid = [g.ravel() for g in grid]
+    for start in range(0, len(grid[0]), chunk):
+        part = slice(start, start + chunk)
+        flatne[part], flatpk[part] = _evaluate(
+            settings, year, alt, peaks,
+            *[g[part] for g in grid]
+        )
+    ne.flush()
+    pk.flush()
+    del flatne, flatpk, ne, pk
+    meta = {
+        'version': __version__,
+        'created': datetime.now().isoformat(),
+        'year': year,
+        'axes': {name: axes[name].tolist() for name in AXES},
+        'alt': alt.tolist(),
+        'peaks': list(peaks),
+        'settings': settings.to_json(),
+    }
+    with open(path / _META, 'w') as fd:
+        json.dump(meta, fd)
+    table = IriTable(path)
+    if validate > 0:
+        table.errors = table.validate(validate, seed)
+        meta['errors'] = table.errors
+        with open(path / _META, 'w') as fd:
+            json.dump(meta, fd)
+    return table
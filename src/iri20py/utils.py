@@ -1,8 +1,8 @@
 # %%
 from __future__ import annotations
-from typing import Tuple, SupportsFloat as Numeric
-from numpy import cumsum, float32, linspace, ndarray, tanh
-from datetime import datetime
+from typing import Sequence, Tuple, SupportsFloat as Numeric
+from numpy import asarray, cumsum, datetime64, float32, int32, linspace, ndarray, tanh
+from datetime import datetime, UTC
 
 """
 iri20py.utils
@@ -28,6 +28,45 @@ def iridate(t: datetime) -> Tuple[int, int, Numeric]:
     return (year, idate, utsec)
 
 
+def iridates(t: Sequence[datetime] | ndarray) -> Tuple[ndarray, ndarray, ndarray]:
+    """## Convert datetimes to GLOW dates and UT seconds.
+    Vectorized version of `iridate`.
+
+    ### Args:
+        - `t (Sequence[datetime] | ndarray)`: Time zone naive datetime objects, or `datetime64` array.
+
+    ### Returns:
+        - `Tuple[ndarray, ndarray, ndarray]`: years, days of year, and UT seconds.
+    """
+    t = asarray(t, dtype='datetime64[us]')
+    year = t.astype('datetime64[Y]')
+    day = t.astype('datetime64[D]')
+    idate = (day - year).astype(int32) + 1
+    utsec = (t - day).astype(float) / 1e6
+    return (year.astype(int32) + 1970, idate, utsec)
+
+
+def utctimes(t: datetime | Sequence[datetime] | ndarray, tzaware: bool = False) -> ndarray:
+    """## Convert datetimes to time zone naive UTC `datetime64` values.
+
+    ### Args:
+        - `t (datetime | Sequence[datetime] | ndarray)`: Datetime object(s), or `datetime64` values (UTC).
+        - `tzaware (bool, optional)`: If the datetime objects are time zone aware. If true, they are recast to UTC. Defaults to False.
+
+    ### Returns:
+        - `ndarray`: `datetime64[us]` array, zero-dimensional for a single datetime.
+    """
+    if isinstance(t, datetime):
+        t = (t.astimezone(UTC) if tzaware else t).replace(tzinfo=None)
+    elif not isinstance(t, (ndarray, datetime64)):
+        t = [
+            (time.astimezone(UTC) if tzaware else time).replace(tzinfo=None)
+            if isinstance(time, datetime) else time
+            for time in t
+        ]
+    return asarray(t, dtype='datetime64[us]')
+
+
 def alt_grid(num: int = 250, minalt: Numeric = 60, dmin: Numeric = 0.5, dmax: Numeric = 4) -> ndarray:
     """## Generate a non-linear altitude grid.
     The altitude grid uses the hyperbolic tangent function to create a non-linear grid.
@@ -0,0 +1,427 @@
+# %%
+from __future__ import annotations
+import argparse
+import importlib.util
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from xarray import Dataset
+
+from iri20py import Iri2020
+from iri20py.base import DATADIR, DENSITIES, TEMPERATURES, OARR_FIELDS
+from iri20py.iri20shim import iri20_eval  # type: ignore
+from iri20py.settings import ComputedSettings, Settings
+from iri20py.utils import iridates
+
+"""
+Golden outputs
+==============
+
+Reference corpus of IRI-2020 outputs, and the harness that compares an
+evaluation path against it.
+
+The corpus holds the OUTF profiles and the OARR parameters of single-profile
+model calls (`IRI_SUB`) across seasons, latitudes, local times, low (2009)
+and high (2014) solar activity, and the main model options of
+:obj:`iri20py.settings.Settings`. Sites revisited after a nearby site expose
+state that IRI_SUB carries over between the calls. The indices of these years are final, so
+the corpus does not change when the index files are updated.
+
+Regenerate the corpus with `python tests/golden.py --generate` after an
+intended change of the model outputs, and commit it with the change.
+
+The baseline corpus holds the same cases evaluated by the model as it was
+before the caching changes of IRI_SUB (the magnetic coordinates of a
+location, the indices of a date, and the height-independent terms of the
+altitude loop), so that these are checked against the outputs of the
+unmodified model rather than against outputs of their own. It is generated
+with the extension module of a build of the baseline commit:
+
+    git worktree add /tmp/baseline 3076ffc
+    pip wheel --no-build-isolation --no-deps /tmp/baseline -w /tmp/wheel
+    python -m zipfile -e /tmp/wheel/iri20py-*.whl /tmp/baseline-build
+    python tests/golden.py --baseline /tmp/baseline-build/iri20py/iri20shim*.so
+
+The baseline model carries state over between calls, which later fixes
+remove: the Te=Ti height XTETI of a previous call where Ti stays below Te,
+and the EUV flux factors of PRIMPR. Every case is therefore evaluated twice
+in a row after each of two priming cases with different Te=Ti heights; the
+outputs that differ between the primings depend on the previous call and
+are stored as NaN, which is not compared. OARR(21) of the baseline is the
+Ti(430 km) of a previous Bil-1981 call instead of the case's, and is not
+compared either.
+"""
+
+CORPUS = Path(__file__).parent / 'golden' / 'corpus.npz'
+BASELINE = Path(__file__).parent / 'golden' / 'baseline.npz'
+# OARR parameters that the baseline model does not compute for the case
+BASELINE_EXCLUDED = ('Ti-MOD(430km)',)
+# Cases evaluated before each case of the baseline corpus: Te=Ti at 3778 km
+# and at 1008 km
+BASELINE_PRIMES = (2, 3)
+# Altitude grid of the corpus, km
+ALT = np.concatenate([
+    np.arange(60, 200, 5), np.arange(200, 1000, 20), np.arange(1000, 2001, 100)
+]).astype(float)
+# OUTF rows stored in the corpus (densities and temperatures)
+NROWS = 11
+
+# Model options, evaluated on a subset of the points
+VARIANTS: Dict[str, Settings] = {
+    'default': Settings(),
+    'fof2-ccir': Settings(fof2_model='CCIR'),
+    'b0-bil-2000': Settings(b0_b1_model='Bil-2000'),
+    'b0-gulyaeva': Settings(b0_b1_model='Gulayeva-1987'),
+    'hmf2-amtb': Settings(hmf2_model='AMTB'),
+    'topside-nequick': Settings(topside_model='NeQuick'),
+    'topside-iri90': Settings(topside_model='IRI-90'),
+    'no-storm': Settings(fof2_storm_model=False),
+    'd-region-ft2001': Settings(d_region='FT-2001 & DRS-1995'),
+    'legacy-te-ti-ni': Settings(
+        te_topside='Bil-1985', ion_temp_model='Bil-1981', ni_model='DS-95 & DY-85'),
+    'fixed-indices': Settings(f107=(120, 110), rz12=60, ig12=70),
+}
+YEARS = (2009, 2014)  # solar minimum, solar maximum
+SEASONS = ((3, 20), (6, 21), (9, 22), (12, 21))
+# lat, lon: auroral, midlatitude, low latitude, equatorial in both hemispheres
+LOCATIONS = (
+    (-70.0, 40.0), (-35.3, 149.1), (-12.0, 283.0),
+    (0.4, 30.25), (20.0, 200.0), (45.0, 7.0),
+    (69.65, 18.96),
+)
+UTS = (2, 14)
+# Sites evaluated in this order at 6 UT on each day of the corpus: an
+# integer and a non-integer site, each revisited after a nearby site
+REVISITS = (
+    (40.0, 255.0), (40.7, 255.0), (40.0, 255.0),
+    (-33.87, 151.21), (-33.5, 151.21), (-33.87, 151.21),
+)
+# Points of the model option variants
+VARIANT_LOCATIONS = ((40.0, 255.0, 18), (-12.0, 283.0, 3))
+
+# Evaluation path: (settings, times, lats, lons, alt) -> Dataset with the
+# profiles along (`point`, `alt_km`) and the OARR parameters along `point`,
+# in the units of :obj:`iri20py.Iri2020.evaluate_batch`.
+Evaluator = Callable[[Settings, np.ndarray, np.ndarray, np.ndarray, np.ndarray], Dataset]
+
+
+@dataclass(frozen=True)
+class Tolerance:
+    """Allowed deviation, `|value - reference| <= atol + rtol*|reference|`."""
+    rtol: float
+    atol: float
+
+
+@dataclass(frozen=True)
+class Corpus:
+    """Reference corpus."""
+    names: Tuple[str, ...]
+    """Names of the settings variants."""
+    settings: Tuple[Settings, ...]
+    """Settings variants."""
+    variant: np.ndarray
+    """Settings variant of each case."""
+    time: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    alt: np.ndarray
+    outf: np.ndarray
+    """OUTF rows 0-10 (m^-3, K) of each case, (case, row, alt); NaN is not compared."""
+    oarr: np.ndarray
+    """OARR of each case, (case, 100); NaN is not compared."""
+
+    def __len__(self) -> int:
+        return len(self.variant)
+
+    def case(self, idx: int) -> str:
+        """Description of a case."""
+        return (
+            f'{self.names[self.variant[idx]]} {self.time[idx]} '
+            f'lat={self.lat[idx]:g} lon={self.lon[idx]:g}'
+        )
+
+
+@dataclass(frozen=True)
+class Deviation:
+    """Worst deviation of a variable from the corpus."""
+    variable: str
+    ratio: float
+    """Deviation relative to the tolerance; above 1 fails."""
+    error: float
+    """Absolute deviation."""
+    value: float
+    reference: float
+    case: int
+    alt: Optional[float]
+    """Altitude, for profiles."""
+
+    @property
+    def passed(self) -> bool:
+        return bool(self.ratio <= 1)
+
+
+@dataclass(frozen=True)
+class Report:
+    """Comparison of an evaluation path with the corpus."""
+    corpus: Corpus
+    deviations: Tuple[Deviation, ...]
+    """Worst deviation of each variable, largest ratio first."""
+
+    @property
+    def passed(self) -> bool:
+        return all(dev.passed for dev in self.deviations)
+
+    @property
+    def failures(self) -> List[Deviation]:
+        return [dev for dev in self.deviations if not dev.passed]
+
+    def worst(self, count: int = 10) -> str:
+        """Table of the `count` worst deviations."""
+        lines = [f'{"variable":<16} {"ratio":>9} {"error":>11} {"value":>11} {"reference":>11}  case']
+        for dev in self.deviations[:count]:
+            where = self.corpus.case(dev.case)
+            if dev.alt is not None:
+                where += f' alt={dev.alt:g}'
+            lines.append(
+                f'{dev.variable:<16} {dev.ratio:9.3g} {dev.error:11.4g} '
+                f'{dev.value:11.4g} {dev.reference:11.4g}  {where}'
+            )
+        return '\n'.join(lines)
+
+    def __str__(self) -> str:
+        status = 'passed' if self.passed else f'{len(self.failures)} variables failed'
+        return f'{len(self.corpus)} cases, {len(self.deviations)} variables, {status}\n' + self.worst()
+
+
+# Per-variable tolerances, in the units of the datasets. The build uses
+# fast math, so the operations may be reordered on other CPUs; the absolute
+# tolerances cover the quantities that are close to zero.
+TOLERANCES: Dict[str, Tolerance] = {
+    **{key: Tolerance(1e-4, 1e-3) for key in OARR_FIELDS},
+    **{name: Tolerance(1e-4, 1e-3) for name, _, _ in DENSITIES},
+    **{name: Tolerance(1e-4, 0.1) for name, _, _ in TEMPERATURES},
+}
+
+
+def load(path: Path = CORPUS) -> Corpus:
+    """Load the reference corpus."""
+    with np.load(path) as data:
+        return Corpus(
+            names=tuple(str(name) for name in data['names']),
+            settings=tuple(Settings.from_json(str(s)) for s in data['settings']),
+            variant=data['variant'],
+            time=data['time'],
+            lat=data['lat'],
+            lon=data['lon'],
+            alt=data['alt'],
+            outf=data['outf'],
+            oarr=data['oarr'],
+        )
+
+
+def cases() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Settings variant, time, latitude and longitude of the corpus cases."""
+    rows = []
+    for year, (month, day), (lat, lon), ut in product(YEARS, SEASONS, LOCATIONS, UTS):
+        rows.append((0, datetime(year, month, day, ut), lat, lon))
+    for year, (month, day) in product(YEARS, SEASONS):
+        for lat, lon in REVISITS:
+            rows.append((0, datetime(year, month, day, 6), lat, lon))
+    for idx in range(1, len(VARIANTS)):
+        for year, (month, day), (lat, lon, ut) in product(YEARS, SEASONS, VARIANT_LOCATIONS):
+            rows.append((idx, datetime(year, month, day, ut), lat, lon))
+    variant, time, lat, lon = zip(*rows)
+    return (
+        np.asarray(variant), np.asarray(time, dtype='datetime64[s]'),
+        np.asarray(lat), np.asarray(lon)
+    )
+
+
+def generate(path: Path = CORPUS, *, iri20_eval: Callable[..., None] = iri20_eval, primes: Sequence[int] = ()) -> Corpus:
+    """Evaluate and store the reference corpus, one profile per model call.
+
+    With `primes`, each case is evaluated twice in a row after each of the
+    priming cases, and the outputs that differ between the primings are
+    stored as NaN.
+
+    Args:
+        path (Path, optional): Output file. Defaults to CORPUS.
+        iri20_eval (Callable[..., None], optional): Model call, of the extension module of a build. Defaults to that of the installed build.
+        primes (Sequence[int], optional): Indices of the priming cases. Defaults to (), i.e. one call per case.
+    """
+    Iri2020()  # initialize the model and the data files
+    variant, time, lat, lon = cases()
+    year, day, ut = iridates(time.astype('datetime64[us]'))
+    settings = [ComputedSettings.from_settings(s) for s in VARIANTS.values()]
+    alt = ALT.astype(np.float32)
+
+    def call(idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        computed = settings[variant[idx]]
+        out = np.zeros((20, len(ALT)), dtype=np.float32, order='F')
+        arr = computed.oarr.copy()
+        iri20_eval(
+            computed.jf, 0, lat[idx], lon[idx] % 360, year[idx], -day[idx],
+            ut[idx] / 3600.0 + 25, alt, out, arr, str(DATADIR), computed.logfile
+        )
+        return out[:NROWS], arr
+
+    outf = np.zeros((len(variant), NROWS, len(ALT)), dtype=np.float32)
+    oarr = np.zeros((len(variant), 100), dtype=np.float32)
+    for idx in range(len(variant)):
+        if not primes:
+            outf[idx], oarr[idx] = call(idx)
+            continue
+        results = []
+        for prime in primes:
+            call(prime)
+            call(idx)
+            results.append(call(idx))
+        (out, arr), rest = results[0], results[1:]
+        for other, other_arr in rest:
+            out = np.where(out == other, out, np.nan)
+            arr = np.where(arr == other_arr, arr, np.nan)
+        outf[idx], oarr[idx] = out, arr
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        names=np.asarray(list(VARIANTS)),
+        settings=np.asarray([s.to_json() for s in VARIANTS.values()]),
+        variant=variant, time=time, lat=lat, lon=lon, alt=ALT,
+        outf=outf, oarr=oarr,
+    )
+    return load(path)
+
+
+def generate_baseline(module: Path, path: Path = BASELINE) -> Corpus:
+    """Evaluate and store the baseline corpus with the extension module of the baseline build.
+
+    Args:
+        module (Path): `iri20shim` extension module of the baseline build.
+        path (Path, optional): Output file. Defaults to BASELINE.
+    """
+    # Loaded as a top-level module, next to the iri20py.iri20shim of this build.
+    spec = importlib.util.spec_from_file_location('iri20shim', module)
+    shim = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(shim)
+    shim.iri20_init(str(DATADIR))
+    return generate(path, iri20_eval=shim.iri20_eval, primes=BASELINE_PRIMES)
+
+
+def reference(corpus: Corpus) -> Dict[str, np.ndarray]:
+    """Corpus outputs in the units of the datasets: profiles as (case, alt), OARR parameters as (case,)."""
+    out = {name: corpus.outf[:, idx].astype(float)*1e-6 for name, idx, _ in DENSITIES}
+    out.update({name: corpus.outf[:, idx].astype(float) for name, idx, _ in TEMPERATURES})
+    for key, field in OARR_FIELDS.items():
+        out[key] = corpus.oarr[:, field.index].astype(float)*field.scale
+    return out
+
+
+def _deviation(name: str, value: np.ndarray, ref: np.ndarray, tol: Tolerance, corpus: Corpus) -> Deviation:
+    error = np.abs(value - ref)
+    same = (value == ref) | np.isnan(ref)
+    ratio = np.where(same, 0.0, error / (tol.atol + tol.rtol*np.abs(ref)))
+    ratio = np.where(np.isnan(ratio), np.inf, ratio)
+    worst = np.unravel_index(np.argmax(ratio), ratio.shape)
+    return Deviation(
+        variable=name,
+        ratio=float(ratio[worst]),
+        error=float(error[worst]),
+        value=float(value[worst]),
+        reference=float(ref[worst]),
+        case=int(worst[0]),
+        alt=float(corpus.alt[worst[1]]) if len(worst) > 1 else None,
+    )
+
+
+def compare(
+    evaluate: Evaluator,
+    corpus: Optional[Corpus] = None,
+    *,
+    variables: Optional[Sequence[str]] = None,
+    tolerances: Optional[Mapping[str, Tolerance]] = None,
+) -> Report:
+    """Compare an evaluation path with the corpus.
+
+    The path is called once per settings variant with the points of the
+    variant. The variables that the path does not return are skipped, unless
+    they are listed in `variables`.
+
+    Args:
+        evaluate (Evaluator): Evaluation path.
+        corpus (Optional[Corpus], optional): Reference corpus. Defaults to None, i.e. :obj:`load()`.
+        variables (Optional[Sequence[str]], optional): Variables to compare. Defaults to None, i.e. all variables returned by the path.
+        tolerances (Optional[Mapping[str, Tolerance]], optional): Tolerances that replace those of :obj:`TOLERANCES`. Defaults to None.
+
+    Raises:
+        KeyError: If a variable of `variables` is not returned by the path.
+
+    Returns:
+        Report: Worst deviation of each variable.
+    """
+    if corpus is None:
+        corpus = load()
+    tol = {**TOLERANCES, **(tolerances or {})}
+    refs = reference(corpus)
+    names = list(refs) if variables is None else list(variables)
+    values = {name: np.full_like(refs[name], np.nan) for name in names}
+    found = set(names)
+    for idx, settings in enumerate(corpus.settings):
+        sel = np.flatnonzero(corpus.variant == idx)
+        if len(sel) == 0:
+            continue
+        ds = evaluate(
+            settings, corpus.time[sel].astype('datetime64[us]'),
+            corpus.lat[sel], corpus.lon[sel], corpus.alt.copy()
+        )
+        for name in names:
+            if name not in ds.data_vars:
+                found.discard(name)
+                continue
+            values[name][sel] = np.asarray(ds[name].values, dtype=float)
+    missing = [name for name in names if name not in found]
+    if variables is not None and missing:
+        raise KeyError(f'Variables not returned by the evaluation path: {missing}')
+    deviations = [
+        _deviation(name, values[name], refs[name], tol[name], corpus)
+        for name in names if name in found
+    ]
+    deviations.sort(key=lambda dev: dev.ratio, reverse=True)
+    return Report(corpus, tuple(deviations))
+
+
+def baseline_variables(corpus: Corpus) -> List[str]:
+    """Variables compared with the baseline corpus."""
+    return [
+        name for name in reference(corpus)
+        if name not in BASELINE_EXCLUDED and name not in ('lat', 'lon')
+    ]
+
+
+def evaluate_batch(settings: Settings, times: np.ndarray, lats: np.ndarray, lons: np.ndarray, alt: np.ndarray) -> Dataset:
+    """Evaluation path of :obj:`iri20py.Iri2020.evaluate_batch`."""
+    return Iri2020().evaluate_batch(times, lats, lons, alt, settings)[1]
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description='Generate the golden output corpus, or compare the batch evaluation with it.')
+    parser.add_argument('--generate', action='store_true', help='Regenerate the corpus.')
+    parser.add_argument('--baseline', type=Path, metavar='MODULE',
+                        help='Regenerate the baseline corpus with this iri20shim module of the baseline build.')
+    args = parser.parse_args(argv)
+    if args.generate:
+        corpus = generate()
+        print(f'{CORPUS}: {len(corpus)} cases')
+    if args.baseline is not None:
+        corpus = generate_baseline(args.baseline)
+        print(f'{BASELINE}: {len(corpus)} cases')
+        print(compare(evaluate_batch, corpus, variables=baseline_variables(corpus)))
+    print(compare(evaluate_batch))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from iri20py import Iri2020
+
+ALT = np.arange(60, 2000.01, 0.25)
+
+
+@pytest.mark.parametrize('time, lat, lon', [
+    (datetime(2022, 3, 21, 18), 30.5, 271.0),  # day, D region from 65 km
+    (datetime(2022, 3, 21, 5), 30.5, 271.0),  # night, D region from 80 km
+    (datetime(2014, 12, 21, 14), 69.65, 18.96),
+])
+def test_adaptive_accuracy(time, lat, lon):
+    iri = Iri2020()
+    rtol = 0.01
+    _, ref = iri.evaluate(time, lat, lon, ALT, variables=['Ne'])
+    _, ds = iri.evaluate_adaptive(time, lat, lon, ALT, rtol=rtol, variables=['Ne'])
+    assert ds.attrs['evaluations'] < len(ALT) / 10
+    ref = ref.Ne.values
+    out = ds.Ne.values
+    valid = ref > 0
+    # Fill value of the model below HNEA
+    assert not valid.all()
+    np.testing.assert_array_equal(out[~valid], ref[~valid])
+    np.testing.assert_allclose(out[valid], ref[valid], rtol=rtol)
@@ -0,0 +1,95 @@
+# %%
+from __future__ import annotations
+import json
+
+import numpy as np
+import pytest
+
+from iri20py import Iri2020
+from iri20py.settings import Settings
+
+TIMES = np.asarray(['2014-03-20T12', '2014-06-21T18', '2014-12-21T03'], dtype='datetime64[us]')
+LATS = np.asarray([45.3, -12.05, 69.65])
+LONS = np.asarray([7.1, 283.0, 18.96])
+ALT = np.arange(100, 1001, 50, dtype=float)
+
+
+def test_overrides_b1():
+    iri = Iri2020()
+    with pytest.raises(ValueError):
+        iri.evaluate_batch(TIMES, LATS, LONS, ALT, Settings(), overrides={'b1': [np.nan, 2.5, np.nan]})
+    _, ds = iri.evaluate_batch(
+        TIMES, LATS, LONS, ALT, Settings(),
+        overrides={'b0': [np.nan, 120.0, np.nan], 'b1': [np.nan, 2.5, np.nan]})
+    _, ref = iri.evaluate_batch(TIMES, LATS, LONS, ALT, Settings())
+    assert ds.B0.values[1] == 120.0
+    assert ds.B1.values[1] == 2.5
+    np.testing.assert_array_equal(ds.Ne.values[[0, 2]], ref.Ne.values[[0, 2]])
+    # Settings wide B0 and B1
+    _, ds = iri.evaluate_batch(TIMES, LATS, LONS, ALT, Settings(b0_value=120.0, b1_value=2.5))
+    np.testing.assert_array_equal(ds.B1.values, 2.5)
+
+
+def test_ensemble():
+    iri = Iri2020()
+    rz12 = np.asarray([20.0, 80.0, 140.0])
+    _, ens = iri.evaluate_ensemble(TIMES, LATS, LONS, ALT, {'rz12': rz12, 'ig12': rz12}, Settings())
+    assert ens.Ne.dims == ('ensemble', 'point', 'alt_km')
+    np.testing.assert_array_equal(ens.RZ12.values, np.repeat(rz12[:, None], len(TIMES), axis=1))
+    # Each member changes the output
+    assert np.all(np.diff(ens.nmF2.values, axis=0) > 0)
+    f107 = np.asarray([80.0, 150.0, 220.0])
+    _, ens = iri.evaluate_ensemble(TIMES, LATS, LONS, ALT, {'f107': f107, 'f107_81': f107}, Settings())
+    assert np.all(np.diff(ens.Tn.values[..., -1], axis=0) > 0)
+    b1 = np.asarray([1.5, 2.0, 2.5])
+    with pytest.raises(ValueError):
+        iri.evaluate_ensemble(TIMES, LATS, LONS, ALT, {'b1': b1}, Settings())
+    _, ens = iri.evaluate_ensemble(TIMES, LATS, LONS, ALT, {'b0': np.full(3, 120.0), 'b1': b1}, Settings())
+    np.testing.assert_array_equal(ens.B1.values, np.repeat(b1[:, None], len(TIMES), axis=1))
+    assert np.all(np.ptp(ens.Ne.values, axis=0).max(axis=-1) > 0)
+
+
+def test_compare():
+    # The variants of a point share its magnetic coordinates in the model;
+    # each variant must still match a separate evaluation.
+    iri = Iri2020()
+    variants = [Settings(topside_model='NeQuick'), Settings(fof2_model='CCIR'), Settings(te_topside='Bil-1985')]
+    _, cmp = iri.compare(variants, TIMES, LATS, LONS, ALT)
+    for i, settings in enumerate(variants):
+        _, ref = iri.evaluate_batch(TIMES, LATS, LONS, ALT, settings)
+        for key in ref.data_vars:
+            np.testing.assert_array_equal(cmp[key].values[i], ref[key].values, err_msg=key)
+
+
+def test_empty():
+    iri = Iri2020()
+    _, ref = iri.evaluate_batch(TIMES, LATS, LONS, ALT, Settings())
+    empty = np.asarray([], dtype=float)
+    _, ds = iri.evaluate_batch(np.asarray([], dtype='datetime64[us]'), empty, empty, ALT, Settings())
+    assert ds.sizes['point'] == 0 and ds.sizes['alt_km'] == len(ALT)
+    assert set(ds.variables) == set(ref.variables)
+    _, ds = iri.lowlevel_batch(empty, empty, ALT, empty, empty, empty, Settings())
+    assert ds.Ne.shape == (0, len(ALT))
+
+
+def test_track():
+    # Profiles of 3, 1 and 5 samples, each evaluated as a profile of its own altitudes
+    iri = Iri2020()
+    settings = Settings(cgm_compute=True)
+    alts = [np.asarray([150.0, 300.0, 450.0]), np.asarray([250.0]), np.asarray([100.0, 200.0, 400.0, 600.0, 800.0])]
+    times = np.concatenate([np.full(len(a), t) for t, a in zip(TIMES, alts)])
+    lats = np.concatenate([np.full(len(a), x) for x, a in zip(LATS, alts)])
+    lons = np.concatenate([np.full(len(a), x) for x, a in zip(LONS, alts)])
+    _, ds = iri.evaluate_track(times, lats, lons, np.concatenate(alts), settings)
+    start = 0
+    for time, lat, lon, alt in zip(TIMES.tolist(), LATS, LONS, alts):
+        _, ref = iri.evaluate(time, lat, lon, alt, settings)
+        part = ds.isel(sample=slice(start, start + len(alt)))
+        for key in ('Ne', 'Te', 'Ti', 'O+'):
+            np.testing.assert_allclose(part[key].values, ref[key].values, rtol=1e-6, err_msg=key)
+        for key in ('cgm_lat', 'cgm_lon', 'hmF2'):
+            np.testing.assert_allclose(part[key].values, json.loads(ref.attrs[key])['value'], rtol=1e-6, err_msg=key)
+        start += len(alt)
+    empty = np.asarray([], dtype=float)
+    _, ds = iri.evaluate_track(np.asarray([], dtype='datetime64[us]'), empty, empty, empty, Settings())
+    assert ds.sizes['sample'] == 0 and 'Ne' in ds
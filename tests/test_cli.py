@@ -0,0 +1,109 @@
+# %%
+from __future__ import annotations
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from iri20py.batch import iter_points, main, read_points, scan_points
+
+CSV = """time,lat,lon,alt
+2014-03-20T12:00:00Z,45.3,7.1,300
+2014-03-20T14:00:00+02:00,45.3,7.1,400
+2014-06-21T18:00:00,-12.05,283.0,250
+2014-06-21T13:00:00-0500,-12.05,283.0,500
+2014-12-21T03:00:00,69.65,18.96,350
+"""
+
+
+def test_read_points(tmp_path):
+    path = tmp_path / 'points.csv'
+    path.write_text(CSV)
+    points = read_points(path)
+    np.testing.assert_array_equal(points['time'], np.asarray([
+        '2014-03-20T12', '2014-03-20T12', '2014-06-21T18', '2014-06-21T18', '2014-12-21T03'
+    ], dtype='datetime64[us]'))
+    path.write_text('time,lat,lon\n2014-03-20 noon,45.3,7.1\n2014-03-20T12Z,45.3,7.1\n')
+    with pytest.raises(ValueError):
+        read_points(path)
+
+
+def test_iter_points(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / 'points.csv'
+    path.write_text(CSV)
+    points = read_points(path)
+    # Row groups of 3 points do not line up with chunks of 2
+    ppath = tmp_path / 'points.parquet'
+    pq.write_table(pa.table(points), ppath, row_group_size=3)
+    for src in (path, ppath):
+        assert scan_points(src) == (5, ['time', 'lat', 'lon', 'alt'])
+        chunks = list(iter_points(src, 2))
+        assert [len(c['time']) for c in chunks] == [2, 2, 1]
+        for key, val in points.items():
+            np.testing.assert_array_equal(np.concatenate([c[key] for c in chunks]), val)
+
+
+def test_iter_points_memory(tmp_path):
+    path = tmp_path / 'points.csv'
+    npts = 200_000
+    with open(path, 'w') as fd:
+        fd.write('time,lat,lon\n')
+        for idx in range(npts):
+            fd.write(f'2014-03-20T{idx % 24:02d}:00:00,{idx % 180 - 90},{idx % 360}\n')
+    assert scan_points(path)[0] == npts
+    tracemalloc.start()
+    try:
+        count = sum(len(c['time']) for c in iter_points(path, 1000))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count == npts
+    # The whole input, as numpy arrays alone, is 4.8 MB
+    assert peak < 2 * 2**20
+
+
+def test_resume(tmp_path, capsys):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'points.csv'
+    path.write_text(CSV)
+    out = tmp_path / 'out'
+    args = [str(path), str(out), '-j', '1', '-c', '2']
+    assert main(args) == 0
+    parts = sorted(out.glob('part-*.parquet'))
+    assert len(parts) == 3
+    mtimes = [part.stat().st_mtime_ns for part in parts]
+    capsys.readouterr()
+    # The second run skips all the parts
+    assert main(args) == 0
+    assert 'Resuming: 3/3 chunks already done' in capsys.readouterr().err
+    assert [part.stat().st_mtime_ns for part in parts] == mtimes
+    # A changed input is a different job
+    path.write_text(CSV.replace('45.3', '45.4'))
+    os.utime(path, ns=(mtimes[0] + 10**9, mtimes[0] + 10**9))
+    assert main(args) == 1
+    assert main(args + ['--overwrite']) == 0
+    assert all(part.stat().st_mtime_ns != mtime for part, mtime in zip(parts, mtimes))
+
+
+def test_chunk(tmp_path):
+    path = tmp_path / 'points.csv'
+    path.write_text(CSV)
+    with pytest.raises(SystemExit):
+        main([str(path), str(tmp_path / 'out'), '-c', '0'])
+
+
+def test_workers(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    path = tmp_path / 'points.csv'
+    path.write_text(CSV)
+    assert main([str(path), str(tmp_path / 'serial'), '-j', '1', '-c', '1']) == 0
+    assert main([str(path), str(tmp_path / 'pool'), '-j', '2', '-c', '1']) == 0
+    serial = sorted((tmp_path / 'serial').glob('part-*.parquet'))
+    pool = sorted((tmp_path / 'pool').glob('part-*.parquet'))
+    assert [p.name for p in pool] == [p.name for p in serial] and len(serial) == 5
+    for a, b in zip(serial, pool):
+        assert pq.read_table(a).equals(pq.read_table(b))
@@ -0,0 +1,66 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from iri20py import Iri2020, IonosphereField, alt_grid
+from iri20py.settings import Settings
+
+TIME = datetime(2022, 3, 21, 18)
+REGION = {'lat': (20.0, 50.0), 'lon': (250.0, 290.0)}
+
+
+@pytest.fixture(scope='module')
+def field():
+    return IonosphereField(TIME, **REGION, alt=alt_grid(), settings=Settings())
+
+
+@pytest.mark.parametrize('lat, lon', [(38.56, 261.71), (23.07, 252.59), (43.15, 284.86), (30.5, 271.0)])
+def test_accuracy(field, lat, lon):
+    alt = np.arange(100, 950, 7.3)
+    _, ds = Iri2020().evaluate(TIME, lat, lon, alt, Settings())
+    np.testing.assert_allclose(field(lat, lon, alt), ds.Ne.values, rtol=0.005)
+
+
+def test_fill_value(field):
+    # The model does not compute Ne below HNEA (65 km by day); these nodes
+    # must not be interpolated as a density.
+    alt = np.arange(60, 100, 0.5)
+    _, ds = Iri2020().evaluate(TIME, 30.5, 271.0, alt, Settings())
+    ref = ds.Ne.values
+    ne = field(30.5, 271.0, alt)
+    valid = ~np.isnan(ne)
+    assert np.all(np.isnan(ne[ref <= 0]))
+    assert valid[alt >= 66].all()
+    np.testing.assert_allclose(ne[valid], ref[valid], rtol=0.02)
+    assert np.isnan(field.to_dataset().Ne.sel(alt_km=60.0).values).all()
+
+
+def test_gradient(field):
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(21, 49, 50)
+    lon = rng.uniform(251, 289, 50)
+    alt = rng.uniform(90, 900, 50)
+    ne, dlat, dlon, dalt = field.gradient(lat, lon, alt)
+    np.testing.assert_allclose(ne, field(lat, lon, alt))
+    for grad, step, shift in ((dlat, 1e-4, (1, 0, 0)), (dlon, 1e-4, (0, 1, 0)), (dalt, 1e-3, (0, 0, 1))):
+        dx = np.multiply(step, shift)
+        fd = (field(lat + dx[0], lon + dx[1], alt + dx[2])
+              - field(lat - dx[0], lon - dx[1], alt - dx[2])) / (2 * step)
+        np.testing.assert_allclose(grad, fd, rtol=1e-4, atol=1e-6 * np.abs(grad).max())
+
+
+def test_refine():
+    field = IonosphereField(TIME, **REGION, alt=alt_grid(), settings=Settings(), refine=4)
+    coarse = field.evaluated
+    assert coarse == 16 * 21
+    field(30.5, 271.0, 300.0)
+    # Only the profiles of the stencil of the query are evaluated.
+    assert coarse < field.evaluated <= coarse + 16
+    count = field.evaluated
+    field(30.55, 271.05, [200.0, 400.0])
+    assert field.evaluated == count
+    _, ds = Iri2020().evaluate(TIME, 30.5, 271.0, np.array([300.0]), Settings())
+    np.testing.assert_allclose(field(30.5, 271.0, 300.0), ds.Ne.values[0], rtol=0.002)
@@ -0,0 +1,145 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+import json
+
+import numpy as np
+import pytest
+from xarray import Dataset
+
+from iri20py import Iri2020
+from iri20py.base import DENSITIES, TEMPERATURES, OARR_FIELDS
+from iri20py.settings import ComputedSettings, Settings
+
+from golden import BASELINE, Tolerance, baseline_variables, compare, evaluate_batch, load
+
+# Each evaluation path is compared with the golden corpus (see golden.py).
+CORPUS = load()
+# Outputs of the model before the caching changes of IRI_SUB
+BASELINE_CORPUS = load(BASELINE)
+
+
+def evaluate_single(settings: Settings, times: np.ndarray, lats: np.ndarray, lons: np.ndarray, alt: np.ndarray) -> Dataset:
+    # One model call per profile, in reverse order, so that state carried
+    # over between the calls shows up as a deviation.
+    iri = Iri2020()
+    computed = ComputedSettings.from_settings(settings)
+    profiles = {}
+    for idx in reversed(range(len(times))):
+        _, ds = iri.evaluate(times[idx].item(), lats[idx], lons[idx], alt, computed)
+        profiles[idx] = ds
+    profiles = [profiles[idx] for idx in range(len(times))]
+    out = Dataset()
+    for name, _, _ in DENSITIES + TEMPERATURES:
+        out[name] = (('point', 'alt_km'), np.stack([ds[name].values for ds in profiles]))
+    for key in OARR_FIELDS:
+        if key in ('lat', 'lon'):  # coordinates of the other paths
+            continue
+        values = [json.loads(ds.attrs[key])['value'] for ds in profiles]
+        out[key] = (('point',), np.asarray(values, dtype=float))
+    return out
+
+
+def evaluate_track(settings: Settings, times: np.ndarray, lats: np.ndarray, lons: np.ndarray, alt: np.ndarray) -> Dataset:
+    npts, nalt = len(times), len(alt)
+    _, ds = Iri2020().evaluate_track(
+        np.repeat(times, nalt), np.repeat(lats, nalt), np.repeat(lons, nalt),
+        np.tile(alt, npts), settings
+    )
+    out = Dataset()
+    for name, var in ds.data_vars.items():
+        values = var.values.reshape(npts, nalt)
+        if name in OARR_FIELDS:
+            out[name] = (('point',), values[:, 0])
+        else:
+            out[name] = (('point', 'alt_km'), values)
+    return out
+
+
+def evaluate_variants(settings: Settings, times: np.ndarray, lats: np.ndarray, lons: np.ndarray, alt: np.ndarray) -> Dataset:
+    _, ds = Iri2020().compare([Settings(), settings], times, lats, lons, alt)
+    return ds.isel(variant=1)
+
+
+def evaluate_chunked(settings: Settings, times: np.ndarray, lats: np.ndarray, lons: np.ndarray, alt: np.ndarray) -> Dataset:
+    from iri20py import evaluate_chunked
+    return evaluate_chunked(times, lats, lons, alt, settings, chunks=7).compute()
+
+
+def evaluate_columnar(settings: Settings, times: np.ndarray, lats: np.ndarray, lons: np.ndarray, alt: np.ndarray) -> Dataset:
+    import pyarrow as pa
+    from iri20py.columnar import record_batches
+    table = pa.Table.from_batches(list(
+        record_batches(times, lats, lons, alt, settings, chunk=5)))
+    npts, nalt = len(times), len(alt)
+    out = Dataset()
+    for name in table.column_names:
+        if name in ('point', 'time', 'lat', 'lon', 'alt'):
+            continue
+        values = table[name].to_numpy().astype(float).reshape(npts, nalt)
+        if name in OARR_FIELDS:
+            out[name] = (('point',), values[:, 0])
+        else:
+            out[name] = (('point', 'alt_km'), values)
+    return out
+
+
+@pytest.mark.parametrize('evaluate', [
+    evaluate_single, evaluate_batch, evaluate_track, evaluate_variants,
+])
+def test_golden(evaluate):
+    report = compare(evaluate, CORPUS)
+    print(report)
+    assert report.passed, str(report)
+    assert len(report.deviations) == len(DENSITIES + TEMPERATURES) + len(OARR_FIELDS) - 2
+
+
+@pytest.mark.parametrize('evaluate', [evaluate_single, evaluate_batch])
+def test_golden_baseline(evaluate):
+    report = compare(evaluate, BASELINE_CORPUS, variables=baseline_variables(BASELINE_CORPUS))
+    print(report)
+    assert report.passed, str(report)
+
+
+def test_golden_chunked():
+    pytest.importorskip('dask.array')
+    report = compare(evaluate_chunked, CORPUS)
+    assert report.passed, str(report)
+
+
+def test_golden_columnar():
+    pytest.importorskip('pyarrow')
+    report = compare(evaluate_columnar, CORPUS, variables=['Ne', 'Te', 'nmF2', 'hmF2', 'B0', 'B1'])
+    assert report.passed, str(report)
+
+
+def test_golden_detects_deviations():
+    def perturbed(*args) -> Dataset:
+        ds = evaluate_batch(*args)
+        ds['Ne'] = ds['Ne']*1.001
+        return ds
+    report = compare(perturbed, CORPUS, variables=['Ne', 'Te'])
+    assert not report.passed
+    assert [dev.variable for dev in report.failures] == ['Ne']
+    assert report.deviations[0].ratio > 1
+    report = compare(perturbed, CORPUS, variables=['Ne'], tolerances={'Ne': Tolerance(2e-3, 0)})
+    assert report.passed
+
+
+def test_call_order_ion_composition():
+    # The EUV flux factors of the RBV-2010 ion composition are kept between
+    # the calls; a previous call with a nearby F10.7 but a different F10.7A
+    # must not leak into the next profile.
+    iri = Iri2020()
+    time = datetime(2014, 6, 21, 12)
+    alt = np.arange(100, 300, 10, dtype=float)
+
+    def run(f107):
+        return iri.evaluate(time, 45.0, 7.0, alt, Settings(f107=f107))[1]
+
+    run((120.3, 150))
+    after_near = run((120, 110))
+    run((200, 200))
+    after_far = run((120, 110))
+    for name in ('O+', 'O2+', 'NO+', 'N+'):
+        np.testing.assert_array_equal(after_near[name].values, after_far[name].values)
@@ -0,0 +1,53 @@
+# %%
+from __future__ import annotations
+import subprocess
+import sys
+
+# Cumulative import time budget of the package, in microseconds.
+IMPORT_BUDGET_US = 50_000
+# Modules that must only be loaded on first use.
+LAZY_MODULES = ('numpy', 'xarray', 'requests', 'iri20py.base', 'iri20py.iri20shim')
+
+
+def import_time() -> int:
+    """Cumulative time to import iri20py in a fresh interpreter, in microseconds."""
+    # Import once first, so that an editable install is rebuilt before timing.
+    subprocess.run([sys.executable, '-c', 'import iri20py'], check=True)
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import iri20py'],
+        check=True, capture_output=True, text=True
+    ).stderr
+    for line in out.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == 'iri20py':
+            return int(fields[1])
+    raise RuntimeError('iri20py not found in the import time report')
+
+
+def test_import_time():
+    elapsed = import_time()
+    print(f'import iri20py: {elapsed/1000:.1f} ms')
+    assert elapsed < IMPORT_BUDGET_US
+
+
+def test_import_is_lazy():
+    code = (
+        'import sys, iri20py; '
+        f'print(",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))'
+    )
+    out = subprocess.run(
+        [sys.executable, '-c', code], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    assert out == '', f'loaded on import: {out}'
+
+
+def test_lazy_attributes():
+    import iri20py
+    assert callable(iri20py.alt_grid)
+    assert iri20py.settings.Settings is not None
+    assert isinstance(iri20py.__version__, str)
+    assert set(iri20py.__all__) <= set(dir(iri20py))
+
+
+if __name__ == '__main__':
+    print(f'import iri20py: {import_time()/1000:.1f} ms')
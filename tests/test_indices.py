@@ -0,0 +1,38 @@
+# %%
+from __future__ import annotations
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from iri20py import Iri2020
+from iri20py.indices import lookup
+from iri20py.settings import Settings
+
+# Middles of the months (the 15th, and the 14th of February), the days around
+# them, and leap days
+TIMES = [
+    datetime(2015, 1, 15, 4), datetime(2015, 2, 13, 23), datetime(2015, 2, 14, 12),
+    datetime(2015, 2, 15, 1), datetime(2016, 2, 14, 7), datetime(2016, 2, 29, 10),
+    datetime(2016, 3, 1, 16), datetime(2019, 7, 14, 20), datetime(2019, 7, 15, 9),
+    datetime(2020, 2, 29, 22), datetime(2021, 11, 30, 13), datetime(2023, 12, 16, 2),
+]
+
+
+@pytest.mark.parametrize('time', TIMES, ids=str)
+def test_lookup(time):
+    _, ds = Iri2020().evaluate(time, 40.0, 255.0, np.array([300.0]), Settings())
+    indices = lookup([time])
+    for key in ('F10.7', 'F10.7_81', 'ap', 'ap_daily', 'kp', 'RZ12', 'IG12'):
+        np.testing.assert_allclose(indices[key][0], json.loads(ds.attrs[key])['value'], rtol=1e-6, err_msg=key)
+
+
+def test_tzaware():
+    # The same times, with and without a time zone
+    tz = timezone(timedelta(hours=-5))
+    aware = [time.replace(tzinfo=timezone.utc).astimezone(tz) for time in TIMES]
+    ref = lookup(TIMES)
+    for values in (lookup(aware, tzaware=True), lookup(np.asarray(TIMES, dtype='datetime64[us]'))):
+        for key, value in ref.items():
+            np.testing.assert_array_equal(values[key], value, err_msg=key)
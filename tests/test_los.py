@@ -0,0 +1,50 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+
+import numpy as np
+
+from iri20py import Iri2020
+from iri20py.los import slant_tec
+from iri20py.settings import Settings
+
+TIMES = [datetime(2022, 3, 21, 18), datetime(2014, 12, 21, 3)]
+SITES = np.asarray([[30.5, 271.0, 0.0], [69.65, 18.96, 0.0]])
+
+
+def test_zenith():
+    # Along a zenith path the slant TEC is the vertical TEC of the profile
+    # above the receiver.
+    satellites = SITES.copy()
+    satellites[:, 2] = 20200.0
+    alt = np.arange(60, 2000.01, 0.5)
+    ref = []
+    for time, (lat, lon, _) in zip(TIMES, SITES):
+        _, ds = Iri2020().evaluate(time, lat, lon, alt, Settings())
+        ne = np.maximum(ds.Ne.values, 0)
+        ref.append(np.sum((ne[1:] + ne[:-1]) / 2 * np.diff(alt)) * 1e-7)  # TECU
+    tec = slant_tec(TIMES, SITES, satellites, Settings(), resolution=None, time_resolution=None)
+    np.testing.assert_allclose(tec.elevation.values, 90.0)
+    np.testing.assert_allclose(tec.stec.values, tec.vtec.values)
+    np.testing.assert_allclose(tec.stec.values, ref, rtol=1e-3)
+    # Profiles of 1 degree columns
+    tec = slant_tec(TIMES, SITES, satellites, Settings())
+    np.testing.assert_allclose(tec.stec.values, ref, rtol=0.03)
+
+
+def test_outside():
+    # Rays below the ionosphere have no electron content
+    satellites = SITES.copy()
+    satellites[:, 2] = 50.0
+    tec = slant_tec(TIMES, SITES, satellites, Settings())
+    np.testing.assert_array_equal(tec.stec.values, 0.0)
+
+
+def test_pole():
+    # Columns at the poles are not centred beyond them
+    receivers = np.asarray([[90.0, 0.0, 0.0], [-90.0, 0.0, 0.0]])
+    satellites = receivers.copy()
+    satellites[:, 2] = 20200.0
+    tec = slant_tec(TIMES, receivers, satellites, Settings(), resolution=7.0)
+    ref = slant_tec(TIMES, receivers, satellites, Settings(), resolution=None)
+    np.testing.assert_allclose(tec.stec.values, ref.stec.values, rtol=1e-3)
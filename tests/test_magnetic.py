@@ -0,0 +1,40 @@
+# %%
+from __future__ import annotations
+import json
+from datetime import datetime
+
+import numpy as np
+
+from iri20py import Iri2020
+from iri20py.magnetic import magnetic_coordinates
+from iri20py.settings import Settings
+
+ALT = np.arange(80, 1001, 20, dtype=float)
+TIME = datetime(2021, 6, 21, 15)
+SITES = [(40.0, 255.0), (-12.05, 283.0), (69.65, 18.96), (-35.3, 149.1), (0.4, 30.25)]
+
+
+def test_oarr():
+    iri = Iri2020()
+    lat, lon = np.array(SITES).T
+    at300 = magnetic_coordinates(TIME, lat, lon, 300.0)
+    at600 = magnetic_coordinates(TIME, lat, lon, 600.0)
+    for i, (la, lo) in enumerate(SITES):
+        _, ds = iri.evaluate(TIME, la, lo, ALT, Settings())
+        for key in ('dip', 'declination', 'dip-lat-mod', 'geomag_lat', 'geomag_lon'):
+            np.testing.assert_allclose(
+                at300[key].values[i], json.loads(ds.attrs[key])['value'],
+                rtol=1e-5, atol=1e-4, err_msg=key)
+        np.testing.assert_allclose(
+            at600['L-value'].values[i], json.loads(ds.attrs['L-value'])['value'], rtol=1e-5)
+
+
+def test_coefficients_restored():
+    # The model reloads the IGRF coefficients only when the date changes; a
+    # call for another epoch in between must leave them as they were.
+    iri = Iri2020()
+    _, ref = iri.evaluate(TIME, 40.0, 255.0, ALT, Settings())
+    magnetic_coordinates(datetime(1975, 1, 1), 40.0, 255.0)
+    _, again = iri.evaluate(TIME, 40.0, 255.0, ALT, Settings())
+    np.testing.assert_array_equal(again.Ne.values, ref.Ne.values)
+    assert again.attrs == ref.attrs
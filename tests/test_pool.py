@@ -0,0 +1,56 @@
+# %%
+from __future__ import annotations
+import json
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from iri20py import Iri2020, IriPool
+from iri20py.base import OARR_FIELDS
+from iri20py.settings import Settings
+
+TIMES = np.asarray([
+    '2014-03-20T12', '2014-06-21T18', '2014-12-21T03', '2019-07-14T20', '2022-03-21T05', '2014-03-20T12'
+], dtype='datetime64[us]')
+LATS = np.asarray([45.3, -12.05, 69.65, 40.0, 30.5, -35.3])
+LONS = np.asarray([7.1, 283.0, 18.96, 255.0, 271.0, 149.1])
+ALT = np.arange(80, 1001, 20, dtype=float)
+
+
+def test_pool():
+    settings = Settings()
+    with IriPool(2, settings) as pool:
+        profiles = pool.evaluate(TIMES.astype(object), LATS, LONS, ALT, settings, chunksize=2)
+    _, ref = Iri2020().evaluate_batch(TIMES, LATS, LONS, ALT, settings)
+    assert len(profiles) == len(TIMES)
+    for i, ds in enumerate(profiles):
+        for key in ds.data_vars:
+            np.testing.assert_allclose(ds[key].values, ref[key].values[i], rtol=1e-5, err_msg=key)
+        for key in OARR_FIELDS:
+            np.testing.assert_allclose(
+                json.loads(ds.attrs[key])['value'], ref[key].values[i],
+                rtol=1e-5, atol=1e-5, err_msg=key)
+
+
+def _memory(month: int = 0) -> dict:
+    # Memory of the worker (kB), after evaluating a profile of `month`.
+    if month:
+        Iri2020().evaluate(datetime(2020, month, 15, 12), 40.0, 255.0, ALT)
+    with open('/proc/self/smaps_rollup') as fd:
+        fields = (line.split() for line in fd)
+        return {line[0][:-1]: int(line[1]) for line in fields if line[-1] == 'kB'}
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='forked workers on Linux only')
+def test_worker_memory():
+    # The workers share the model data of the parent; rereading the monthly
+    # coefficients adds little private memory.
+    with IriPool(1, Settings()) as pool:
+        assert pool.shared
+        memory = pool.map(_memory, range(13), chunksize=13)
+    shared = memory[-1]['Shared_Clean'] + memory[-1]['Shared_Dirty']
+    private = memory[-1]['Private_Clean'] + memory[-1]['Private_Dirty']
+    assert private < 0.25 * shared
+    assert memory[-1]['Private_Dirty'] - memory[1]['Private_Dirty'] < 2048
@@ -0,0 +1,71 @@
+# %%
+from __future__ import annotations
+from dataclasses import replace
+
+import numpy as np
+import pytest
+from xarray import Dataset
+
+from iri20py import Iri2020
+from iri20py.profiles import profile_parameters, synthesize_profiles
+from iri20py.settings import Settings
+
+from golden import Tolerance, compare, load
+
+# The model computes the profile in single precision; where the intermediate
+# region is ill-conditioned (HST close to HEF) this amounts to a few 1e-4.
+TOLERANCE = Tolerance(1e-3, 1e-3)
+PEAKS = ['nmF2', 'hmF2', 'nmF1', 'hmF1', 'nmE', 'hmE', 'nmD', 'hmD', 'B0', 'B1', 'c1']
+
+
+def evaluate_synthesized(settings: Settings, times: np.ndarray, lats: np.ndarray, lons: np.ndarray, alt: np.ndarray) -> Dataset:
+    ds = profile_parameters(times, lats, lons, settings)
+    ne = synthesize_profiles(ds, alt)
+    ds['Ne'] = (('point', 'alt_km'), np.where(np.isnan(ne), -1e-6, ne))  # fill value of the model
+    return ds
+
+
+def test_profiles_golden():
+    corpus = load()
+    # The FT-2001 D region is not synthesized.
+    skip = corpus.names.index('d-region-ft2001')
+    keep = corpus.variant != skip
+    corpus = replace(corpus, **{
+        key: getattr(corpus, key)[keep]
+        for key in ('variant', 'time', 'lat', 'lon', 'outf', 'oarr')
+    })
+    report = compare(evaluate_synthesized, corpus, variables=['Ne'] + PEAKS,
+                     tolerances={'Ne': TOLERANCE})
+    assert report.passed, str(report)
+
+
+@pytest.mark.parametrize('topside', ['IRI-90', 'IRICor', 'NeQuick', 'IRICor2'])
+def test_profiles_topside(topside):
+    rng = np.random.default_rng(46)
+    npts = 60
+    times = np.datetime64('2014-01-01') + \
+        rng.integers(0, 365*24*60, npts).astype('timedelta64[m]')
+    lats = rng.uniform(-89, 89, npts)
+    lons = rng.uniform(0, 360, npts)
+    alt = np.concatenate([np.arange(60, 2000, 2.5), np.arange(2000, 30001, 1000)])
+    settings = Settings(topside_model=topside)
+    _, ref = Iri2020().evaluate_batch(times, lats, lons, alt, settings, variables=['Ne'])
+    params = profile_parameters(times, lats, lons, settings)
+    ne = synthesize_profiles(params, alt)
+    ref = ref.Ne.values
+    valid = ref > 0
+    assert np.array_equal(np.isnan(ne), ~valid)
+    np.testing.assert_allclose(ne[valid], ref[valid], rtol=TOLERANCE.rtol)
+    # Altitudes per point
+    shifted = alt[None, :] + rng.uniform(0, 2, (npts, 1))
+    _, ref = Iri2020().evaluate_batch(times[:1], lats[:1], lons[:1], shifted[0], settings, variables=['Ne'])
+    valid = ref.Ne.values[0] > 0
+    np.testing.assert_allclose(
+        synthesize_profiles(params, shifted)[0, valid], ref.Ne.values[0, valid], rtol=TOLERANCE.rtol)
+
+
+def test_profiles_unsupported():
+    with pytest.raises(ValueError):
+        profile_parameters(np.datetime64('2014-01-01'), [0.0], [0.0], Settings(ne_mode='Lay-function'))
+    with pytest.raises(ValueError):
+        profile_parameters(np.datetime64('2014-01-01'), [0.0], [0.0], Settings(d_region='FT-2001 & DRS-1995'))
@@ -0,0 +1,82 @@
+# %%
+from __future__ import annotations
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from iri20py import Iri2020
+from iri20py.base import OARR_FIELDS, TABLE_INPUTS
+from iri20py.settings import ComputedSettings, Settings
+from iri20py.table import build_table, f107_index, solar_overrides
+from iri20py.utils import iridates
+
+ALT = np.arange(100, 1001, 25, dtype=float)
+
+
+def test_validate(tmp_path):
+    table = build_table(
+        tmp_path / 'table', days=range(15, 365, 60), uts=range(0, 24, 4),
+        lats=range(-60, 61, 30), lons=range(0, 360, 60), f107=(70.0, 150.0),
+        alt=ALT, settings=Settings(), validate=256, seed=0)
+    assert table.validate(256, seed=0) == table.errors
+    # Errors of the table against the model at other points, within the lattice
+    rng = np.random.default_rng(1)
+    npts = 400
+    day = rng.integers(15, 316, npts)
+    ut = rng.uniform(0, 20, npts)
+    lat = rng.uniform(-60, 60, npts)
+    lon = rng.uniform(0, 360, npts)
+    f107 = rng.uniform(70, 150, npts)
+    times = np.datetime64('2020-01-01', 'us') + (day - 1).astype('timedelta64[D]') \
+        + (ut * 3.6e9).astype('timedelta64[us]')
+    _, ds = Iri2020().evaluate_batch(times, lat, lon, ALT, Settings(), overrides=solar_overrides(f107))
+    ne, peaks = table.interpolate(day, ut, lat, lon, f107)
+    valid = ds.Ne.values > 0
+    errors = {'Ne': np.abs(10**ne[valid] / ds.Ne.values[valid] - 1)}
+    for idx, name in enumerate(table.peaks):
+        if name in ('nmF2', 'hmF2', 'B0', 'B1'):
+            errors[name] = np.abs(peaks[:, idx] * OARR_FIELDS[name].scale / ds[name].values - 1)
+    for name, err in errors.items():
+        stated = table.errors[name]
+        assert 0 < stated['p50'] <= stated['p95'] <= stated['max'], name
+        assert np.percentile(err, 50) <= 1.5 * stated['p50'], name
+        assert np.percentile(err, 95) <= 1.5 * stated['p95'], name
+
+
+def test_tabulated(tmp_path):
+    table = build_table(
+        tmp_path / 'table', days=(15, 195), uts=(0, 12), lats=(-30, 30), lons=(0, 180),
+        f107=(70.0, 150.0), alt=ALT, settings=Settings(), validate=0)
+    assert pickle.loads(pickle.dumps(table)).path == table.path
+    iri = Iri2020()
+    times = np.asarray(['2020-01-15T00', '2020-03-01T06', '2020-07-13T12'], dtype='datetime64[us]')
+    lat = np.asarray([-30.0, 0.0, 30.0])
+    lon = np.asarray([0.0, 90.0, 180.0])
+    year, day, ut = iridates(times)
+    daily, mean = f107_index(year, day)
+    ne, peaks = table.interpolate(day, ut / 3600.0, lat, lon, 0.5*(daily + mean))
+    csettings = ComputedSettings.from_settings(Settings())
+    oarr = csettings.oarr.copy()
+    with iri.tabulated(tmp_path / 'table') as tab:
+        assert tab is iri and iri.mode == 'table'
+        _, batch = iri.evaluate_batch(times, lat, lon, ALT, Settings())
+        profiles = [iri.evaluate(t, la, lo, ALT, csettings)[1] for t, la, lo in zip(times.tolist(), lat, lon)]
+    assert iri.mode == 'model' and iri.table is None
+    # The table inputs are kept, the settings of the caller untouched
+    np.testing.assert_array_equal(csettings.oarr, oarr)
+    np.testing.assert_allclose(np.log10(batch.Ne.values), ne, rtol=1e-5)
+    assert set(batch.data_vars) == {'Ne'} | set(table.peaks) | set(TABLE_INPUTS) - {'lat', 'lon'}
+    for idx, name in enumerate(table.peaks):
+        np.testing.assert_allclose(batch[name].values, peaks[:, idx] * OARR_FIELDS[name].scale, rtol=1e-5)
+    np.testing.assert_allclose(batch['F10.7'].values, daily, rtol=1e-5)
+    for k, ds in enumerate(profiles):
+        assert 'table' in ds.attrs and 'dip' not in ds.attrs
+        np.testing.assert_allclose(ds.Ne.values, batch.Ne.values[k], rtol=1e-5)
+        for name in table.peaks:
+            assert json.loads(ds.attrs[name])['value'] == pytest.approx(float(batch[name][k]), rel=1e-5)
+    # Outside the block, the model is evaluated
+    _, ds = iri.evaluate_batch(times, lat, lon, ALT, Settings())
+    assert 'Te' in ds and 'table' not in ds.attrs
+    assert not np.allclose(ds.Ne.values, batch.Ne.values, rtol=1e-3)
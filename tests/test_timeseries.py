@@ -0,0 +1,60 @@
+# %%
+from __future__ import annotations
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from iri20py import Iri2020
+from iri20py.base import OARR_FIELDS
+from iri20py.settings import Settings
+
+ALT = np.arange(80, 1001, 20, dtype=float)
+
+
+def test_location_cache():
+    # The magnetic coordinates of the previous call are reused at the same
+    # location; a nearby site in between must not leak into the revisit of
+    # an integer or a non-integer site.
+    iri = Iri2020()
+    time = datetime(2022, 3, 21, 12)
+    for lat in (40.0, 40.3):
+        _, first = iri.evaluate(time, lat, -105.0, ALT, Settings())
+        _, nearby = iri.evaluate(time, 40.7, -105.0, ALT, Settings())
+        _, again = iri.evaluate(time, lat, -105.0, ALT, Settings())
+        assert not np.array_equal(first.Ne.values, nearby.Ne.values)
+        np.testing.assert_array_equal(again.Ne.values, first.Ne.values)
+        for key in OARR_FIELDS:
+            assert again.attrs[key] == first.attrs[key], key
+
+
+@pytest.mark.parametrize('lat, lon, day', [
+    (40.0, 255.0, '2022-03-21'), (69.65, 18.96, '2014-12-21'), (-12.05, 283.0, '2014-06-21'),
+])
+def test_interpolation(lat, lon, day):
+    # Every minute of a day, across the terminators, the steps of the 3-hour
+    # ap index and local midnight
+    iri = Iri2020()
+    times = np.datetime64(day, 'us') + np.arange(0, 86400, 60).astype('timedelta64[s]')
+    _, ref = iri.evaluate_timeseries(lat, lon, times, ALT, Settings(), variables=['Ne', 'Te'])
+    for rtol in (0.01, 0.005):
+        _, ds = iri.evaluate_timeseries(
+            lat, lon, times, ALT, Settings(), variables=['Ne', 'Te'], rtol=rtol)
+        assert ds.attrs['knots'] < len(times)
+        for key in ('Ne', 'Te'):
+            value, truth = ds[key].values, ref[key].values
+            valid = truth > 0
+            np.testing.assert_array_equal(value[~valid], truth[~valid])
+            # Error as defined by evaluate_timeseries
+            scale = np.maximum(truth, 1e-3 * np.max(np.where(valid, truth, 0.0), axis=-1, keepdims=True))
+            assert np.max(np.abs(value - truth)[valid] / scale[valid]) <= rtol, key
+
+
+def test_sparse():
+    # Hourly times take fewer evaluations directly than as 15 minute knots
+    iri = Iri2020()
+    times = np.datetime64('2022-03-21T10', 'us') + np.arange(5).astype('timedelta64[h]')
+    _, ref = iri.evaluate_timeseries(40.0, 255.0, times, ALT, Settings(), variables=['Ne'])
+    _, ds = iri.evaluate_timeseries(40.0, 255.0, times, ALT, Settings(), variables=['Ne'], rtol=0.01)
+    assert ds.attrs['knots'] == len(times)
+    np.testing.assert_array_equal(ds.Ne.values, ref.Ne.values)